@@ -1,25 +1,50 @@
 """Flask application factory."""
-from flask import Flask
+from flask import Flask, jsonify
 from flask_cors import CORS
+from app.compression import init_compression
 from app.config import Config
-from app.routes import auth_bp, inventory_bp, orders_bp
+from app.db import pool_stats
+from app.json_provider import AppJSONProvider
+from app.metrics import init_metrics, metrics_response, scrape_authorized
+from app.routes import alerts_bp, analytics_bp, auth_bp, inventory_bp, orders_bp, reservations_bp
 
 
 def create_app():
     """Create and configure the Flask application."""
     app = Flask(__name__)
     
+    # orjson-backed JSON (stdlib fallback), request metrics and negotiated
+    # compression (metrics first, so response sizes are measured compressed)
+    app.json = AppJSONProvider(app)
+    init_metrics(app)
+    init_compression(app)
+    
     # Configure CORS
-    CORS(app, origins=Config.CORS_ORIGINS, supports_credentials=True)
+    CORS(app, origins=Config.CORS_ORIGINS, supports_credentials=True, expose_headers=["X-Sync-Watermark"])
     
     # Register blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(inventory_bp)
     app.register_blueprint(orders_bp)
+    app.register_blueprint(reservations_bp)
+    app.register_blueprint(analytics_bp)
+    app.register_blueprint(alerts_bp)
     
     # Health check endpoint
     @app.route("/health", methods=["GET"])
     def health_check():
         return {"status": "healthy"}, 200
     
+    # Connection pool counters for the worker serving the request
+    @app.route("/health/db", methods=["GET"])
+    def db_health_check():
+        return {"pool": pool_stats()}, 200
+    
+    # Prometheus metrics merged across all workers (see app/metrics.py)
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        if not scrape_authorized():
+            return jsonify({"error": "Invalid or missing metrics token"}), 401
+        return metrics_response()
+    
     return app
@@ -0,0 +1,113 @@
+"""Low-stock and out-of-stock alerts derived from the stock feed.
+
+The watcher keeps the last announced stock level ("ok", "low", "out")
+of recently changed items (at most ``LOW_STOCK_TRACKED_ITEMS``, least
+recently used dropped first) and only announces level changes, so a run
+of order decrements inside the "low" band produces no alerts at all. A
+change is announced after a quiet period (``LOW_STOCK_DEBOUNCE_SECONDS``)
+measured from the first change, carrying the latest level; if the item
+returns to its announced level before then, nothing is sent.
+
+The first event seen for an item (after a restart, or once it has been
+dropped) only records its level: the level before it is unknown, and
+assuming "ok" would repeat the alert of every item that is already low.
+"""
+import logging
+import os
+import threading
+import time
+from app.cache import MISSING, TTLCache
+from app.config import Config
+from app.events import EventHub, stock_feed, stock_hub
+from app.models.threshold import ThresholdModel
+
+logger = logging.getLogger(__name__)
+
+# Alert type announced when an item enters each level
+ALERT_TYPES = {"out": "out_of_stock", "low": "low_stock", "ok": "restocked"}
+
+
+class LowStockWatcher:
+    """Turns ``stock`` events into debounced ``alert`` events."""
+    
+    def __init__(self, hub: EventHub, debounce: float | None = None):
+        self.hub = hub
+        self.debounce = Config.LOW_STOCK_DEBOUNCE_SECONDS if debounce is None else debounce
+        self._pid = None
+        self._lock = threading.Lock()
+        # item_id -> last announced level
+        self._levels = TTLCache("low_stock_levels", max_size=Config.LOW_STOCK_TRACKED_ITEMS)
+        # item_id -> (due time, alert) for changes not yet announced
+        self._pending: dict[str, tuple[float, dict]] = {}
+    
+    def start(self) -> None:
+        """Start watching in this process (and the stock feed it reads)."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._levels.clear()
+            self._pending.clear()
+        subscription = stock_hub.subscribe()
+        thread = threading.Thread(target=self._run, args=(subscription,), name="low-stock-watcher", daemon=True)
+        thread.start()
+        stock_feed.start()
+    
+    def _run(self, subscription) -> None:
+        wait = max(self.debounce, 0.1)
+        while True:
+            event = subscription.get(timeout=wait)
+            try:
+                if event:
+                    self.handle(event)
+                self.flush()
+            except Exception as e:
+                logger.warning("Low-stock watcher skipped an event: %s", e)
+    
+    def handle(self, event: dict) -> None:
+        """Record the level implied by a ``stock`` event."""
+        item_id = event["id"]
+        if event.get("deleted"):
+            self._levels.invalidate(item_id)
+            self._pending.pop(item_id, None)
+            return
+        
+        threshold = ThresholdModel.threshold_for(item_id, event.get("category"))
+        level = ThresholdModel.level(event["quantity"], threshold)
+        
+        announced = self._levels.get(item_id)
+        if announced is MISSING:
+            # Previous level unknown: this becomes the baseline, not a change
+            self._levels.set(item_id, level)
+            self._pending.pop(item_id, None)
+            return
+        if level == announced:
+            # Back where we last announced: cancel any pending change
+            self._pending.pop(item_id, None)
+            return
+        
+        alert = {
+            "type": ALERT_TYPES[level],
+            "level": level,
+            "previousLevel": announced,
+            "threshold": threshold,
+            **{key: value for key, value in event.items() if key != "type"}
+        }
+        due = self._pending[item_id][0] if item_id in self._pending else time.monotonic() + self.debounce
+        self._pending[item_id] = (due, alert)
+    
+    def flush(self) -> None:
+        """Announce pending changes whose quiet period has elapsed."""
+        now = time.monotonic()
+        for item_id, (due, alert) in list(self._pending.items()):
+            if due <= now:
+                del self._pending[item_id]
+                self._levels.set(item_id, alert["level"])
+                self.hub.publish(alert)
+
+
+alert_hub = EventHub("alerts")
+low_stock_watcher = LowStockWatcher(alert_hub)
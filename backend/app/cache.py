@@ -0,0 +1,91 @@
+"""Process-local, bounded caches.
+
+Each gunicorn worker keeps its own copy, so entries must tolerate being
+stale for up to their TTL in the other workers.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+# Sentinel returned by TTLCache.get on a miss (None is a valid cached value)
+MISSING = object()
+
+# All caches created in this process, by name (used for stats reporting)
+_registry: dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """Thread-safe LRU cache with optional per-entry time-to-live.
+    
+    Lookups, inserts and evictions are O(1). When the cache is full the
+    least recently used entry is evicted. A TTL of ``None`` keeps entries
+    until they are evicted; a TTL of 0 or less disables caching.
+    """
+    
+    def __init__(self, name: str, max_size: int, ttl: float | None = None):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        _registry[name] = self
+    
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for ``key`` or ``MISSING``."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (entry[0] and entry[0] < now):
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """Store ``value`` under ``key``, evicting the LRU entry if full."""
+        if self.max_size <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is not None and ttl <= 0:
+            return
+        expires_at = time.monotonic() + ttl if ttl else 0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key: Hashable) -> None:
+        """Drop ``key`` from the cache if present."""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._data.clear()
+    
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxSize": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+def all_caches() -> list[TTLCache]:
+    """Return every cache registered in this process."""
+    return list(_registry.values())
@@ -0,0 +1,115 @@
+"""Negotiated response compression (zstd, brotli, gzip).
+
+Buffered responses are compressed in one call once they reach
+``COMPRESS_MIN_BYTES``; streamed responses (the full item listing and
+exports) are compressed chunk by chunk as they are generated. Server-sent
+events, already-encoded bodies and non-text types are left alone.
+"""
+import zlib
+from typing import Callable, Iterable
+from flask import Flask, Response, request
+from app.config import Config
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional encoding
+    zstandard = None
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/plain",
+    "text/html",
+    "image/svg+xml",
+}
+
+
+def _gzip():
+    compressor = zlib.compressobj(Config.COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def _br():
+    compressor = brotli.Compressor(quality=Config.COMPRESS_BR_QUALITY)
+    return compressor.process, compressor.finish
+
+
+def _zstd():
+    compressor = zstandard.ZstdCompressor(level=Config.COMPRESS_ZSTD_LEVEL).compressobj()
+    return compressor.compress, compressor.flush
+
+
+# Content-Encoding token -> factory returning (compress, finish) callables
+ENCODERS: dict[str, Callable] = {"gzip": _gzip}
+if brotli is not None:
+    ENCODERS["br"] = _br
+if zstandard is not None:
+    ENCODERS["zstd"] = _zstd
+
+
+def init_compression(app: Flask) -> None:
+    """Compress eligible responses of ``app``."""
+    app.after_request(compress_response)
+
+
+def negotiate(accept_encoding) -> str | None:
+    """Pick the preferred configured encoding the client accepts."""
+    best, best_quality = None, 0
+    for name in Config.COMPRESS_ALGORITHMS:
+        if name not in ENCODERS:
+            continue
+        quality = accept_encoding.quality(name)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compress_response(response: Response) -> Response:
+    """``after_request`` hook applying the negotiated encoding."""
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 304)
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_TYPES
+    ):
+        return response
+    
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(request.accept_encodings)
+    if not encoding:
+        return response
+    
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, ENCODERS[encoding]())
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < Config.COMPRESS_MIN_BYTES:
+            return response
+        compress, finish = ENCODERS[encoding]()
+        response.set_data(compress(body) + finish())
+    
+    response.headers["Content-Encoding"] = encoding
+    # The encoded bytes differ, so a strong validator no longer applies
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def _compress_stream(chunks: Iterable, encoder) -> Iterable[bytes]:
+    compress, finish = encoder
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
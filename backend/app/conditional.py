@@ -0,0 +1,47 @@
+"""Conditional GET helpers (ETag / Last-Modified, 304 Not Modified).
+
+Routes compute a validator from something cheap (an item's ``updatedAt``
+or a collection's version counter) and call :func:`not_modified` before
+loading or serializing anything; when the client already has the current
+representation the request ends with an empty 304.
+"""
+import hashlib
+from datetime import datetime
+from typing import Optional
+from flask import Response, current_app, request
+
+# Clients may reuse a response only after revalidating it
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """Opaque validator derived from ``parts`` (used as a weak ETag)."""
+    raw = "\x1f".join(str(part) for part in parts).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:24]
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """A 304 response if the request's validators still match, else None.
+    
+    ``If-None-Match`` takes precedence over ``If-Modified-Since``, as in
+    RFC 9110.
+    """
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified:
+        fresh = last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    else:
+        fresh = False
+    
+    if not fresh:
+        return None
+    return with_validators(current_app.response_class(status=304), etag, last_modified)
+
+
+def with_validators(response: Response, etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """Attach the ETag, Last-Modified and revalidation headers to ``response``."""
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
@@ -15,11 +15,154 @@ class Config:
     # Password should be URL-encoded if it contains special characters
     MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
     MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "inventory_db")
+    # Multi-document transactions need a replica set or mongos (Atlas
+    # always is): "auto" detects this from the server, "true"/"false" force it
+    MONGODB_TRANSACTIONS = os.getenv("MONGODB_TRANSACTIONS", "auto").lower()
+    
+    # Connection pool (per worker process) and timeouts
+    MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+    MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "2"))
+    MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+    MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "10000"))
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+    MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "60000"))
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+    # Wire compression, e.g. "zstd,snappy,zlib" (zstd/snappy need their packages)
+    MONGODB_COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "")
+    # Read preference for listing/export reads, e.g. "secondaryPreferred"
+    MONGODB_READ_PREFERENCE = os.getenv("MONGODB_READ_PREFERENCE", "primary")
+    # Indexes are created by `python migrate.py`; enable for local development
+    MONGODB_AUTO_CREATE_INDEXES = os.getenv("MONGODB_AUTO_CREATE_INDEXES", "false").lower() == "true"
     
     # JWT
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "default-secret-key")
     JWT_EXPIRATION_HOURS = int(os.getenv("JWT_EXPIRATION_HOURS", "24"))
     
+    # Password hashing: bcrypt cost (hashes are upgraded on login when it
+    # changes), hashing threads per worker and max queued operations
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    BCRYPT_THREADS = int(os.getenv("BCRYPT_THREADS", "2"))
+    BCRYPT_MAX_QUEUE = int(os.getenv("BCRYPT_MAX_QUEUE", "8"))
+    
+    # Authenticated user cache (per worker); set max size or TTL to 0 to disable.
+    # Users are never modified through the API, so a role or account change
+    # made in the database takes effect within the TTL.
+    USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    
+    # Listing / pagination
+    ITEMS_PAGE_SIZE = int(os.getenv("ITEMS_PAGE_SIZE", "100"))
+    ITEMS_MAX_PAGE_SIZE = int(os.getenv("ITEMS_MAX_PAGE_SIZE", "500"))
+    MONGODB_BATCH_SIZE = int(os.getenv("MONGODB_BATCH_SIZE", "500"))
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+    
+    # Public QR lookup cache (per worker) and HTTP caching
+    QR_CACHE_MAX_SIZE = int(os.getenv("QR_CACHE_MAX_SIZE", "5000"))
+    QR_CACHE_TTL_SECONDS = float(os.getenv("QR_CACHE_TTL_SECONDS", "30"))
+    QR_NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv("QR_NEGATIVE_CACHE_TTL_SECONDS", "10"))
+    QR_PUBLIC_MAX_AGE = int(os.getenv("QR_PUBLIC_MAX_AGE", "15"))
+    QR_BATCH_MAX_CODES = int(os.getenv("QR_BATCH_MAX_CODES", "100"))
+    
+    # Rendered QR images: per-worker LRU size and optional shared disk store
+    QR_IMAGE_CACHE_SIZE = int(os.getenv("QR_IMAGE_CACHE_SIZE", "2000"))
+    QR_IMAGE_CACHE_DIR = os.getenv("QR_IMAGE_CACHE_DIR", "")
+    
+    # Bulk label sheets: render processes for print_labels.py, and max
+    # items per POST /items/labels (rendered inline; larger runs offline)
+    LABEL_RENDER_WORKERS = int(os.getenv("LABEL_RENDER_WORKERS", "2"))
+    LABEL_MAX_ITEMS = int(os.getenv("LABEL_MAX_ITEMS", "500"))
+    
+    # Bulk import: rows per bulk write and max per-row errors reported
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+    IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+    
+    # Rate limiting: "memory" (per worker) or "mongo" (shared by all workers)
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_SWEEP_SECONDS = float(os.getenv("RATE_LIMIT_SWEEP_SECONDS", "60"))
+    PUBLIC_RATE_LIMIT_PER_MINUTE = int(os.getenv("PUBLIC_RATE_LIMIT_PER_MINUTE", "30"))
+    RATE_LIMIT_CAS_RETRIES = int(os.getenv("RATE_LIMIT_CAS_RETRIES", "3"))
+    
+    # Per-user token buckets for authenticated endpoints, by role:
+    # tokens refilled per minute and burst capacity
+    RATE_LIMIT_TIERS = {
+        "owner": {
+            "per_minute": int(os.getenv("RATE_LIMIT_OWNER_PER_MINUTE", "600")),
+            "burst": int(os.getenv("RATE_LIMIT_OWNER_BURST", "200"))
+        },
+        "buyer": {
+            "per_minute": int(os.getenv("RATE_LIMIT_BUYER_PER_MINUTE", "120")),
+            "burst": int(os.getenv("RATE_LIMIT_BUYER_BURST", "60"))
+        },
+        "default": {
+            "per_minute": int(os.getenv("RATE_LIMIT_DEFAULT_PER_MINUTE", "60")),
+            "burst": int(os.getenv("RATE_LIMIT_DEFAULT_BURST", "30"))
+        }
+    }
+    
+    # Tokens consumed per request, by endpoint (blueprint.function); default 1
+    RATE_LIMIT_ROUTE_COSTS = {
+        "inventory.get_all_items": 10,
+        "orders.get_orders": 10,
+        "orders.create_order": 5,
+        "inventory.get_qr_image": 2,
+        "inventory.sync_snapshot": 20
+    }
+    
+    # Stock event feed: "changestream", "outbox" (capped collection written
+    # by the app, for standalone servers) or "auto" (detect replica set)
+    STOCK_FEED_SOURCE = os.getenv("STOCK_FEED_SOURCE", "auto")
+    STOCK_OUTBOX_SIZE_BYTES = int(os.getenv("STOCK_OUTBOX_SIZE_BYTES", str(16 * 1024 * 1024)))
+    STOCK_FEED_RETRY_SECONDS = float(os.getenv("STOCK_FEED_RETRY_SECONDS", "5"))
+    
+    # Server-sent events: per-subscriber queue size, subscribers per
+    # worker process and keep-alive interval
+    EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+    EVENT_MAX_SUBSCRIBERS = int(os.getenv("EVENT_MAX_SUBSCRIBERS", "5000"))
+    # Separate cap for anonymous /items/qr/<token>/stream clients, so they
+    # cannot lock out authenticated dashboards
+    PUBLIC_STREAM_MAX_SUBSCRIBERS = int(os.getenv("PUBLIC_STREAM_MAX_SUBSCRIBERS", "1000"))
+    SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+    
+    # Low-stock alerts: quiet period before a level change is announced
+    LOW_STOCK_DEBOUNCE_SECONDS = float(os.getenv("LOW_STOCK_DEBOUNCE_SECONDS", "5"))
+    LOW_STOCK_TRACKED_ITEMS = int(os.getenv("LOW_STOCK_TRACKED_ITEMS", "100000"))
+    THRESHOLD_CACHE_TTL_SECONDS = float(os.getenv("THRESHOLD_CACHE_TTL_SECONDS", "30"))
+    
+    # Cart holds: lifetime per reserve/extend, longest total hold, how
+    # often expired holds are returned to stock, and per-buyer limits
+    # (products held at once, units held of one product)
+    RESERVATION_TTL_SECONDS = int(os.getenv("RESERVATION_TTL_SECONDS", "600"))
+    RESERVATION_MAX_SECONDS = int(os.getenv("RESERVATION_MAX_SECONDS", "3600"))
+    RESERVATION_SWEEP_SECONDS = float(os.getenv("RESERVATION_SWEEP_SECONDS", "15"))
+    RESERVATION_MAX_PER_BUYER = int(os.getenv("RESERVATION_MAX_PER_BUYER", "50"))
+    RESERVATION_MAX_QUANTITY = int(os.getenv("RESERVATION_MAX_QUANTITY", "10"))
+    
+    # Scanner sync: page size of delta pages, how far back a watermark is
+    # re-read to cover in-flight writes, and how long deletions are kept
+    SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "1000"))
+    SYNC_MAX_PAGE_SIZE = int(os.getenv("SYNC_MAX_PAGE_SIZE", "5000"))
+    SYNC_OVERLAP_SECONDS = float(os.getenv("SYNC_OVERLAP_SECONDS", "5"))
+    SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+    
+    # Response compression: encodings in order of preference (br and zstd
+    # only when their packages are installed) and the smallest body worth
+    # compressing
+    COMPRESS_ALGORITHMS = [
+        name.strip() for name in os.getenv("COMPRESS_ALGORITHMS", "zstd,br,gzip").split(",") if name.strip()
+    ]
+    COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "4"))
+    COMPRESS_BR_QUALITY = int(os.getenv("COMPRESS_BR_QUALITY", "4"))
+    COMPRESS_ZSTD_LEVEL = int(os.getenv("COMPRESS_ZSTD_LEVEL", "3"))
+    
+    # Metrics: directory where each gunicorn worker writes its snapshot
+    # for /metrics to merge (empty: each worker reports only itself), how
+    # often it is written, and the bearer token scrapes must send (without
+    # one, /metrics is only served in debug mode)
+    METRICS_DIR = os.getenv("METRICS_DIR", "")
+    METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    
     # CORS - Support multiple origins (comma-separated)
     # In production, set: CORS_ORIGINS=https://your-app.vercel.app,https://www.yourdomain.com
     cors_origins_str = os.getenv("CORS_ORIGINS", "http://localhost:3000")
@@ -1,41 +1,251 @@
 """MongoDB database connection and initialization."""
-from pymongo import MongoClient, ASCENDING
+import os
+import threading
+from pymongo import MongoClient
+from typing import Callable, TypeVar
+from pymongo import monitoring
+from pymongo.client_session import ClientSession
 from pymongo.database import Database
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
 from app.config import Config
+from app.metrics import record_command
+
+T = TypeVar("T")
 
 # Global database client and db reference
 _client: MongoClient | None = None
 _db: Database | None = None
+_read_db: Database | None = None
+# PID that created the client; a forked child must not reuse it
+_client_pid: int | None = None
+# Whether the server is a replica set member or mongos, from ``hello``
+_replicated: bool | None = None
+_init_lock = threading.Lock()
+
+
+class _PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters, updated from PyMongo's pool events."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self) -> None:
+        with self._lock:
+            self.created = 0
+            self.closed = 0
+            self.checked_out = 0
+            self.checked_in = 0
+            self.checkout_failed = 0
+            self.pools_cleared = 0
+    
+    def _inc(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+    
+    def connection_created(self, event):
+        self._inc("created")
+    
+    def connection_closed(self, event):
+        self._inc("closed")
+    
+    def connection_checked_out(self, event):
+        self._inc("checked_out")
+    
+    def connection_checked_in(self, event):
+        self._inc("checked_in")
+    
+    def connection_check_out_failed(self, event):
+        self._inc("checkout_failed")
+    
+    def pool_cleared(self, event):
+        self._inc("pools_cleared")
+    
+    # Events not tracked
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_check_out_started(self, event):
+        pass
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "open": self.created - self.closed,
+                "inUse": self.checked_out - self.checked_in,
+                "created": self.created,
+                "closed": self.closed,
+                "checkoutFailed": self.checkout_failed,
+                "poolsCleared": self.pools_cleared
+            }
+
+
+_pool_stats = _PoolStats()
+
+
+class _CommandMetrics(monitoring.CommandListener):
+    """Feeds command counts and round-trip times to ``app.metrics``."""
+    
+    def started(self, event):
+        pass
+    
+    def succeeded(self, event):
+        record_command(event.command_name, event.duration_micros / 1e6)
+    
+    def failed(self, event):
+        record_command(event.command_name, event.duration_micros / 1e6, failed=True)
+
+
+_command_metrics = _CommandMetrics()
 
 
-def get_db() -> Database:
-    """Get the MongoDB database instance."""
-    global _client, _db
+def _client_options() -> dict:
+    """MongoClient pool and timeout settings from Config."""
+    options = {
+        "maxPoolSize": Config.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": Config.MONGODB_MIN_POOL_SIZE,
+        "maxIdleTimeMS": Config.MONGODB_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": Config.MONGODB_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": Config.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": Config.MONGODB_SOCKET_TIMEOUT_MS,
+        "waitQueueTimeoutMS": Config.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "event_listeners": [_pool_stats, _command_metrics],
+    }
+    if Config.MONGODB_COMPRESSORS:
+        options["compressors"] = Config.MONGODB_COMPRESSORS
+    return options
+
+
+def init_db(warm: bool = True) -> Database:
+    """Create this process's client and optionally warm it up.
+    
+    Called from gunicorn's post_worker_init hook so each worker builds its
+    own pool after forking, and pays the connection handshake at startup
+    rather than on the first user request.
+    """
+    global _client, _db, _read_db, _client_pid, _replicated
     
-    if _db is None:
-        _client = MongoClient(Config.MONGODB_URI)
+    with _init_lock:
+        if _client is not None and _client_pid == os.getpid():
+            return _db
+        
+        # A client inherited across fork shares sockets with the parent:
+        # drop the reference without closing it and start fresh.
+        _client = MongoClient(Config.MONGODB_URI, **_client_options())
         _db = _client[Config.MONGODB_DB_NAME]
-        _create_indexes(_db)
+        _read_db = _client.get_database(
+            Config.MONGODB_DB_NAME,
+            read_preference=make_read_preference(
+                read_pref_mode_from_name(Config.MONGODB_READ_PREFERENCE), None
+            )
+        )
+        _client_pid = os.getpid()
+        _replicated = None
+        _pool_stats.reset()
+    
+    if warm:
+        _client.admin.command("ping")
+    if Config.MONGODB_AUTO_CREATE_INDEXES:
+        create_indexes(_db)
     
     return _db
 
 
-def _create_indexes(db: Database) -> None:
-    """Create necessary indexes for collections."""
-    # Users collection - unique email index
-    db.users.create_index([("email", ASCENDING)], unique=True)
+def get_db(read_only: bool = False) -> Database:
+    """Get the MongoDB database instance.
+    
+    Args:
+        read_only: Use Config.MONGODB_READ_PREFERENCE (e.g. secondaries)
+            for listing/export reads that tolerate replication lag
+    """
+    if _client is None or _client_pid != os.getpid():
+        init_db(warm=False)
+    
+    return _read_db if read_only else _db
+
+
+def pool_stats() -> dict:
+    """Connection pool counters for this worker process."""
+    return {
+        "pid": os.getpid(),
+        "maxPoolSize": Config.MONGODB_MAX_POOL_SIZE,
+        **_pool_stats.snapshot()
+    }
+
+
+def is_replicated() -> bool:
+    """Whether the server is a replica set member or a mongos router.
+    
+    Decided once per client from the server's ``hello`` reply; raises
+    PyMongoError when the server cannot be reached.
+    """
+    global _replicated
+    
+    db = get_db()
+    if _replicated is None:
+        hello = db.command("hello")
+        _replicated = bool(hello.get("setName") or hello.get("msg") == "isdbgrid")
+    return _replicated
+
+
+def transactions_enabled() -> bool:
+    """Whether writes should run in multi-document transactions."""
+    if Config.MONGODB_TRANSACTIONS in ("true", "false"):
+        get_db()
+        return Config.MONGODB_TRANSACTIONS == "true"
+    return is_replicated()
+
+
+def run_in_transaction(callback: Callable[[ClientSession | None], T]) -> T:
+    """Run ``callback(session)`` inside a multi-document transaction.
+    
+    The whole callback is retried on TransientTransactionError (e.g. write
+    conflicts between colliding orders) and the commit is retried on
+    UnknownTransactionCommitResult. When transactions are disabled in
+    Config, or with ``MONGODB_TRANSACTIONS=auto`` on a standalone server,
+    the callback runs with ``session=None``.
+    """
+    if not transactions_enabled():
+        return callback(None)
+    
+    with _client.start_session() as session:
+        return session.with_transaction(callback)
+
+
+def create_indexes(db: Database) -> None:
+    """Create every index declared in the model index registry.
+    
+    Run once per deploy with ``python migrate.py`` rather than from every
+    worker (set MONGODB_AUTO_CREATE_INDEXES=true for local development).
+    """
+    # Imported here: the registry lives in modules that import this one
+    from app.indexes import INDEX_REGISTRY
     
-    # Inventory collection - unique qrCode index
-    db.inventory.create_index([("qrCode", ASCENDING)], unique=True)
-    db.inventory.create_index([("category", ASCENDING)])
-    db.inventory.create_index([("createdBy", ASCENDING)])
+    for owner in INDEX_REGISTRY:
+        indexes = owner.INDEXES
+        if not isinstance(indexes, dict):
+            indexes = {owner.COLLECTION: indexes}
+        for collection, models in indexes.items():
+            db[collection].create_indexes(models)
 
 
 def close_db() -> None:
     """Close the database connection."""
-    global _client, _db
+    global _client, _db, _read_db, _client_pid, _replicated
     
     if _client is not None:
         _client.close()
         _client = None
         _db = None
+        _read_db = None
+        _client_pid = None
+        _replicated = None
@@ -0,0 +1,297 @@
+"""In-process event fan-out and the inventory stock feed.
+
+``EventHub`` delivers events to any number of subscribers through small
+bounded queues: a slow subscriber loses its oldest events instead of
+blocking the publisher or growing without bound. Under the gevent worker
+the queues are cooperative, so an idle subscriber costs a parked greenlet
+rather than a thread.
+
+``StockFeed`` publishes every inventory change to ``stock_hub``. It reads
+a MongoDB change stream on ``inventory`` when the deployment supports it
+(replica sets and sharded clusters, including Atlas) and otherwise tails
+a capped outbox collection that the write paths append to.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Optional
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+from app.config import Config
+from app.db import get_db, is_replicated
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_COLLECTION = "stock_outbox"
+
+# Inventory fields carried by stock events
+STOCK_FIELDS = {"name": 1, "category": 1, "quantity": 1, "reserved": 1, "price": 1, "updatedAt": 1}
+
+
+class HubFull(Exception):
+    """Raised when a hub already has its maximum number of subscribers."""
+
+
+class Subscription:
+    """A subscriber's bounded event queue; iterate with ``get``."""
+    
+    def __init__(self, hub: "EventHub", predicate: Optional[Callable[[dict], bool]], max_size: int):
+        self.hub = hub
+        self.predicate = predicate
+        self.dropped = 0
+        self._queue = queue.Queue(max_size)
+    
+    def offer(self, event: dict) -> None:
+        """Enqueue ``event`` if it matches, dropping the oldest when full."""
+        if self.predicate and not self.predicate(event):
+            return
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+    
+    def get(self, timeout: float) -> Optional[dict]:
+        """Next event, or None if nothing arrives within ``timeout`` seconds."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventHub:
+    """Thread-safe publish/subscribe fan-out within one worker process."""
+    
+    def __init__(self, name: str, queue_size: int | None = None, max_subscribers: int | None = None):
+        self.name = name
+        self.queue_size = queue_size or Config.EVENT_QUEUE_SIZE
+        self.max_subscribers = max_subscribers or Config.EVENT_MAX_SUBSCRIBERS
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+    
+    def subscribe(self, predicate: Optional[Callable[[dict], bool]] = None) -> Subscription:
+        """Register a subscriber, optionally only for events matching ``predicate``.
+        
+        Raises:
+            HubFull: If the hub is at ``max_subscribers``
+        """
+        subscription = Subscription(self, predicate, self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise HubFull(self.name)
+            self._subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+    
+    def publish(self, event: dict) -> None:
+        """Deliver ``event`` to every matching subscriber without blocking."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(event)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "dropped": sum(subscription.dropped for subscription in subscribers)
+        }
+
+
+class StockFeed:
+    """Background reader that turns inventory writes into ``stock`` events.
+    
+    Events look like ``{"type": "stock", "id", "name", "category",
+    "quantity", "available", "price", "updatedAt"}``, or ``{"type": "stock", "id",
+    "deleted": True}`` for removed items, and published to every hub given.
+    One reader thread runs per worker process and is started on first use.
+    """
+    
+    def __init__(self, *hubs: EventHub):
+        self.hubs = hubs
+        self._pid = None
+        self._lock = threading.Lock()
+        self._resume_token = None
+        self._last_outbox_id = None
+    
+    def start(self) -> None:
+        """Start the reader in this process if it is not running yet."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._resume_token = None
+            self._last_outbox_id = None
+        thread = threading.Thread(target=self._run, name="stock-feed", daemon=True)
+        thread.start()
+    
+    def _publish(self, event: dict) -> None:
+        for hub in self.hubs:
+            hub.publish(event)
+    
+    def _run(self) -> None:
+        while True:
+            try:
+                if uses_outbox():
+                    self._tail_outbox()
+                else:
+                    self._watch_changes()
+            except Exception as e:
+                # Never let the reader die; reconnect after a pause
+                logger.warning("Stock feed interrupted: %s", e)
+            time.sleep(Config.STOCK_FEED_RETRY_SECONDS)
+    
+    def _watch_changes(self) -> None:
+        """Follow the inventory change stream, resuming after reconnects."""
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+        with get_db().inventory.watch(
+            pipeline,
+            full_document="updateLookup",
+            resume_after=self._resume_token
+        ) as stream:
+            for change in stream:
+                self._resume_token = stream.resume_token
+                item_id = change["documentKey"]["_id"]
+                document = change.get("fullDocument")
+                if change["operationType"] == "delete" or document is None:
+                    self._publish(_deleted_event(item_id))
+                else:
+                    self._publish(stock_event(document))
+    
+    def _tail_outbox(self) -> None:
+        """Follow the capped outbox with a tailable cursor.
+        
+        Entries are read in natural (server insertion) order. Their
+        ObjectIds are generated by each writing process and are not
+        ordered across processes, so a new cursor resumes by skipping
+        past the last entry seen rather than filtering on ``_id``.
+        """
+        db = get_db()
+        ensure_outbox(db)
+        outbox = db[OUTBOX_COLLECTION]
+        
+        if self._last_outbox_id is None:
+            newest = outbox.find_one(sort=[("$natural", -1)], projection={"_id": 1})
+            self._last_outbox_id = newest["_id"] if newest else None
+        
+        while True:
+            # If the last entry seen was overwritten, replay the whole
+            # outbox: events carry full item state, so repeats are harmless
+            skipping = (
+                self._last_outbox_id is not None
+                and outbox.find_one({"_id": self._last_outbox_id}, projection={"_id": 1}) is not None
+            )
+            cursor = outbox.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+            while cursor.alive:
+                entries = list(cursor)
+                if skipping:
+                    ids = [entry["_id"] for entry in entries]
+                    if self._last_outbox_id not in ids:
+                        continue
+                    entries = entries[ids.index(self._last_outbox_id) + 1:]
+                    skipping = False
+                if entries:
+                    self._last_outbox_id = entries[-1]["_id"]
+                    self._publish_outbox(db, entries)
+            # The cursor dies when the outbox is empty; poll until it is not
+            time.sleep(1)
+    
+    def _publish_outbox(self, db, entries: list) -> None:
+        deleted = {entry["itemId"] for entry in entries if entry.get("deleted")}
+        qr_codes = {entry["qrCode"] for entry in entries if entry.get("qrCode")}
+        
+        for item_id in deleted:
+            self._publish(_deleted_event(item_id))
+        if qr_codes:
+            for item in db.inventory.find({"qrCode": {"$in": list(qr_codes)}}, STOCK_FIELDS):
+                self._publish(stock_event(item))
+
+
+def uses_outbox() -> bool:
+    """Whether stock changes travel through the outbox instead of a change stream.
+    
+    With ``STOCK_FEED_SOURCE=auto`` this is decided once per process from
+    the server's ``hello`` reply: change streams need a replica set or a
+    sharded cluster.
+    """
+    source = Config.STOCK_FEED_SOURCE
+    if source in ("outbox", "changestream"):
+        return source == "outbox"
+    try:
+        return not is_replicated()
+    except PyMongoError:
+        return True
+
+
+def record_stock_change(qr_codes: Iterable[str] = (), deleted_ids: Iterable = ()) -> None:
+    """Append changed (by QR code) or deleted (by ID) items to the outbox.
+    
+    A no-op when the feed reads change streams. Call after the write has
+    committed; capped collections cannot be written inside a transaction.
+    """
+    if not uses_outbox():
+        return
+    entries = [{"qrCode": qr_code} for qr_code in qr_codes]
+    entries += [{"itemId": item_id, "deleted": True} for item_id in deleted_ids]
+    if not entries:
+        return
+    try:
+        get_db()[OUTBOX_COLLECTION].insert_many(entries, ordered=False)
+    except PyMongoError as e:
+        # Live events are best effort; the write itself already succeeded
+        logger.warning("Could not record stock change: %s", e)
+
+
+def ensure_outbox(db) -> None:
+    """Create the capped outbox collection if it does not exist."""
+    try:
+        db.create_collection(OUTBOX_COLLECTION, capped=True, size=Config.STOCK_OUTBOX_SIZE_BYTES)
+    except CollectionInvalid:
+        pass
+
+
+def stock_event(item: dict) -> dict:
+    """Build a ``stock`` event from an inventory document."""
+    return {
+        "type": "stock",
+        "id": str(item["_id"]),
+        "name": item.get("name"),
+        "category": item.get("category"),
+        "quantity": item.get("quantity"),
+        "available": max(0, item.get("quantity", 0) - item.get("reserved", 0)),
+        "price": item.get("price"),
+        "updatedAt": item.get("updatedAt")
+    }
+
+
+def _deleted_event(item_id) -> dict:
+    return {"type": "stock", "id": str(item_id), "deleted": True}
+
+
+stock_hub = EventHub("stock")
+# Anonymous scanner streams, capped separately from authenticated ones
+public_stock_hub = EventHub("stock_public", max_subscribers=Config.PUBLIC_STREAM_MAX_SUBSCRIBERS)
+stock_feed = StockFeed(stock_hub, public_stock_hub)
@@ -0,0 +1,113 @@
+"""Bulk inventory import from CSV or NDJSON streams.
+
+Rows are parsed lazily from the input stream, validated with the same
+rules as ``POST /items`` and written in unordered chunks, so large
+supplier catalogs load without holding the whole file in memory.
+"""
+import csv
+import json
+from itertools import islice
+from typing import IO, Iterator
+from app.config import Config
+from app.models.inventory import InventoryModel
+
+IMPORT_FORMATS = ["csv", "ndjson"]
+
+
+def iter_rows(stream: IO[str], fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """Yield ``(row_number, row, parse_error)`` from a text stream.
+    
+    Row numbers are 1-based and count data rows only (not the CSV header).
+    """
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, row, None
+        return
+    
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None, "Invalid JSON"
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "Row must be a JSON object"
+            continue
+        yield number, row, None
+
+
+def import_items(
+    stream: IO[str],
+    fmt: str,
+    created_by: str,
+    dry_run: bool = False,
+    chunk_size: int | None = None
+) -> dict:
+    """Validate and write every row of ``stream``.
+    
+    Args:
+        stream: Text stream with CSV (header row required) or NDJSON
+        fmt: ``csv`` or ``ndjson``
+        created_by: Owner ID recorded on inserted items
+        dry_run: Validate only, write nothing
+        chunk_size: Rows per bulk write (defaults to Config.IMPORT_CHUNK_SIZE)
+    
+    Returns:
+        Report with processed/inserted/updated/failed counts and per-row errors
+    
+    Raises:
+        ValueError: If the format is not supported
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported format. Must be one of: {IMPORT_FORMATS}")
+    
+    chunk_size = chunk_size or Config.IMPORT_CHUNK_SIZE
+    report = {
+        "processed": 0,
+        "inserted": 0,
+        "updated": 0,
+        "failed": 0,
+        "errors": [],
+        "dryRun": dry_run
+    }
+    
+    rows = iter_rows(stream, fmt)
+    while chunk := list(islice(rows, chunk_size)):
+        valid = []
+        numbers = []
+        for number, row, error in chunk:
+            report["processed"] += 1
+            if error is None:
+                try:
+                    fields = InventoryModel.parse_item_fields(row)
+                    qr_code = str(row.get("qrCode") or "").strip()
+                    if qr_code:
+                        fields["qrCode"] = qr_code
+                    valid.append(fields)
+                    numbers.append(number)
+                    continue
+                except ValueError as e:
+                    error = str(e)
+            _record_error(report, number, error)
+        
+        if dry_run or not valid:
+            continue
+        
+        result = InventoryModel.bulk_upsert(valid, created_by)
+        report["inserted"] += result["inserted"]
+        report["updated"] += result["updated"]
+        for index, message in result["errors"]:
+            _record_error(report, numbers[index], message)
+    
+    return report
+
+
+def _record_error(report: dict, row_number: int, message: str) -> None:
+    """Count a failed row, keeping at most IMPORT_MAX_ERRORS messages."""
+    report["failed"] += 1
+    if len(report["errors"]) < Config.IMPORT_MAX_ERRORS:
+        report["errors"].append({"row": row_number, "error": message})
@@ -0,0 +1,16 @@
+"""Registry of every class that declares MongoDB indexes and query shapes.
+
+Each entry exposes ``COLLECTION`` and ``INDEXES`` (or ``INDEXES`` as a
+dict of collection -> indexes when it owns several); models also expose
+``QUERY_SHAPES`` (name -> {filter, sort}) describing the queries they
+issue, which ``explain_queries.py`` checks against the indexes.
+"""
+from app.middleware.rate_limit import MongoBackend
+from app.models import (
+    AnalyticsModel, DeletionLogModel, InventoryModel, OrderModel, ReservationModel, ThresholdModel, UserModel
+)
+
+INDEX_REGISTRY = [
+    UserModel, InventoryModel, DeletionLogModel, OrderModel, ReservationModel, AnalyticsModel, ThresholdModel,
+    MongoBackend
+]
@@ -0,0 +1,68 @@
+"""Application JSON provider.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. Both paths produce the same documents: ``ObjectId`` becomes
+its hex string, datetimes and dates become ISO 8601 strings, and keys
+are sorted (so bodies, and the ETags derived from them, are identical
+whichever encoder runs).
+"""
+from datetime import date, datetime
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider, _default as flask_default
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _default(value):
+    """Encode the BSON and date types the API returns."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return flask_default(value)
+
+
+class AppJSONProvider(DefaultJSONProvider):
+    """``DefaultJSONProvider`` backed by orjson when available."""
+    
+    default = staticmethod(_default)
+    ensure_ascii = False
+    
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is None or not _orjson_compatible(kwargs):
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj, kwargs.get("indent")).decode("utf-8")
+    
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        
+        # Build the body as bytes directly; no str round trip
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        body = self._orjson_dumps(obj, 2 if pretty else None) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+    
+    def _orjson_dumps(self, obj, indent=None) -> bytes:
+        option = 0
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+
+
+def _orjson_compatible(kwargs: dict) -> bool:
+    """Whether json.dumps-style ``kwargs`` can be honoured by orjson."""
+    if kwargs.get("indent") not in (None, 2):
+        return False
+    return not set(kwargs) - {"indent", "separators"}
+
@@ -0,0 +1,177 @@
+"""Printable QR label sheets.
+
+Labels are rendered one page at a time, and each finished page is
+appended to the output file before the next is started. Memory stays
+bounded by a single page however many items are printed. Offline runs
+(print_labels.py) render in parallel in a process pool; the HTTP
+endpoint renders small selections inline.
+"""
+import io
+import multiprocessing
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator
+from PIL import Image, ImageDraw, ImageFont
+from app.config import Config
+from app.qr import render_qr
+
+SHEET_FORMATS = {
+    "pdf": "application/pdf",
+    "png": "application/zip",  # one tiled PNG per page, zipped
+}
+
+# A4 at 150 dpi
+PAGE_SIZE = (1240, 1754)
+PAGE_MARGIN = 40
+DPI = 150
+
+
+def build_label_sheet(
+    items: Iterable[dict],
+    path: str,
+    fmt: str = "pdf",
+    columns: int = 3,
+    rows: int = 8,
+    workers: int | None = None
+) -> int:
+    """Write a multi-page label sheet for ``items`` to ``path``.
+    
+    Args:
+        items: Iterable of dicts with name, price and qrCode
+        path: Output file path
+        fmt: ``pdf`` or ``png`` (a zip of tiled PNG pages)
+        columns: Labels per row
+        rows: Label rows per page
+        workers: Render processes (defaults to Config.LABEL_RENDER_WORKERS)
+    
+    Returns:
+        Number of pages written
+    
+    Raises:
+        ValueError: If the format or layout is invalid
+    """
+    if fmt not in SHEET_FORMATS:
+        raise ValueError(f"Unsupported format. Must be one of: {list(SHEET_FORMATS)}")
+    if columns < 1 or rows < 1:
+        raise ValueError("Columns and rows must be greater than 0")
+    
+    label_size = (
+        (PAGE_SIZE[0] - 2 * PAGE_MARGIN) // columns,
+        (PAGE_SIZE[1] - 2 * PAGE_MARGIN) // rows
+    )
+    if min(label_size) < 60:
+        raise ValueError("Too many labels per page")
+    
+    workers = workers or Config.LABEL_RENDER_WORKERS
+    executor = _make_executor(workers)
+    writer = _PdfWriter(path) if fmt == "pdf" else _ZipPngWriter(path)
+    
+    pages = 0
+    try:
+        for chunk in _chunks(items, columns * rows):
+            jobs = [
+                (item["qrCode"], item["name"], item["price"], label_size)
+                for item in chunk
+            ]
+            labels = executor.map(render_label, jobs) if executor else map(render_label, jobs)
+            
+            page = Image.new("RGB", PAGE_SIZE, "white")
+            for index, label_png in enumerate(labels):
+                x = PAGE_MARGIN + (index % columns) * label_size[0]
+                y = PAGE_MARGIN + (index // columns) * label_size[1]
+                with Image.open(io.BytesIO(label_png)) as label:
+                    page.paste(label, (x, y))
+            
+            writer.add_page(page)
+            page.close()
+            pages += 1
+    finally:
+        writer.close()
+        if executor:
+            executor.shutdown()
+    
+    return pages
+
+
+def render_label(job: tuple) -> bytes:
+    """Render one label tile (QR code, name and price) as PNG bytes.
+    
+    Module-level so it can run in a worker process.
+    """
+    qr_code, name, price, (width, height) = job
+    label = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(label)
+    draw.rectangle([0, 0, width - 1, height - 1], outline="#cccccc")
+    
+    text_height = 40
+    qr_side = max(min(width, height - text_height) - 10, 10)
+    with Image.open(io.BytesIO(render_qr(qr_code, "png"))) as qr_img:
+        qr_img = qr_img.convert("RGB").resize((qr_side, qr_side), Image.NEAREST)
+        label.paste(qr_img, ((width - qr_side) // 2, 5))
+    
+    font = ImageFont.load_default()
+    text_y = qr_side + 8
+    draw.text((8, text_y), _truncate(name, width), fill="black", font=font)
+    draw.text((8, text_y + 14), f"{price:.2f}  {qr_code}", fill="black", font=font)
+    
+    buffer = io.BytesIO()
+    label.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _truncate(text: str, width: int) -> str:
+    """Trim text to roughly fit the label width with the default font."""
+    max_chars = max(width // 7, 4)
+    return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+
+def _chunks(items: Iterable[dict], size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _make_executor(workers: int) -> Executor | None:
+    """Process pool for rendering, or None to render inline."""
+    if workers <= 1:
+        return None
+    # spawn: never fork a process that holds MongoClient threads and sockets
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+class _PdfWriter:
+    """Appends pages to a PDF file one at a time."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.pages = 0
+    
+    def add_page(self, page: Image.Image) -> None:
+        page.save(self.path, "PDF", resolution=DPI, append=self.pages > 0)
+        self.pages += 1
+    
+    def close(self) -> None:
+        if self.pages == 0:
+            # Still produce a valid (blank) document
+            blank = Image.new("RGB", PAGE_SIZE, "white")
+            blank.save(self.path, "PDF", resolution=DPI)
+
+
+class _ZipPngWriter:
+    """Writes each page as page-NNNN.png into a zip archive."""
+    
+    def __init__(self, path: str):
+        self.archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED)
+        self.pages = 0
+    
+    def add_page(self, page: Image.Image) -> None:
+        self.pages += 1
+        with self.archive.open(f"page-{self.pages:04d}.png", "w") as f:
+            page.save(f, format="PNG", dpi=(DPI, DPI))
+    
+    def close(self) -> None:
+        self.archive.close()
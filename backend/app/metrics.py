@@ -0,0 +1,512 @@
+"""Request-level metrics in the Prometheus text format.
+
+Each worker process records its metrics in memory and, when
+``Config.METRICS_DIR`` is set, writes a JSON snapshot of them to
+``<METRICS_DIR>/<pid>.json`` every ``METRICS_FLUSH_SECONDS``. ``/metrics``
+merges the snapshots of all workers (live values for the worker serving
+the scrape), so any worker can answer for the whole server:
+
+- counters and histograms are summed; those of exited workers are folded
+  into ``archive.json`` by the gunicorn master, so totals never go back
+- gauges are summed over running workers only
+
+Without ``METRICS_DIR`` each worker reports only itself.
+"""
+import atexit
+import hmac
+import json
+import math
+import os
+import threading
+import time
+from flask import Flask, Response, current_app, g, has_request_context, request
+from app.config import Config
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COMMAND_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+COMMAND_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+ARCHIVE_FILE = "archive.json"
+
+
+class _Metric:
+    """A named metric with a fixed set of label names."""
+    
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labels: tuple = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+    
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labels)
+    
+    def _add(self, amount: float, labels: dict) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def _set(self, value: float, labels: dict) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def describe(self) -> dict:
+        """JSON-serializable definition and samples of this metric."""
+        with self._lock:
+            samples = [[list(key), value] for key, value in self._values.items()]
+        return {"kind": self.kind, "help": self.documentation, "labels": list(self.labels), "samples": samples}
+
+
+class Counter(_Metric):
+    """Monotonically increasing total."""
+    
+    kind = "counter"
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        self._add(amount, labels)
+    
+    def set_total(self, value: float, **labels) -> None:
+        """Report a total counted elsewhere (e.g. by a cache) as-is."""
+        self._set(value, labels)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down."""
+    
+    kind = "gauge"
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        self._add(amount, labels)
+    
+    def dec(self, amount: float = 1, **labels) -> None:
+        self._add(-amount, labels)
+    
+    def set(self, value: float, **labels) -> None:
+        self._set(value, labels)
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed buckets, with their sum and count."""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(float(bound) for bound in buckets)
+        super().__init__(name, documentation, labels, registry)
+    
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        with self._lock:
+            # [per-bucket counts (last one is +Inf), sum, count]
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+    
+    def describe(self) -> dict:
+        with self._lock:
+            samples = [[list(key), [list(counts), total, count]] for key, (counts, total, count) in self._values.items()]
+        return {
+            "kind": self.kind,
+            "help": self.documentation,
+            "labels": list(self.labels),
+            "buckets": list(self.buckets),
+            "samples": samples
+        }
+
+
+class Registry:
+    """Metrics of this process plus collectors run before each snapshot.
+    
+    Collectors copy values kept by other components (cache counters, pool
+    stats, SSE subscribers) into metrics, so those components need no
+    knowledge of this module.
+    """
+    
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors = []
+    
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+    
+    def collector(self, function):
+        """Decorator registering ``function`` to run before each snapshot."""
+        self._collectors.append(function)
+        return function
+    
+    def snapshot(self) -> dict:
+        for function in self._collectors:
+            try:
+                function()
+            except Exception:
+                # A failing collector must not break the scrape
+                pass
+        return {
+            "pid": os.getpid(),
+            "metrics": {name: metric.describe() for name, metric in self._metrics.items()}
+        }
+
+
+REGISTRY = Registry()
+
+# HTTP
+http_requests = Counter(
+    "http_requests_total", "HTTP requests handled", ("method", "endpoint", "status")
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response is complete (streamed responses: until the stream closes)",
+    ("method", "endpoint")
+)
+http_request_size = Histogram(
+    "http_request_size_bytes", "Request body size", ("method", "endpoint"), SIZE_BUCKETS
+)
+http_response_size = Histogram(
+    "http_response_size_bytes", "Response body size as sent (streamed responses excluded)",
+    ("method", "endpoint"), SIZE_BUCKETS
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "Requests being handled, including open streams"
+)
+
+# MongoDB
+mongodb_commands = Counter(
+    "mongodb_commands_total", "MongoDB commands run", ("command", "outcome")
+)
+mongodb_command_duration = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time", ("command",),
+    COMMAND_LATENCY_BUCKETS
+)
+mongodb_commands_per_request = Histogram(
+    "http_request_mongodb_commands", "MongoDB commands run per request", ("endpoint",),
+    COMMAND_COUNT_BUCKETS
+)
+mongodb_time_per_request = Histogram(
+    "http_request_mongodb_seconds", "Time spent in MongoDB commands per request", ("endpoint",)
+)
+mongodb_pool_open = Gauge("mongodb_pool_connections_open", "Open pooled connections")
+mongodb_pool_in_use = Gauge("mongodb_pool_connections_in_use", "Pooled connections checked out")
+mongodb_pool_checkout_failures = Counter(
+    "mongodb_pool_checkout_failures_total", "Connection checkouts that failed or timed out"
+)
+
+# Caches, rate limiting and event streams
+cache_hits = Counter("cache_hits_total", "Cache hits", ("cache",))
+cache_misses = Counter("cache_misses_total", "Cache misses", ("cache",))
+cache_evictions = Counter("cache_evictions_total", "Cache entries evicted for space", ("cache",))
+cache_size = Gauge("cache_entries", "Entries currently cached", ("cache",))
+rate_limit_decisions = Counter(
+    "rate_limit_decisions_total", "Rate limiter decisions", ("limiter", "endpoint", "outcome")
+)
+sse_subscribers = Gauge("sse_subscribers", "Connected server-sent event clients", ("hub",))
+
+
+@REGISTRY.collector
+def _collect_caches() -> None:
+    from app.cache import all_caches
+    
+    for cache in all_caches():
+        stats = cache.stats()
+        cache_hits.set_total(stats["hits"], cache=stats["name"])
+        cache_misses.set_total(stats["misses"], cache=stats["name"])
+        cache_evictions.set_total(stats["evictions"], cache=stats["name"])
+        cache_size.set(stats["size"], cache=stats["name"])
+
+
+@REGISTRY.collector
+def _collect_pool() -> None:
+    from app.db import pool_stats
+    
+    stats = pool_stats()
+    mongodb_pool_open.set(stats["open"])
+    mongodb_pool_in_use.set(stats["inUse"])
+    mongodb_pool_checkout_failures.set_total(stats["checkoutFailed"])
+
+
+@REGISTRY.collector
+def _collect_hubs() -> None:
+    from app.alerts import alert_hub
+    from app.events import public_stock_hub, stock_hub
+    
+    for hub in (stock_hub, public_stock_hub, alert_hub):
+        sse_subscribers.set(hub.stats()["subscribers"], hub=hub.name)
+
+
+def record_command(command: str, seconds: float, failed: bool = False) -> None:
+    """Record a MongoDB command, also against the current request if any.
+    
+    Called from the PyMongo command listener in ``app.db``.
+    """
+    mongodb_commands.inc(command=command, outcome="failure" if failed else "success")
+    mongodb_command_duration.observe(seconds, command=command)
+    if has_request_context():
+        g.mongodb_commands = g.get("mongodb_commands", 0) + 1
+        g.mongodb_seconds = g.get("mongodb_seconds", 0.0) + seconds
+
+
+class MetricsExporter:
+    """Background thread writing this worker's snapshot, one per process."""
+    
+    def __init__(self, interval: float | None = None):
+        self.interval = interval or Config.METRICS_FLUSH_SECONDS
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def start(self) -> None:
+        if not Config.METRICS_DIR:
+            return
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+        atexit.register(self.flush)
+        thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        thread.start()
+    
+    def flush(self) -> None:
+        """Write this process's snapshot to METRICS_DIR."""
+        if Config.METRICS_DIR:
+            _write_json(_snapshot_path(os.getpid()), REGISTRY.snapshot())
+    
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                # Try again next interval
+                pass
+
+
+metrics_exporter = MetricsExporter()
+
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(Config.METRICS_DIR, f"{pid}.json")
+
+
+def _write_json(path: str, data: dict) -> None:
+    """Replace ``path`` atomically so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def clear_metrics_dir() -> None:
+    """Remove snapshots left by a previous server run (gunicorn on_starting)."""
+    if not Config.METRICS_DIR:
+        return
+    os.makedirs(Config.METRICS_DIR, exist_ok=True)
+    for name in os.listdir(Config.METRICS_DIR):
+        if name.endswith((".json", ".tmp")):
+            os.remove(os.path.join(Config.METRICS_DIR, name))
+
+
+def mark_process_dead(pid: int) -> None:
+    """Fold an exited worker's counters into the archive (gunicorn child_exit).
+    
+    Its gauges are dropped. Runs in the gunicorn master only, so the
+    archive has a single writer.
+    """
+    if not Config.METRICS_DIR:
+        return
+    path = _snapshot_path(pid)
+    snapshot = _read_json(path)
+    if snapshot is None:
+        return
+    archive_path = os.path.join(Config.METRICS_DIR, ARCHIVE_FILE)
+    merged = _merge([_read_json(archive_path), snapshot], include_gauges=False)
+    _write_json(archive_path, {"pid": None, "metrics": _to_snapshot(merged)})
+    os.remove(path)
+
+
+def _merge(snapshots: list, include_gauges: bool = True) -> dict:
+    """Sum snapshots into ``{name: {definition..., "samples": {labels: value}}}``."""
+    merged = {}
+    for snapshot in snapshots:
+        if not snapshot:
+            continue
+        for name, metric in snapshot["metrics"].items():
+            if metric["kind"] == "gauge" and not include_gauges:
+                continue
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            if target.get("buckets") != metric.get("buckets"):
+                # Bucket layout changed between deploys; keep the first
+                continue
+            samples = target["samples"]
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                if metric["kind"] == "histogram":
+                    counts, total, count = value
+                    if key in samples:
+                        previous = samples[key]
+                        counts = [a + b for a, b in zip(previous[0], counts)]
+                        total += previous[1]
+                        count += previous[2]
+                    samples[key] = [counts, total, count]
+                else:
+                    samples[key] = samples.get(key, 0) + value
+    return merged
+
+
+def _to_snapshot(merged: dict) -> dict:
+    return {
+        name: {**metric, "samples": [[list(key), value] for key, value in metric["samples"].items()]}
+        for name, metric in merged.items()
+    }
+
+
+def collect() -> dict:
+    """Merged metrics of every worker (or of this process only)."""
+    snapshots = [REGISTRY.snapshot()]
+    if Config.METRICS_DIR and os.path.isdir(Config.METRICS_DIR):
+        own = f"{os.getpid()}.json"
+        for name in os.listdir(Config.METRICS_DIR):
+            if name.endswith(".json") and name != own:
+                snapshots.append(_read_json(os.path.join(Config.METRICS_DIR, name)))
+    return _merge(snapshots)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: list, values: tuple, extra: tuple | None = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def render(merged: dict) -> str:
+    """Prometheus text exposition of merged metrics."""
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        for key in sorted(metric["samples"]):
+            value = metric["samples"][key]
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_format_labels(metric['labels'], key)} {_format_value(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(metric["buckets"] + [math.inf], counts):
+                cumulative += bucket_count
+                labels = _format_labels(metric["labels"], key, ("le", _format_value(bound)))
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(metric['labels'], key)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(metric['labels'], key)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def scrape_authorized() -> bool:
+    """True when METRICS_TOKEN is sent as a bearer token.
+    
+    Without a configured token, scrapes are only allowed in debug mode.
+    """
+    if not Config.METRICS_TOKEN:
+        return current_app.debug
+    header = request.headers.get("Authorization", "")
+    scheme, _, token = header.partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(token.strip(), Config.METRICS_TOKEN)
+
+
+def metrics_response() -> Response:
+    return Response(render(collect()), mimetype=CONTENT_TYPE)
+
+
+def _endpoint() -> str:
+    return request.endpoint or "unmatched"
+
+
+def _before_request() -> None:
+    metrics_exporter.start()
+    g.metrics_started = time.perf_counter()
+    http_requests_in_flight.inc()
+
+
+def _after_request(response: Response) -> Response:
+    if "metrics_started" not in g:
+        return response
+    g.metrics_status = response.status_code
+    if not response.is_streamed:
+        g.metrics_response_size = response.calculate_content_length() or 0
+    return response
+
+
+def _teardown_request(error=None) -> None:
+    """Record the request once it is complete.
+    
+    Runs when the request context is popped, which for responses made
+    with ``stream_with_context`` is when the stream closes, so streamed
+    listings, exports and SSE include the MongoDB work they do while
+    streaming.
+    """
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return
+    http_requests_in_flight.dec()
+    method, endpoint = request.method, _endpoint()
+    
+    status = g.get("metrics_status", 500)
+    http_requests.inc(method=method, endpoint=endpoint, status=status)
+    http_request_duration.observe(time.perf_counter() - started, method=method, endpoint=endpoint)
+    http_request_size.observe(request.content_length or 0, method=method, endpoint=endpoint)
+    if "metrics_response_size" in g:
+        http_response_size.observe(g.metrics_response_size, method=method, endpoint=endpoint)
+    mongodb_commands_per_request.observe(g.get("mongodb_commands", 0), endpoint=endpoint)
+    mongodb_time_per_request.observe(g.get("mongodb_seconds", 0.0), endpoint=endpoint)
+
+
+def init_metrics(app: Flask) -> None:
+    """Record request metrics for ``app``.
+    
+    Call before ``init_compression``: ``after_request`` hooks run in
+    reverse order, so response sizes are then measured as compressed.
+    """
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
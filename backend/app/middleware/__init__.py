@@ -1,5 +1,8 @@
 """Middleware components."""
-from app.middleware.auth import jwt_required, owner_required, buyer_required
-from app.middleware.rate_limit import rate_limit, public_rate_limiter
+from app.middleware.auth import jwt_required, jwt_optional, owner_required, buyer_required
+from app.middleware.rate_limit import rate_limit, public_rate_limiter, user_rate_limiter
 
-__all__ = ["jwt_required", "owner_required", "buyer_required", "rate_limit", "public_rate_limiter"]
+__all__ = [
+    "jwt_required", "jwt_optional", "owner_required", "buyer_required",
+    "rate_limit", "public_rate_limiter", "user_rate_limiter"
+]
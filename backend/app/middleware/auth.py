@@ -10,47 +10,74 @@ def jwt_required(f):
     """Decorator to require valid JWT token for a route."""
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        
-        # Get token from Authorization header
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
+        token = _bearer_token()
         
         if not token:
             return jsonify({"error": "Authentication token is missing"}), 401
         
-        try:
-            # Decode and verify token
-            payload = jwt.decode(
-                token,
-                Config.JWT_SECRET_KEY,
-                algorithms=["HS256"]
-            )
-            
-            # Get user from database
-            user = UserModel.find_by_id(payload["user_id"])
-            if not user:
-                return jsonify({"error": "User not found"}), 401
-            
-            # Store user info in Flask's g object for use in routes
-            g.current_user = {
-                "id": str(user["_id"]),
-                "name": user["name"],
-                "email": user["email"],
-                "role": user["role"]
-            }
-            
-        except jwt.ExpiredSignatureError:
-            return jsonify({"error": "Token has expired"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"error": "Invalid token"}), 401
+        error = _authenticate(token)
+        if error:
+            return error
         
         return f(*args, **kwargs)
     
     return decorated
 
 
+def jwt_optional(f):
+    """Decorator that authenticates the caller if a token is sent.
+    
+    Requests without a token proceed anonymously (no ``g.current_user``);
+    a token that is sent must be valid.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = _bearer_token()
+        
+        if token:
+            error = _authenticate(token)
+            if error:
+                return error
+        
+        return f(*args, **kwargs)
+    
+    return decorated
+
+
+def _bearer_token():
+    """Get token from Authorization header."""
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        return auth_header.split(" ")[1]
+    return None
+
+
+def _authenticate(token: str):
+    """Verify ``token`` and set ``g.current_user``; returns an error response on failure."""
+    try:
+        # Decode and verify token
+        payload = jwt.decode(
+            token,
+            Config.JWT_SECRET_KEY,
+            algorithms=["HS256"]
+        )
+        
+        # Get user identity (cached per worker)
+        user = UserModel.find_identity(payload["user_id"])
+        if not user:
+            return jsonify({"error": "User not found"}), 401
+        
+        # Store user info in Flask's g object for use in routes
+        g.current_user = dict(user)
+        
+    except jwt.ExpiredSignatureError:
+        return jsonify({"error": "Token has expired"}), 401
+    except jwt.InvalidTokenError:
+        return jsonify({"error": "Invalid token"}), 401
+    
+    return None
+
+
 def owner_required(f):
     """Decorator to require owner role (must be used after jwt_required)."""
     @wraps(f)
@@ -1,22 +1,264 @@
 """Rate limiting middleware for public endpoints."""
+import math
+import os
+import threading
 import time
+from datetime import datetime
 from functools import wraps
-from flask import request, jsonify
-from collections import defaultdict
-import threading
+from flask import request, jsonify, g
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from app.config import Config
+from app.db import get_db
+from app.metrics import rate_limit_decisions
+
+
+class MemoryBackend:
+    """Process-local sliding-window counter.
+    
+    Each key keeps only the hit counts of the current and previous fixed
+    windows; the sliding count is the previous count weighted by how much
+    of it still overlaps the sliding window, plus the current count. That
+    is O(1) time and memory per key. Idle keys are evicted by a background
+    sweeper thread.
+    """
+    
+    def __init__(self, sweep_interval: float | None = None):
+        self.sweep_interval = sweep_interval or Config.RATE_LIMIT_SWEEP_SECONDS
+        # key -> [window_index, current_count, previous_count, window_size]
+        self._counters: dict[str, list] = {}
+        # key -> theoretical arrival time (GCRA token buckets)
+        self._buckets: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._sweeper_pid = None
+    
+    def hit(self, key: str, limit: int, window: int, cost: int = 1) -> tuple[bool, int, int]:
+        """Record ``cost`` hits for ``key`` unless that would exceed ``limit``.
+        
+        Returns:
+            Tuple of (is_limited, remaining, retry_after_seconds)
+        """
+        self._ensure_sweeper()
+        now = time.time()
+        index = int(now // window)
+        elapsed = now - index * window
+        
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = self._counters[key] = [index, 0, 0, window]
+            elif counter[0] != index:
+                # Roll the window; anything older than one window is dropped
+                counter[2] = counter[1] if counter[0] == index - 1 else 0
+                counter[1] = 0
+                counter[0] = index
+            
+            _, current, previous, _ = counter
+            estimate = previous * (window - elapsed) / window + current
+            
+            if estimate + cost > limit:
+                return True, 0, _retry_after(limit, current, previous, window, elapsed, cost)
+            
+            counter[1] += cost
+            return False, max(0, int(limit - estimate - cost)), 0
+    
+    def take(self, key: str, cost: int, rate: float, burst: int) -> tuple[bool, int, int]:
+        """Take ``cost`` tokens from a token bucket (implemented as GCRA).
+        
+        Args:
+            key: Bucket key
+            cost: Tokens this request consumes
+            rate: Refill rate in tokens per second
+            burst: Bucket capacity
+        
+        Returns:
+            Tuple of (is_limited, remaining, retry_after_seconds)
+        """
+        self._ensure_sweeper()
+        now = time.time()
+        with self._lock:
+            allowed, new_tat, remaining, retry_after = _gcra(
+                self._buckets.get(key, now), now, cost, rate, burst
+            )
+            if allowed:
+                self._buckets[key] = new_tat
+        return not allowed, remaining, retry_after
+    
+    def sweep(self) -> int:
+        """Evict idle window counters and refilled buckets. Returns the count."""
+        now = time.time()
+        with self._lock:
+            idle = [
+                key for key, (index, _, _, window) in self._counters.items()
+                if int(now // window) - index >= 2
+            ]
+            for key in idle:
+                del self._counters[key]
+            # A bucket whose arrival time has passed is full again
+            full = [key for key, tat in self._buckets.items() if tat <= now]
+            for key in full:
+                del self._buckets[key]
+        return len(idle) + len(full)
+    
+    def _ensure_sweeper(self) -> None:
+        """Start the sweeper thread once per process (also after a fork)."""
+        pid = os.getpid()
+        if self._sweeper_pid == pid:
+            return
+        with self._lock:
+            if self._sweeper_pid == pid:
+                return
+            self._sweeper_pid = pid
+        thread = threading.Thread(target=self._sweep_forever, name="rate-limit-sweeper", daemon=True)
+        thread.start()
+    
+    def _sweep_forever(self) -> None:
+        while True:
+            time.sleep(self.sweep_interval)
+            self.sweep()
+
+
+class MongoBackend:
+    """Sliding-window counter shared by every worker and node.
+    
+    Counters live in the ``rate_limits`` collection, one small document
+    per key and fixed window, removed by a TTL index once they can no
+    longer affect the sliding count. Unlike the memory backend, rejected
+    requests are counted too, so a client hammering a limited endpoint
+    stays limited.
+    """
+    
+    COLLECTION = "rate_limits"
+    
+    # Counters and buckets expire once they can no longer limit anyone
+    INDEXES = [
+        IndexModel([("expiresAt", ASCENDING)], expireAfterSeconds=0),
+    ]
+    
+    def hit(self, key: str, limit: int, window: int, cost: int = 1) -> tuple[bool, int, int]:
+        """Record ``cost`` hits for ``key``. Fails open if MongoDB is unavailable."""
+        now = time.time()
+        index = int(now // window)
+        elapsed = now - index * window
+        
+        try:
+            collection = get_db().rate_limits
+            current_doc = collection.find_one_and_update(
+                {"_id": f"{key}:{index}"},
+                {
+                    "$inc": {"count": cost},
+                    "$setOnInsert": {
+                        "expiresAt": datetime.utcfromtimestamp((index + 2) * window)
+                    }
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            previous_doc = collection.find_one({"_id": f"{key}:{index - 1}"}, {"count": 1})
+        except PyMongoError:
+            return False, limit, 0
+        
+        current = current_doc["count"]
+        previous = previous_doc["count"] if previous_doc else 0
+        estimate = previous * (window - elapsed) / window + current
+        
+        if estimate > limit:
+            return True, 0, _retry_after(limit, current - cost, previous, window, elapsed, cost)
+        return False, max(0, int(limit - estimate)), 0
+    
+    def take(self, key: str, cost: int, rate: float, burst: int) -> tuple[bool, int, int]:
+        """Take ``cost`` tokens from a shared GCRA bucket.
+        
+        The bucket is a single arrival-time value updated with
+        compare-and-set, so concurrent workers never double-spend tokens.
+        Fails open if MongoDB is unavailable or contention persists.
+        """
+        collection = get_db().rate_limits
+        doc_id = f"bucket:{key}"
+        
+        try:
+            for _ in range(Config.RATE_LIMIT_CAS_RETRIES):
+                now = time.time()
+                doc = collection.find_one({"_id": doc_id}, {"tat": 1})
+                allowed, new_tat, remaining, retry_after = _gcra(
+                    doc["tat"] if doc else now, now, cost, rate, burst
+                )
+                if not allowed:
+                    return True, remaining, retry_after
+                
+                update = {"$set": {
+                    "tat": new_tat,
+                    "expiresAt": datetime.utcfromtimestamp(new_tat)
+                }}
+                if doc:
+                    result = collection.update_one({"_id": doc_id, "tat": doc["tat"]}, update)
+                    if result.modified_count:
+                        return False, remaining, 0
+                else:
+                    try:
+                        collection.insert_one({"_id": doc_id, **update["$set"]})
+                        return False, remaining, 0
+                    except DuplicateKeyError:
+                        pass
+        except PyMongoError:
+            pass
+        return False, burst, 0
+
+
+def _gcra(tat: float, now: float, cost: int, rate: float, burst: int) -> tuple[bool, float, int, int]:
+    """Generic cell rate algorithm step.
+    
+    Returns:
+        Tuple of (allowed, new_tat, remaining, retry_after_seconds)
+    """
+    interval = 1 / rate
+    tolerance = burst * interval
+    new_tat = max(tat, now) + cost * interval
+    excess = new_tat - now - tolerance
+    if excess > 1e-9:
+        return False, tat, max(0, int((tolerance - (max(tat, now) - now)) / interval)), max(1, math.ceil(excess))
+    return True, new_tat, int((tolerance - (new_tat - now)) / interval + 1e-9), 0
+
+
+def _retry_after(
+    limit: int,
+    current: int,
+    previous: int,
+    window: int,
+    elapsed: float,
+    cost: int = 1
+) -> int:
+    """Seconds until the sliding count leaves room for ``cost`` more hits."""
+    if current + cost > limit or previous == 0:
+        wait = window - elapsed
+    else:
+        # Solve previous * (window - elapsed - t) / window + current + cost <= limit
+        wait = (window - elapsed) - (limit - current - cost) * window / previous
+    return max(1, math.ceil(wait))
+
+
+def make_backend(name: str | None = None):
+    """Create the limiter backend selected in Config.RATE_LIMIT_BACKEND."""
+    name = name or Config.RATE_LIMIT_BACKEND
+    if name == "mongo":
+        return MongoBackend()
+    if name == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown rate limit backend: {name}")
 
 
 class RateLimiter:
-    """Simple in-memory rate limiter.
+    """Per-client-IP sliding-window rate limiter.
     
-    For production, consider using Redis for distributed rate limiting.
+    The counting backend is pluggable: ``memory`` enforces the limit per
+    worker process, ``mongo`` enforces it across all workers and nodes.
     """
     
-    def __init__(self, requests_per_minute: int = 10):
+    def __init__(self, requests_per_minute: int = 10, backend=None, name: str = "ip"):
+        self.name = name
         self.requests_per_minute = requests_per_minute
         self.window_size = 60  # 1 minute in seconds
-        self._requests = defaultdict(list)
-        self._lock = threading.Lock()
+        self.backend = backend or make_backend()
     
     def _get_client_ip(self) -> str:
         """Get client IP address, handling proxies."""
@@ -34,63 +276,110 @@ class RateLimiter:
         # Fall back to direct remote address
         return request.remote_addr or "unknown"
     
-    def _cleanup_old_requests(self, client_ip: str, current_time: float) -> None:
-        """Remove requests older than the window."""
-        cutoff = current_time - self.window_size
-        self._requests[client_ip] = [
-            ts for ts in self._requests[client_ip] if ts > cutoff
-        ]
-    
-    def is_rate_limited(self) -> tuple[bool, dict]:
+    def is_rate_limited(self, cost: int = 1) -> tuple[bool, dict]:
         """Check if the current request should be rate limited.
         
+        Args:
+            cost: Number of hits this request counts as
+        
         Returns:
             Tuple of (is_limited, info_dict)
         """
+        if cost > self.requests_per_minute:
+            # Could never fit in one window; refuse without spending the allowance
+            return True, {
+                "remaining": 0,
+                "retry_after": self.window_size,
+                "limit": self.requests_per_minute,
+                "reset": self.window_size
+            }
+        
         client_ip = self._get_client_ip()
-        current_time = time.time()
+        is_limited, remaining, retry_after = self.backend.hit(
+            f"ip:{client_ip}", self.requests_per_minute, self.window_size, cost
+        )
         
-        with self._lock:
-            self._cleanup_old_requests(client_ip, current_time)
-            
-            request_count = len(self._requests[client_ip])
-            
-            if request_count >= self.requests_per_minute:
-                # Calculate retry time
-                oldest_request = min(self._requests[client_ip])
-                retry_after = int(oldest_request + self.window_size - current_time) + 1
-                
-                return True, {
-                    "remaining": 0,
-                    "retry_after": max(1, retry_after),
-                    "limit": self.requests_per_minute
-                }
-            
-            # Record this request
-            self._requests[client_ip].append(current_time)
-            
-            return False, {
-                "remaining": self.requests_per_minute - request_count - 1,
-                "retry_after": 0,
-                "limit": self.requests_per_minute
-            }
+        return is_limited, {
+            "remaining": remaining,
+            "retry_after": retry_after,
+            "limit": self.requests_per_minute,
+            "reset": retry_after if is_limited else self.window_size
+        }
+
+
+class TieredRateLimiter:
+    """Token-bucket limiter keyed by authenticated user, tiered by role.
+    
+    Each role gets a refill rate and a burst allowance from
+    Config.RATE_LIMIT_TIERS; each request consumes a number of tokens
+    given by its route cost, so a full listing drains the bucket faster
+    than a single lookup. Requests without a user fall back to the IP.
+    """
+    
+    def __init__(self, tiers: dict | None = None, backend=None, name: str = "user"):
+        self.name = name
+        self.tiers = tiers or Config.RATE_LIMIT_TIERS
+        self.backend = backend or make_backend()
+        self._ip_limiter = RateLimiter(backend=self.backend)
+    
+    def is_rate_limited(self, cost: int = 1) -> tuple[bool, dict]:
+        """Check if the current request should be rate limited.
+        
+        Args:
+            cost: Tokens this request consumes
+        
+        Returns:
+            Tuple of (is_limited, info_dict)
+        """
+        user = getattr(g, "current_user", None)
+        if user:
+            key = f"user:{user['id']}"
+            tier = self.tiers.get(user["role"], self.tiers["default"])
+        else:
+            key = f"ip:{self._ip_limiter._get_client_ip()}"
+            tier = self.tiers["default"]
+        
+        burst = tier["burst"]
+        rate = tier["per_minute"] / 60
+        cost = min(cost, burst)
+        is_limited, remaining, retry_after = self.backend.take(key, cost, rate, burst)
+        
+        return is_limited, {
+            "remaining": remaining,
+            "retry_after": retry_after,
+            "limit": burst,
+            "reset": retry_after if is_limited else math.ceil((burst - remaining) / rate)
+        }
 
 
 # Global rate limiter instance for public endpoints
-public_rate_limiter = RateLimiter(requests_per_minute=30)
+public_rate_limiter = RateLimiter(requests_per_minute=Config.PUBLIC_RATE_LIMIT_PER_MINUTE, name="public")
+
+# Global per-user limiter for authenticated endpoints
+user_rate_limiter = TieredRateLimiter()
 
 
-def rate_limit(limiter: RateLimiter = None):
+def rate_limit(limiter=None, cost=None):
     """Decorator to apply rate limiting to a route.
     
     Args:
-        limiter: RateLimiter instance to use. Defaults to public_rate_limiter.
+        limiter: RateLimiter or TieredRateLimiter instance, or a callable
+            choosing one per request. Defaults to public_rate_limiter.
+        cost: Hits/tokens the request consumes: an int, or a callable
+            returning one. Defaults to Config.RATE_LIMIT_ROUTE_COSTS for
+            the endpoint, else 1.
     
     Usage:
         @app.route("/public-endpoint")
         @rate_limit()
         def public_endpoint():
             ...
+        
+        @app.route("/items")
+        @jwt_required
+        @rate_limit(user_rate_limiter)
+        def list_items():
+            ...
     """
     if limiter is None:
         limiter = public_rate_limiter
@@ -98,7 +387,20 @@ def rate_limit(limiter: RateLimiter = None):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            is_limited, info = limiter.is_rate_limited()
+            if callable(cost):
+                request_cost = cost()
+            elif cost is not None:
+                request_cost = cost
+            else:
+                request_cost = Config.RATE_LIMIT_ROUTE_COSTS.get(request.endpoint, 1)
+            
+            request_limiter = limiter() if callable(limiter) else limiter
+            is_limited, info = request_limiter.is_rate_limited(request_cost)
+            rate_limit_decisions.inc(
+                limiter=request_limiter.name,
+                endpoint=request.endpoint,
+                outcome="limited" if is_limited else "allowed"
+            )
             
             if is_limited:
                 response = jsonify({
@@ -107,20 +409,28 @@ def rate_limit(limiter: RateLimiter = None):
                 })
                 response.status_code = 429
                 response.headers["Retry-After"] = str(info["retry_after"])
-                response.headers["X-RateLimit-Limit"] = str(info["limit"])
-                response.headers["X-RateLimit-Remaining"] = "0"
+                _set_rate_limit_headers(response, info)
                 return response
             
             # Execute the route function
             result = f(*args, **kwargs)
             
             # Add rate limit headers to successful responses
-            if hasattr(result, "headers"):
-                result.headers["X-RateLimit-Limit"] = str(info["limit"])
-                result.headers["X-RateLimit-Remaining"] = str(info["remaining"])
+            response = result[0] if isinstance(result, tuple) else result
+            if hasattr(response, "headers"):
+                _set_rate_limit_headers(response, info)
             
             return result
         
         return decorated_function
     
     return decorator
+
+
+def _set_rate_limit_headers(response, info: dict) -> None:
+    """Set the RateLimit-* headers and their legacy X-RateLimit-* forms."""
+    response.headers["RateLimit-Limit"] = str(info["limit"])
+    response.headers["RateLimit-Remaining"] = str(info["remaining"])
+    response.headers["RateLimit-Reset"] = str(info["reset"])
+    response.headers["X-RateLimit-Limit"] = str(info["limit"])
+    response.headers["X-RateLimit-Remaining"] = str(info["remaining"])
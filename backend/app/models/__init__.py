@@ -2,5 +2,12 @@
 from app.models.user import UserModel
 from app.models.inventory import InventoryModel
 from app.models.order import OrderModel
+from app.models.analytics import AnalyticsModel
+from app.models.threshold import ThresholdModel
+from app.models.reservation import ReservationModel
+from app.models.deletion import DeletionLogModel
 
-__all__ = ["UserModel", "InventoryModel", "OrderModel"]
+__all__ = [
+    "UserModel", "InventoryModel", "OrderModel", "AnalyticsModel", "ThresholdModel", "ReservationModel",
+    "DeletionLogModel"
+]
@@ -0,0 +1,307 @@
+"""Sales analytics backed by incrementally maintained daily rollups."""
+import logging
+from datetime import datetime
+from typing import List, Optional
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+from pymongo.errors import PyMongoError
+from app.db import get_db
+
+UNCATEGORIZED = "Uncategorized"
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsModel:
+    """Daily sales rollups and the dashboard queries over them.
+    
+    Every non-cancelled order is folded into small per-day documents after
+    it is created (and unfolded if it is cancelled), so dashboard queries
+    read O(days) rollup documents instead of scanning O(orders). Rollups
+    are updated after the order commits, outside its transaction: every
+    checkout of a day touches the same ``sales_daily`` document, which
+    inside transactions would make concurrent orders conflict and retry.
+    Updates that fail are logged and repaired by ``rebuild_analytics.py``.
+    
+    - sales_daily: revenue, order count and units per day
+    - sales_daily_products: units and revenue per (day, product)
+    - sales_daily_categories: units and revenue per (day, category)
+    - buyer_stats: lifetime value and order count per buyer
+    """
+    
+    # Indexes per rollup collection (created by migrate.py)
+    INDEXES = {
+        "sales_daily": [IndexModel([("day", ASCENDING)])],
+        "sales_daily_products": [IndexModel([("day", ASCENDING)])],
+        "sales_daily_categories": [IndexModel([("day", ASCENDING)])],
+        "buyer_stats": [IndexModel([("lifetimeValue", DESCENDING)])],
+    }
+    
+    ROLLUP_COLLECTIONS = list(INDEXES)
+    
+    @staticmethod
+    def record_order(order: dict, sign: int = 1) -> None:
+        """Add (sign=1) or remove (sign=-1) a committed order from the rollups.
+        
+        Best effort: errors are logged, not raised, since the order itself
+        has already been written.
+        
+        Args:
+            order: Order document with buyerId, items, totalAmount, createdAt
+            sign: 1 when an order starts counting, -1 when it is cancelled
+        """
+        try:
+            AnalyticsModel._apply_order(order, sign)
+        except PyMongoError as e:
+            logger.warning("Could not update sales rollups for order %s: %s", order.get("_id"), e)
+    
+    @staticmethod
+    def _apply_order(order: dict, sign: int) -> None:
+        db = get_db()
+        day = AnalyticsModel._day(order["createdAt"])
+        key = day.strftime("%Y-%m-%d")
+        units = sum(item["quantity"] for item in order["items"])
+        
+        db.sales_daily.update_one(
+            {"_id": key},
+            {
+                "$inc": {
+                    "revenue": sign * order["totalAmount"],
+                    "orders": sign,
+                    "units": sign * units
+                },
+                "$setOnInsert": {"day": day}
+            },
+            upsert=True
+        )
+        
+        products = {}
+        categories = {}
+        for item in order["items"]:
+            product = products.setdefault(item["productId"], {"name": item["name"], "units": 0, "revenue": 0})
+            product["units"] += item["quantity"]
+            product["revenue"] += item["subtotal"]
+            
+            category = categories.setdefault(item.get("category") or UNCATEGORIZED, {"units": 0, "revenue": 0})
+            category["units"] += item["quantity"]
+            category["revenue"] += item["subtotal"]
+        
+        db.sales_daily_products.bulk_write([
+            UpdateOne(
+                {"_id": {"day": key, "productId": product_id}},
+                {
+                    "$inc": {"units": sign * totals["units"], "revenue": sign * totals["revenue"]},
+                    "$set": {"name": totals["name"]},
+                    "$setOnInsert": {"day": day, "productId": product_id}
+                },
+                upsert=True
+            )
+            for product_id, totals in products.items()
+        ], ordered=False)
+        
+        db.sales_daily_categories.bulk_write([
+            UpdateOne(
+                {"_id": {"day": key, "category": category}},
+                {
+                    "$inc": {"units": sign * totals["units"], "revenue": sign * totals["revenue"]},
+                    "$setOnInsert": {"day": day, "category": category}
+                },
+                upsert=True
+            )
+            for category, totals in categories.items()
+        ], ordered=False)
+        
+        db.buyer_stats.update_one(
+            {"_id": order["buyerId"]},
+            {
+                "$inc": {"lifetimeValue": sign * order["totalAmount"], "orders": sign},
+                "$max": {"lastOrderAt": order["createdAt"]}
+            },
+            upsert=True
+        )
+    
+    @staticmethod
+    def revenue_by_day(date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> List[dict]:
+        """Revenue, orders and units per day in ``[date_from, date_to)``."""
+        db = get_db(read_only=True)
+        days = db.sales_daily.find(
+            AnalyticsModel._day_range(date_from, date_to),
+            sort=[("day", ASCENDING)]
+        )
+        return [
+            {
+                "date": doc["_id"],
+                "revenue": doc["revenue"],
+                "orders": doc["orders"],
+                "units": doc["units"]
+            }
+            for doc in days
+        ]
+    
+    @staticmethod
+    def top_products(
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        limit: int = 10,
+        by: str = "revenue"
+    ) -> List[dict]:
+        """Best-selling products by revenue or units over a date range."""
+        if by not in ("revenue", "units"):
+            raise ValueError("by must be revenue or units")
+        
+        db = get_db(read_only=True)
+        pipeline = [
+            {"$match": AnalyticsModel._day_range(date_from, date_to)},
+            # Oldest first, so $last picks the most recent product name
+            {"$sort": {"day": 1}},
+            {"$group": {
+                "_id": "$productId",
+                "name": {"$last": "$name"},
+                "units": {"$sum": "$units"},
+                "revenue": {"$sum": "$revenue"}
+            }},
+            {"$match": {"units": {"$gt": 0}}},
+            {"$sort": {by: -1}},
+            {"$limit": limit}
+        ]
+        return [
+            {
+                "productId": str(doc["_id"]),
+                "name": doc["name"],
+                "units": doc["units"],
+                "revenue": doc["revenue"]
+            }
+            for doc in db.sales_daily_products.aggregate(pipeline)
+        ]
+    
+    @staticmethod
+    def sales_by_category(date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> List[dict]:
+        """Units sold and revenue per category over a date range."""
+        db = get_db(read_only=True)
+        pipeline = [
+            {"$match": AnalyticsModel._day_range(date_from, date_to)},
+            {"$group": {
+                "_id": "$category",
+                "units": {"$sum": "$units"},
+                "revenue": {"$sum": "$revenue"}
+            }},
+            {"$sort": {"units": -1}}
+        ]
+        return [
+            {"category": doc["_id"], "units": doc["units"], "revenue": doc["revenue"]}
+            for doc in db.sales_daily_categories.aggregate(pipeline)
+        ]
+    
+    @staticmethod
+    def top_buyers(limit: int = 10) -> List[dict]:
+        """Buyers ranked by lifetime value."""
+        db = get_db(read_only=True)
+        stats = list(db.buyer_stats.find(
+            {"orders": {"$gt": 0}},
+            sort=[("lifetimeValue", DESCENDING)],
+            limit=limit
+        ))
+        names = {
+            user["_id"]: user["name"]
+            for user in db.users.find({"_id": {"$in": [doc["_id"] for doc in stats]}}, {"name": 1})
+        }
+        return [
+            {
+                "buyerId": str(doc["_id"]),
+                "buyerName": names.get(doc["_id"], "Unknown"),
+                "lifetimeValue": doc["lifetimeValue"],
+                "orders": doc["orders"],
+                "lastOrderAt": doc["lastOrderAt"]
+            }
+            for doc in stats
+        ]
+    
+    @staticmethod
+    def rebuild() -> None:
+        """Recompute every rollup from the orders collection.
+        
+        Used to backfill history or repair drift; runs entirely as
+        aggregation pipelines over ``orders.items``. Each pipeline ends in
+        ``$out``, which builds a temporary collection and swaps it in
+        atomically (keeping the rollup's indexes), so the dashboard never
+        reads an empty or half-built rollup. Orders folded in incrementally
+        while a pipeline runs may be missed by it; run the rebuild again
+        at a quiet time if that matters.
+        """
+        db = get_db()
+        
+        counted = {"$match": {"status": {"$ne": "cancelled"}}}
+        day_key = {"$dateToString": {"format": "%Y-%m-%d", "date": "$createdAt"}}
+        day = {"$dateTrunc": {"date": "$createdAt", "unit": "day"}}
+        
+        db.orders.aggregate([
+            counted,
+            {"$group": {
+                "_id": day_key,
+                "day": {"$first": day},
+                "revenue": {"$sum": "$totalAmount"},
+                "orders": {"$sum": 1},
+                "units": {"$sum": {"$sum": "$items.quantity"}}
+            }},
+            {"$out": "sales_daily"}
+        ])
+        
+        db.orders.aggregate([
+            counted,
+            # Oldest first, so $last picks the most recent product name
+            {"$sort": {"createdAt": 1}},
+            {"$unwind": "$items"},
+            {"$group": {
+                "_id": {"day": day_key, "productId": "$items.productId"},
+                "day": {"$first": day},
+                "productId": {"$first": "$items.productId"},
+                "name": {"$last": "$items.name"},
+                "units": {"$sum": "$items.quantity"},
+                "revenue": {"$sum": "$items.subtotal"}
+            }},
+            {"$out": "sales_daily_products"}
+        ])
+        
+        db.orders.aggregate([
+            counted,
+            {"$unwind": "$items"},
+            {"$set": {"category": {"$ifNull": ["$items.category", UNCATEGORIZED]}}},
+            {"$group": {
+                "_id": {"day": day_key, "category": "$category"},
+                "day": {"$first": day},
+                "category": {"$first": "$category"},
+                "units": {"$sum": "$items.quantity"},
+                "revenue": {"$sum": "$items.subtotal"}
+            }},
+            {"$out": "sales_daily_categories"}
+        ])
+        
+        db.orders.aggregate([
+            counted,
+            {"$group": {
+                "_id": "$buyerId",
+                "lifetimeValue": {"$sum": "$totalAmount"},
+                "orders": {"$sum": 1},
+                "lastOrderAt": {"$max": "$createdAt"}
+            }},
+            {"$out": "buyer_stats"}
+        ])
+    
+    @staticmethod
+    def _day(moment: datetime) -> datetime:
+        """Truncate a UTC datetime to midnight."""
+        return datetime(moment.year, moment.month, moment.day)
+    
+    @staticmethod
+    def _day_range(date_from: Optional[datetime], date_to: Optional[datetime]) -> dict:
+        """Filter on rollup days: the day of ``date_from`` is included, that of ``date_to`` is not.
+        
+        Both bounds are truncated to midnight, since rollups have one
+        document per day; otherwise the time of day in ``date_to`` would
+        decide whether its day is counted.
+        """
+        bounds = {}
+        if date_from:
+            bounds["$gte"] = AnalyticsModel._day(date_from)
+        if date_to:
+            bounds["$lt"] = AnalyticsModel._day(date_to)
+        return {"day": bounds} if bounds else {}
@@ -0,0 +1,36 @@
+"""Collection version counters for conditional list requests."""
+from datetime import datetime
+from typing import Optional
+from app.db import get_db
+
+
+class CounterModel:
+    """One document per collection, bumped after every committed write.
+    
+    List endpoints derive their ETag from the version (and Last-Modified
+    from the time of the last bump), so an unchanged collection is
+    recognised with a single ``_id`` lookup. Bumps happen after the write
+    commits, never inside a transaction, so that concurrent writers do not
+    conflict on the counter document.
+    """
+    
+    COLLECTION = "counters"
+    
+    @staticmethod
+    def bump(name: str) -> None:
+        """Advance the version of ``name``."""
+        db = get_db()
+        db.counters.update_one(
+            {"_id": name},
+            {"$inc": {"version": 1}, "$currentDate": {"updatedAt": True}},
+            upsert=True
+        )
+    
+    @staticmethod
+    def get(name: str) -> tuple[int, Optional[datetime]]:
+        """Current ``(version, last bump time)`` of ``name`` (0, None if never written)."""
+        db = get_db()
+        counter = db.counters.find_one({"_id": name})
+        if not counter:
+            return 0, None
+        return counter["version"], counter.get("updatedAt")
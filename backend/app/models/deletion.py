@@ -0,0 +1,89 @@
+"""Inventory deletion log (tombstones) for scanner delta sync."""
+from datetime import datetime
+from typing import List, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+from app.config import Config
+from app.db import get_db
+from app.pagination import encode_cursor, keyset_filter
+
+
+class DeletionLogModel:
+    """Records deleted inventory items so delta sync can report them.
+    
+    Entries expire after ``SYNC_TOMBSTONE_DAYS``; a client whose watermark
+    is older than that must take a fresh snapshot.
+    """
+    
+    COLLECTION = "inventory_deletions"
+    
+    # Indexes backing every query below (created by migrate.py)
+    INDEXES = [
+        IndexModel(
+            [("deletedAt", ASCENDING)],
+            expireAfterSeconds=Config.SYNC_TOMBSTONE_DAYS * 24 * 3600
+        ),
+        # Keyset pagination (the TTL index above must stay single-field)
+        IndexModel([("deletedAt", ASCENDING), ("_id", ASCENDING)]),
+    ]
+    
+    # Representative query shapes, checked by explain_queries.py
+    QUERY_SHAPES = {
+        "since": {"filter": {"deletedAt": {"$gte": datetime(2026, 1, 1)}}, "sort": {"deletedAt": 1, "_id": 1}},
+    }
+    
+    @staticmethod
+    def record(item: dict) -> None:
+        """Log the deletion of an inventory item (needs _id and qrCode)."""
+        db = get_db()
+        db.inventory_deletions.insert_one({
+            "itemId": item["_id"],
+            "qrCode": item["qrCode"],
+            "deletedAt": datetime.utcnow()
+        })
+    
+    @staticmethod
+    def find_since(
+        since: datetime,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> tuple[List[dict], Optional[str]]:
+        """One page of tombstones for items deleted at or after ``since``.
+        
+        Returns:
+            Tuple of (tombstones, next_cursor). next_cursor is None on the last page.
+        
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        query = {"deletedAt": {"$gte": since}}
+        page_filter = keyset_filter(cursor, "deletedAt", 1)
+        if page_filter:
+            query = {"$and": [query, page_filter]}
+        
+        db = get_db()
+        entries = list(db.inventory_deletions.find(
+            query,
+            sort=[("deletedAt", ASCENDING), ("_id", ASCENDING)],
+            limit=limit + 1
+        ))
+        
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            last = entries[-1]
+            next_cursor = encode_cursor("deletedAt", last["deletedAt"], last["_id"])
+        
+        return [
+            {
+                "id": str(entry["itemId"]),
+                "qrCode": entry["qrCode"],
+                "deletedAt": entry["deletedAt"]
+            }
+            for entry in entries
+        ], next_cursor
+    
+    @staticmethod
+    def first_cursor(since: datetime) -> str:
+        """Cursor whose next page is the first page of :meth:`find_since`."""
+        return encode_cursor("deletedAt", since, ObjectId("0" * 24))
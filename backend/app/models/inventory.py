@@ -1,14 +1,154 @@
 """Inventory model and database operations."""
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Iterator
 from bson import ObjectId
+import os
+import re
 import uuid
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.cache import TTLCache, MISSING
+from app.config import Config
 from app.db import get_db
+from app.events import record_stock_change
+from app.models.counter import CounterModel
+from app.models.deletion import DeletionLogModel
+from app.models.threshold import ThresholdModel
+from app.pagination import encode_cursor, keyset_filter
+
+# qrCode -> public payload, or None for unknown tokens (negative cache)
+_public_cache = TTLCache(
+    "qr_public",
+    max_size=Config.QR_CACHE_MAX_SIZE,
+    ttl=Config.QR_CACHE_TTL_SECONDS
+)
 
 
 class InventoryModel:
     """Inventory model for product management."""
     
+    COLLECTION = "inventory"
+    
+    # Indexes backing every query below (created by migrate.py)
+    INDEXES = [
+        IndexModel([("qrCode", ASCENDING)], unique=True),
+        IndexModel([("createdBy", ASCENDING)]),
+        # Default listing sort and keyset pagination cursors
+        IndexModel([("createdAt", DESCENDING), ("_id", DESCENDING)]),
+        # Category filters (exports, labels) with the listing sort
+        IndexModel([("category", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)]),
+        # Search sorts / keyset cursors; nameKey also serves name prefix search
+        IndexModel([("nameKey", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("price", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("quantity", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("updatedAt", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("name", TEXT), ("category", TEXT)], name="search_text"),
+    ]
+    
+    # Representative query shapes, checked by explain_queries.py
+    QUERY_SHAPES = {
+        "changed_since": {
+            "filter": {"updatedAt": {"$gte": datetime(2026, 1, 1)}},
+            "sort": {"updatedAt": 1, "_id": 1}
+        },
+        "list": {"filter": {}, "sort": {"createdAt": -1, "_id": -1}},
+        "list_page": {
+            "filter": {"$or": [
+                {"createdAt": {"$lt": datetime(2000, 1, 1)}},
+                {"createdAt": datetime(2000, 1, 1), "_id": {"$lt": ObjectId()}}
+            ]},
+            "sort": {"createdAt": -1, "_id": -1}
+        },
+        "by_category": {"filter": {"category": "sample"}, "sort": {"createdAt": -1, "_id": -1}},
+        "by_created_range": {
+            "filter": {"createdAt": {"$gte": datetime(2000, 1, 1)}},
+            "sort": {"createdAt": -1, "_id": -1}
+        },
+        "by_id": {"filter": {"_id": ObjectId()}},
+        "by_qr_code": {"filter": {"qrCode": "sample"}},
+        "by_ids": {"filter": {"_id": {"$in": [ObjectId(), ObjectId()]}}},
+        "name_prefix": {"filter": {"nameKey": {"$regex": "^sam"}}, "sort": {"nameKey": 1, "_id": 1}},
+        "by_price": {"filter": {"price": {"$gte": 1, "$lte": 10}}, "sort": {"price": 1, "_id": 1}},
+        "low_stock": {"filter": {"quantity": {"$lt": 10}}, "sort": {"quantity": 1, "_id": 1}},
+        "recently_updated": {"filter": {}, "sort": {"updatedAt": -1, "_id": -1}},
+    }
+    
+    # Listing sort order, backed by the {createdAt: -1, _id: -1} index
+    LIST_SORT = [("createdAt", -1), ("_id", -1)]
+    
+    # Sortable API fields -> indexed document fields (each has an {f, _id} index)
+    SORT_FIELDS = {
+        "createdAt": "createdAt",
+        "updatedAt": "updatedAt",
+        "name": "nameKey",
+        "price": "price",
+        "quantity": "quantity"
+    }
+    
+    # Only the fields _serialize reads are sent over the wire
+    LIST_PROJECTION = {
+        "name": 1,
+        "category": 1,
+        "quantity": 1,
+        "price": 1,
+        "reserved": 1,
+        "qrCode": 1,
+        "createdBy": 1,
+        "createdAt": 1,
+        "updatedAt": 1
+    }
+    
+    REQUIRED_FIELDS = ["name", "category", "quantity", "price"]
+    
+    # Fields sent to offline scanners (snapshot and delta sync)
+    SYNC_PROJECTION = {"qrCode": 1, "name": 1, "price": 1, "quantity": 1, "updatedAt": 1}
+    
+    @staticmethod
+    def parse_item_fields(data: dict) -> dict:
+        """Validate and coerce the fields of a new item.
+        
+        Shared by the create endpoint and bulk import so both apply the
+        same rules.
+        
+        Returns:
+            Dict with name, category, quantity and price
+        
+        Raises:
+            ValueError: With a user-facing message if a field is invalid
+        """
+        for field in InventoryModel.REQUIRED_FIELDS:
+            if field not in data:
+                raise ValueError(f"{field} is required")
+        
+        name = str(data["name"]).strip()
+        category = str(data["category"]).strip()
+        
+        try:
+            quantity = int(data["quantity"])
+        except (ValueError, TypeError):
+            raise ValueError("Quantity must be a valid integer")
+        
+        try:
+            price = float(data["price"])
+        except (ValueError, TypeError):
+            raise ValueError("Price must be a valid number")
+        
+        if len(name) < 1:
+            raise ValueError("Name cannot be empty")
+        if len(category) < 1:
+            raise ValueError("Category cannot be empty")
+        if quantity < 0:
+            raise ValueError("Quantity cannot be negative")
+        if price < 0:
+            raise ValueError("Price cannot be negative")
+        
+        return {
+            "name": name,
+            "category": category,
+            "quantity": quantity,
+            "price": price
+        }
+    
     @staticmethod
     def create(
         name: str,
@@ -30,6 +170,7 @@ class InventoryModel:
         
         item_doc = {
             "name": name,
+            "nameKey": name.lower(),
             "category": category,
             "quantity": quantity,
             "price": price,
@@ -41,15 +182,342 @@ class InventoryModel:
         
         result = db.inventory.insert_one(item_doc)
         item_doc["_id"] = result.inserted_id
+        InventoryModel.mark_changed([qr_code])
         
         return InventoryModel._serialize(item_doc)
     
+    @staticmethod
+    def generate_qr_codes(count: int) -> List[str]:
+        """Generate ``count`` new QR codes from a single entropy read."""
+        entropy = os.urandom(6 * count).hex().upper()
+        return [f"INV-{entropy[i * 12:(i + 1) * 12]}" for i in range(count)]
+    
+    @staticmethod
+    def bulk_upsert(rows: List[dict], created_by: str) -> dict:
+        """Insert or update many validated items with one unordered bulk write.
+        
+        Rows carrying a ``qrCode`` are upserted on that code; rows without
+        one are inserted with a freshly generated code.
+        
+        Args:
+            rows: Dicts from parse_item_fields, optionally with qrCode
+            created_by: Owner ID recorded on inserted items
+        
+        Returns:
+            Dict with inserted, updated and errors (list of (row index, message))
+        """
+        if not rows:
+            return {"inserted": 0, "updated": 0, "errors": []}
+        
+        db = get_db()
+        now = datetime.utcnow()
+        owner_id = ObjectId(created_by)
+        new_codes = iter(InventoryModel.generate_qr_codes(
+            sum(1 for row in rows if not row.get("qrCode"))
+        ))
+        
+        operations = []
+        qr_codes = []
+        for row in rows:
+            fields = {
+                "name": row["name"],
+                "nameKey": row["name"].lower(),
+                "category": row["category"],
+                "quantity": row["quantity"],
+                "price": row["price"],
+                "updatedAt": now
+            }
+            qr_code = row.get("qrCode")
+            if qr_code:
+                operations.append(UpdateOne(
+                    {"qrCode": qr_code},
+                    {
+                        "$set": fields,
+                        "$setOnInsert": {"createdBy": owner_id, "createdAt": now}
+                    },
+                    upsert=True
+                ))
+            else:
+                qr_code = next(new_codes)
+                operations.append(InsertOne({
+                    **fields,
+                    "qrCode": qr_code,
+                    "createdBy": owner_id,
+                    "createdAt": now
+                }))
+            qr_codes.append(qr_code)
+        
+        errors = []
+        try:
+            result = db.inventory.bulk_write(operations, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            errors = [
+                (error["index"], error.get("errmsg", "Write failed"))
+                for error in details.get("writeErrors", [])
+            ]
+        
+        InventoryModel.mark_changed(qr_codes)
+        return {
+            "inserted": details.get("nInserted", 0) + details.get("nUpserted", 0),
+            "updated": details.get("nModified", 0),
+            "errors": errors
+        }
+    
     @staticmethod
     def find_all() -> List[dict]:
-        """Get all inventory items."""
+        """Get all inventory items.
+        
+        Prefer :meth:`iter_all` or :meth:`find_page` for large catalogs.
+        """
+        return list(InventoryModel.iter_all())
+    
+    @staticmethod
+    def iter_all(
+        query: Optional[dict] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[dict]:
+        """Lazily yield serialized inventory items, newest first.
+        
+        Documents are pulled from the server one batch at a time, so memory
+        use is bounded by ``batch_size`` rather than the catalog size.
+        
+        Args:
+            query: Optional MongoDB filter
+            batch_size: Documents per server round trip
+        """
+        db = get_db(read_only=True)
+        items = db.inventory.find(
+            query or {},
+            InventoryModel.LIST_PROJECTION,
+            sort=InventoryModel.LIST_SORT,
+            batch_size=batch_size or Config.MONGODB_BATCH_SIZE
+        )
+        try:
+            for item in items:
+                yield InventoryModel._serialize(item)
+        finally:
+            items.close()
+    
+    @staticmethod
+    def find_page(
+        limit: int,
+        cursor: Optional[str] = None,
+        query: Optional[dict] = None,
+        sort: str = "createdAt",
+        direction: int = -1
+    ) -> tuple[List[dict], Optional[str]]:
+        """Get one page of inventory items using keyset pagination.
+        
+        Args:
+            limit: Maximum number of items to return
+            cursor: Opaque cursor from a previous page, or None for the first page
+            query: Optional filter (see build_search_query)
+            sort: Key of SORT_FIELDS to order by
+            direction: 1 for ascending, -1 for descending
+        
+        Returns:
+            Tuple of (items, next_cursor). next_cursor is None on the last page.
+        
+        Raises:
+            ValueError: If the cursor or sort field is invalid
+        """
+        if sort not in InventoryModel.SORT_FIELDS:
+            raise ValueError(
+                f"Invalid sort. Must be one of: {list(InventoryModel.SORT_FIELDS)}"
+            )
+        field = InventoryModel.SORT_FIELDS[sort]
+        
+        page_filter = keyset_filter(cursor, field, direction)
+        if query and page_filter:
+            page_filter = {"$and": [query, page_filter]}
+        elif query:
+            page_filter = query
+        
+        db = get_db(read_only=True)
+        docs = list(db.inventory.find(
+            page_filter,
+            {**InventoryModel.LIST_PROJECTION, field: 1},
+            sort=[(field, direction), ("_id", direction)],
+            limit=limit + 1
+        ))
+        
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            last = docs[-1]
+            next_cursor = encode_cursor(field, last[field], last["_id"])
+        
+        return [InventoryModel._serialize(doc) for doc in docs], next_cursor
+    
+    @staticmethod
+    def iter_sync_snapshot() -> Iterator[dict]:
+        """Stream every item in the compact scanner sync format."""
+        db = get_db()
+        cursor = db.inventory.find(
+            {},
+            InventoryModel.SYNC_PROJECTION,
+            batch_size=Config.EXPORT_BATCH_SIZE
+        )
+        try:
+            for item in cursor:
+                yield InventoryModel._serialize_sync(item)
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def find_changes(
+        since: datetime,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> tuple[List[dict], Optional[str]]:
+        """Items updated at or after ``since``, oldest change first.
+        
+        Pages walk the ``{updatedAt, _id}`` index with a keyset cursor, so
+        the cost follows the number of changes rather than the catalog
+        size. An item updated again while a client pages moves behind the
+        cursor and is picked up on a later page.
+        
+        Returns:
+            Tuple of (items, next_cursor). next_cursor is None on the last page.
+        
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        query = {"updatedAt": {"$gte": since}}
+        page_filter = keyset_filter(cursor, "updatedAt", 1)
+        if page_filter:
+            query = {"$and": [query, page_filter]}
+        
+        # Primary reads: a lagging secondary could skip writes behind the watermark
+        db = get_db()
+        docs = list(db.inventory.find(
+            query,
+            InventoryModel.SYNC_PROJECTION,
+            sort=[("updatedAt", ASCENDING), ("_id", ASCENDING)],
+            limit=limit + 1
+        ))
+        
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            last = docs[-1]
+            next_cursor = encode_cursor("updatedAt", last["updatedAt"], last["_id"])
+        
+        return [InventoryModel._serialize_sync(doc) for doc in docs], next_cursor
+    
+    @staticmethod
+    def build_search_query(
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_quantity: Optional[int] = None,
+        max_quantity: Optional[int] = None,
+        low_stock: bool = False,
+        prefix: Optional[str] = None,
+        text: Optional[str] = None
+    ) -> dict:
+        """Build a MongoDB filter for inventory search.
+        
+        Args:
+            category: Exact category
+            min_price, max_price: Inclusive price range
+            min_quantity, max_quantity: Inclusive stock range
+            low_stock: Only items below their low-stock threshold (ThresholdModel)
+            prefix: Case-insensitive name prefix (uses the nameKey index)
+            text: Full-text search over name and category (text index)
+        """
+        query = {}
+        if category:
+            query["category"] = category
+        
+        price = {}
+        if min_price is not None:
+            price["$gte"] = min_price
+        if max_price is not None:
+            price["$lte"] = max_price
+        if price:
+            query["price"] = price
+        
+        quantity = {}
+        if min_quantity is not None:
+            quantity["$gte"] = min_quantity
+        if max_quantity is not None:
+            quantity["$lte"] = max_quantity
+        if quantity:
+            query["quantity"] = quantity
+        
+        if prefix:
+            query["nameKey"] = {"$regex": f"^{re.escape(prefix.lower())}"}
+        if text:
+            query["$text"] = {"$search": text}
+        
+        if low_stock:
+            low = ThresholdModel.low_stock_filter()
+            query = {"$and": [query, low]} if query else low
+        
+        return query
+    
+    @staticmethod
+    def iter_for_labels(
+        category: Optional[str] = None,
+        item_ids: Optional[List[str]] = None,
+        limit: int = 0
+    ) -> Iterator[dict]:
+        """Yield ``{name, price, qrCode}`` for label printing from one cursor.
+        
+        Raises:
+            ValueError: If any item ID is invalid
+        """
+        db = get_db(read_only=True)
+        items = db.inventory.find(
+            InventoryModel._labels_query(category, item_ids),
+            {"_id": 0, "name": 1, "price": 1, "qrCode": 1},
+            sort=InventoryModel.LIST_SORT,
+            limit=limit,
+            batch_size=Config.MONGODB_BATCH_SIZE
+        )
+        try:
+            yield from items
+        finally:
+            items.close()
+    
+    @staticmethod
+    def count_for_labels(category: Optional[str] = None, item_ids: Optional[List[str]] = None) -> int:
+        """Count the items ``iter_for_labels`` would yield (without a limit).
+        
+        Raises:
+            ValueError: If any item ID is invalid
+        """
+        db = get_db(read_only=True)
+        return db.inventory.count_documents(InventoryModel._labels_query(category, item_ids))
+    
+    @staticmethod
+    def _labels_query(category: Optional[str], item_ids: Optional[List[str]]) -> dict:
+        query = {}
+        if category:
+            query["category"] = category
+        if item_ids:
+            try:
+                query["_id"] = {"$in": [ObjectId(item_id) for item_id in item_ids]}
+            except Exception:
+                raise ValueError("Invalid item ID in ids")
+        return query
+    
+    @staticmethod
+    def find_version(item_id: str) -> Optional[tuple[datetime, int]]:
+        """``(updatedAt, reserved)`` of an item, enough to tell whether it changed.
+        
+        ``reserved`` is included because reservations change the item's
+        ``available`` stock without touching ``updatedAt``.
+        """
         db = get_db()
-        items = db.inventory.find().sort("createdAt", -1)
-        return [InventoryModel._serialize(item) for item in items]
+        try:
+            item = db.inventory.find_one({"_id": ObjectId(item_id)}, {"updatedAt": 1, "reserved": 1})
+        except Exception:
+            return None
+        return (item["updatedAt"], item.get("reserved", 0)) if item else None
     
     @staticmethod
     def find_by_id(item_id: str) -> Optional[dict]:
@@ -61,6 +529,16 @@ class InventoryModel:
         except Exception:
             return None
     
+    @staticmethod
+    def find_qr_code(item_id: str) -> Optional[str]:
+        """Get only the QR code of an item (used for image rendering)."""
+        db = get_db()
+        try:
+            item = db.inventory.find_one({"_id": ObjectId(item_id)}, {"qrCode": 1})
+            return item["qrCode"] if item else None
+        except Exception:
+            return None
+    
     @staticmethod
     def find_by_qr_code(qr_code: str) -> Optional[dict]:
         """Find an inventory item by QR code."""
@@ -68,6 +546,49 @@ class InventoryModel:
         item = db.inventory.find_one({"qrCode": qr_code})
         return InventoryModel._serialize(item) if item else None
     
+    @staticmethod
+    def find_many_by_qr_code(qr_codes: List[str], public: bool = False) -> dict:
+        """Resolve many QR codes with a single ``$in`` on the unique index.
+        
+        Public lookups are read through the same per-worker cache (and
+        negative cache) as ``find_by_qr_token_public``, so only uncached
+        codes reach MongoDB.
+        
+        Args:
+            qr_codes: Codes to resolve (duplicates are fine)
+            public: Return public fields only
+        
+        Returns:
+            Dict of code -> serialized item, or None for unknown codes
+        """
+        results = {}
+        missing = []
+        for qr_code in dict.fromkeys(qr_codes):
+            cached = _public_cache.get(qr_code) if public else MISSING
+            if cached is MISSING:
+                missing.append(qr_code)
+            else:
+                results[qr_code] = cached
+        
+        if missing:
+            db = get_db()
+            found = {
+                item["qrCode"]: item
+                for item in db.inventory.find({"qrCode": {"$in": missing}})
+            }
+            for qr_code in missing:
+                item = found.get(qr_code)
+                if not public:
+                    results[qr_code] = InventoryModel._serialize(item) if item else None
+                elif item:
+                    results[qr_code] = InventoryModel._serialize_public(item)
+                    _public_cache.set(qr_code, results[qr_code])
+                else:
+                    results[qr_code] = None
+                    _public_cache.set(qr_code, None, ttl=Config.QR_NEGATIVE_CACHE_TTL_SECONDS)
+        
+        return results
+    
     @staticmethod
     def update(
         item_id: str,
@@ -83,6 +604,7 @@ class InventoryModel:
         
         if name is not None:
             update_fields["name"] = name
+            update_fields["nameKey"] = name.lower()
         if category is not None:
             update_fields["category"] = category
         if quantity is not None:
@@ -100,19 +622,31 @@ class InventoryModel:
                 {"$set": update_fields},
                 return_document=True
             )
-            return InventoryModel._serialize(result) if result else None
         except Exception:
             return None
+        if not result:
+            return None
+        InventoryModel.mark_changed([result["qrCode"]])
+        return InventoryModel._serialize(result)
     
     @staticmethod
     def delete(item_id: str) -> bool:
         """Delete an inventory item."""
         db = get_db()
         try:
-            result = db.inventory.delete_one({"_id": ObjectId(item_id)})
-            return result.deleted_count > 0
+            deleted = db.inventory.find_one_and_delete(
+                {"_id": ObjectId(item_id)},
+                projection={"qrCode": 1}
+            )
         except Exception:
             return False
+        if not deleted:
+            return False
+        DeletionLogModel.record(deleted)
+        InventoryModel.invalidate_public([deleted["qrCode"]])
+        record_stock_change(deleted_ids=[deleted["_id"]])
+        CounterModel.bump(InventoryModel.COLLECTION)
+        return True
     
     @staticmethod
     def find_by_qr_token_public(qr_token: str) -> Optional[dict]:
@@ -120,25 +654,77 @@ class InventoryModel:
         
         This method is designed for the public QR lookup API.
         Returns only non-sensitive fields suitable for public consumption.
+        
+        Results are read through a per-worker TTL cache. Unknown tokens are
+        cached too (for a shorter TTL) so random-token scans stay off MongoDB.
         """
+        cached = _public_cache.get(qr_token)
+        if cached is not MISSING:
+            return cached
+        
         db = get_db()
         item = db.inventory.find_one({"qrCode": qr_token})
-        return InventoryModel._serialize_public(item) if item else None
+        if not item:
+            _public_cache.set(qr_token, None, ttl=Config.QR_NEGATIVE_CACHE_TTL_SECONDS)
+            return None
+        
+        payload = InventoryModel._serialize_public(item)
+        _public_cache.set(qr_token, payload)
+        return payload
+    
+    @staticmethod
+    def mark_changed(qr_codes) -> None:
+        """Bookkeeping after a committed write to these items.
+        
+        Drops their cached public payloads, feeds the stock event stream
+        and bumps the inventory version used by conditional list requests.
+        """
+        InventoryModel.invalidate_public(qr_codes)
+        record_stock_change(qr_codes)
+        CounterModel.bump(InventoryModel.COLLECTION)
+    
+    @staticmethod
+    def invalidate_public(qr_codes) -> None:
+        """Drop cached public payloads after a write to these items."""
+        for qr_code in qr_codes:
+            _public_cache.invalidate(qr_code)
+    
+    @staticmethod
+    def available(item: dict) -> int:
+        """Stock not held by active reservations."""
+        return max(0, item["quantity"] - item.get("reserved", 0))
     
     @staticmethod
     def _serialize(item: dict) -> dict:
-        """Serialize inventory item for API response (authenticated users)."""
+        """Serialize inventory item for API response (authenticated users).
+        
+        Datetimes are left as ``datetime``; the JSON provider writes them
+        as ISO 8601 (natively, under orjson).
+        """
         return {
             "id": str(item["_id"]),
             "name": item["name"],
             "category": item["category"],
             "quantity": item["quantity"],
+            "reserved": item.get("reserved", 0),
+            "available": InventoryModel.available(item),
             "price": item["price"],
             "qrCode": item["qrCode"],
             "createdBy": str(item["createdBy"]),
-            "createdAt": item["createdAt"].isoformat(),
-            "updatedAt": item["updatedAt"].isoformat(),
-            "lowStock": item["quantity"] < 10  # Low stock indicator
+            "createdAt": item["createdAt"],
+            "updatedAt": item["updatedAt"],
+            "lowStock": ThresholdModel.is_low(item)
+        }
+    
+    @staticmethod
+    def _serialize_sync(item: dict) -> dict:
+        """Serialize inventory item for offline scanner sync."""
+        return {
+            "qrCode": item["qrCode"],
+            "id": str(item["_id"]),
+            "name": item["name"],
+            "price": item["price"],
+            "quantity": item["quantity"]
         }
     
     @staticmethod
@@ -146,7 +732,7 @@ class InventoryModel:
         """Serialize inventory item for PUBLIC API response.
         
         Returns fields safe for public consumption + id for cart:
-        - id, name, category, price, quantity, qrCode, inStock
+        - id, name, category, price, quantity, available, qrCode, inStock
         """
         return {
             "id": str(item["_id"]),
@@ -154,6 +740,7 @@ class InventoryModel:
             "category": item["category"],
             "price": item["price"],
             "quantity": item["quantity"],
+            "available": InventoryModel.available(item),
             "qrCode": item["qrCode"],
-            "inStock": item["quantity"] > 0
+            "inStock": InventoryModel.available(item) > 0
         }
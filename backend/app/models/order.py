@@ -1,17 +1,49 @@
 """Order model for purchase and billing operations."""
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Iterable, Iterator
 from bson import ObjectId
-from app.db import get_db
+from flask import g, has_app_context
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument, UpdateOne
+from app.config import Config
+from app.db import get_db, run_in_transaction
+from app.models.analytics import AnalyticsModel
+from app.models.counter import CounterModel
+from app.models.inventory import InventoryModel
+from app.models.reservation import ReservationModel
 
 
 class OrderModel:
     """Order model for managing purchases and bills."""
     
+    COLLECTION = "orders"
+    
+    # Indexes backing every query below (created by migrate.py)
+    INDEXES = [
+        IndexModel([("createdAt", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("buyerId", ASCENDING), ("createdAt", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("createdAt", DESCENDING)]),
+    ]
+    
+    # Representative query shapes, checked by explain_queries.py
+    QUERY_SHAPES = {
+        "list": {"filter": {}, "sort": {"createdAt": -1}},
+        "by_buyer": {"filter": {"buyerId": ObjectId()}, "sort": {"createdAt": -1}},
+        "by_id_and_buyer": {"filter": {"_id": ObjectId(), "buyerId": ObjectId()}},
+        "by_status": {"filter": {"status": "completed"}, "sort": {"createdAt": -1}},
+        "by_created_range": {
+            "filter": {"createdAt": {"$gte": datetime(2000, 1, 1)}},
+            "sort": {"createdAt": -1}
+        },
+    }
+    
     @staticmethod
     def create(buyer_id: str, items: List[dict]) -> dict:
         """Create a new order with stock validation and deduction.
         
+        Any active holds the buyer has on the ordered products are consumed:
+        held units are already set aside, so only the unheld remainder of
+        each line is checked against available stock.
+        
         Args:
             buyer_id: The ID of the buyer making the purchase
             items: List of items to purchase, each with:
@@ -27,11 +59,8 @@ class OrderModel:
         if not items or len(items) == 0:
             raise ValueError("Order must contain at least one item")
         
-        db = get_db()
-        order_items = []
-        total_amount = 0
-        
-        # Validate and prepare each item
+        # Validate line items before touching the database
+        lines = []
         for item in items:
             product_id = item.get("productId")
             quantity = item.get("quantity", 0)
@@ -41,86 +70,217 @@ class OrderModel:
             if quantity <= 0:
                 raise ValueError("Quantity must be greater than 0")
             
-            # Get product from inventory
             try:
-                product = db.inventory.find_one({"_id": ObjectId(product_id)})
+                lines.append((ObjectId(product_id), quantity))
             except Exception:
                 raise ValueError(f"Invalid product ID: {product_id}")
+        
+        buyer_oid = ObjectId(buyer_id)
+        
+        # Total requested quantity per product (a cart may repeat a product)
+        requested = {}
+        for product_oid, quantity in lines:
+            requested[product_oid] = requested.get(product_oid, 0) + quantity
+        
+        def place(session):
+            db = get_db()
             
-            if not product:
-                raise ValueError(f"Product not found: {product_id}")
+            # Holds this buyer placed on these products are spent by the order
+            claimed = ReservationModel.claim(buyer_oid, requested, session=session)
+            held = {product_oid: hold["quantity"] for product_oid, hold in claimed.items()}
             
-            # Check stock availability
-            if product["quantity"] < quantity:
-                raise ValueError(
-                    f"Insufficient stock for {product['name']}. "
-                    f"Available: {product['quantity']}, Requested: {quantity}"
-                )
+            try:
+                # One read for every product in the cart
+                products = {
+                    product["_id"]: product
+                    for product in db.inventory.find(
+                        {"_id": {"$in": list(requested)}},
+                        {"name": 1, "price": 1, "quantity": 1, "reserved": 1, "qrCode": 1, "category": 1},
+                        session=session
+                    )
+                }
+                
+                order_items = []
+                total_amount = 0
+                for product_oid, quantity in lines:
+                    product = products.get(product_oid)
+                    if not product:
+                        raise ValueError(f"Product not found: {product_oid}")
+                    
+                    subtotal = product["price"] * quantity
+                    total_amount += subtotal
+                    
+                    order_items.append({
+                        "productId": product_oid,
+                        "name": product["name"],
+                        "category": product["category"],
+                        "price": product["price"],
+                        "quantity": quantity,
+                        "subtotal": subtotal
+                    })
+                
+                # Held units are already set aside; only the rest must be available
+                for product_oid, quantity in requested.items():
+                    product = products[product_oid]
+                    available = InventoryModel.available(product) + held.get(product_oid, 0)
+                    if available < quantity:
+                        raise ValueError(
+                            f"Insufficient stock for {product['name']}. "
+                            f"Available: {available}, Requested: {quantity}"
+                        )
+                
+                OrderModel._deduct_stock(db, requested, products, session, held)
+            except Exception:
+                if session is None:
+                    ReservationModel.unclaim(claimed.values())
+                raise
             
-            subtotal = product["price"] * quantity
-            total_amount += subtotal
+            now = datetime.utcnow()
+            order_doc = {
+                "buyerId": buyer_oid,
+                "items": order_items,
+                "totalAmount": total_amount,
+                "status": "completed",  # pending, completed, cancelled
+                "createdAt": now,
+                "updatedAt": now
+            }
             
-            order_items.append({
-                "productId": ObjectId(product_id),
-                "name": product["name"],
-                "price": product["price"],
-                "quantity": quantity,
-                "subtotal": subtotal
-            })
-        
-        # Deduct stock for all items (atomic operation per item)
-        for order_item in order_items:
+            result = db.orders.insert_one(order_doc, session=session)
+            order_doc["_id"] = result.inserted_id
+            return order_doc, [product["qrCode"] for product in products.values()]
+        
+        order_doc, qr_codes = run_in_transaction(place)
+        InventoryModel.mark_changed(qr_codes)
+        CounterModel.bump(OrderModel.COLLECTION)
+        AnalyticsModel.record_order(order_doc)
+        
+        return OrderModel._serialize_one(order_doc)
+    
+    @staticmethod
+    def _deduct_stock(db, requested: dict, products: dict, session, held: dict) -> None:
+        """Conditionally decrement stock for every product in one batch.
+        
+        Units the buyer held (``held``, product -> quantity) come out of
+        both ``quantity`` and ``reserved``; the guard only requires the
+        unheld remainder to be available.
+        
+        Inside a transaction all updates go out in a single ``bulk_write``;
+        if any guard fails the ValueError aborts the transaction and
+        nothing is deducted. Without transactions, updates are applied one
+        by one and earlier deductions are compensated on failure.
+        """
+        now = datetime.utcnow()
+        
+        def guard(product_oid, quantity):
+            return {
+                "_id": product_oid,
+                "$expr": {"$gte": [
+                    {"$subtract": ["$quantity", {"$ifNull": ["$reserved", 0]}]},
+                    quantity - held.get(product_oid, 0)
+                ]}
+            }
+        
+        def deduction(product_oid, quantity):
+            return {
+                "$inc": {"quantity": -quantity, "reserved": -held.get(product_oid, 0)},
+                "$set": {"updatedAt": now}
+            }
+        
+        if session is not None:
+            operations = [
+                UpdateOne(guard(product_oid, quantity), deduction(product_oid, quantity))
+                for product_oid, quantity in requested.items()
+            ]
+            result = db.inventory.bulk_write(operations, ordered=False, session=session)
+            if result.matched_count != len(operations):
+                raise ValueError(
+                    "Failed to deduct stock. Stock may have changed. Please try again."
+                )
+            return
+        
+        deducted = []
+        for product_oid, quantity in requested.items():
             result = db.inventory.update_one(
-                {
-                    "_id": order_item["productId"],
-                    "quantity": {"$gte": order_item["quantity"]}  # Double-check stock
-                },
-                {
-                    "$inc": {"quantity": -order_item["quantity"]},
-                    "$set": {"updatedAt": datetime.utcnow()}
-                }
+                guard(product_oid, quantity),
+                deduction(product_oid, quantity)
             )
-            
             if result.modified_count == 0:
-                # Rollback previous deductions (best effort)
-                # In production, use transactions
+                for done_oid, done_quantity in deducted:
+                    db.inventory.update_one(
+                        {"_id": done_oid},
+                        {"$inc": {"quantity": done_quantity, "reserved": held.get(done_oid, 0)}}
+                    )
                 raise ValueError(
-                    f"Failed to deduct stock for {order_item['name']}. "
+                    f"Failed to deduct stock for {products[product_oid]['name']}. "
                     "Stock may have changed. Please try again."
                 )
-        
-        # Create order document
-        order_doc = {
-            "buyerId": ObjectId(buyer_id),
-            "items": order_items,
-            "totalAmount": total_amount,
-            "status": "completed",  # pending, completed, cancelled
-            "createdAt": datetime.utcnow()
-        }
-        
-        result = db.orders.insert_one(order_doc)
-        order_doc["_id"] = result.inserted_id
-        
-        return OrderModel._serialize(order_doc)
+            deducted.append((product_oid, quantity))
     
     @staticmethod
     def find_by_buyer(buyer_id: str) -> List[dict]:
         """Get all orders for a specific buyer."""
-        db = get_db()
         try:
-            orders = db.orders.find(
-                {"buyerId": ObjectId(buyer_id)}
-            ).sort("createdAt", -1)
-            return [OrderModel._serialize(order) for order in orders]
+            query = {"buyerId": ObjectId(buyer_id)}
         except Exception:
             return []
+        return list(OrderModel.iter_all(query))
     
     @staticmethod
     def find_all() -> List[dict]:
         """Get all orders (for owner view)."""
+        return list(OrderModel.iter_all())
+    
+    # Fields read by _serialize
+    LIST_PROJECTION = {
+        "buyerId": 1,
+        "items": 1,
+        "totalAmount": 1,
+        "status": 1,
+        "createdAt": 1,
+        "updatedAt": 1
+    }
+    
+    @staticmethod
+    def iter_all(
+        query: Optional[dict] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[dict]:
+        """Lazily yield serialized orders, newest first.
+        
+        Orders are fetched and their buyer names resolved one batch at a
+        time, so memory stays bounded however long the history is.
+        """
+        batch_size = batch_size or Config.MONGODB_BATCH_SIZE
+        db = get_db(read_only=True)
+        orders = db.orders.find(
+            query or {},
+            OrderModel.LIST_PROJECTION,
+            sort=[("createdAt", -1)],
+            batch_size=batch_size
+        )
+        try:
+            yield from OrderModel._serialize_many(orders, batch_size)
+        finally:
+            orders.close()
+    
+    @staticmethod
+    def find_last_modified(order_id: str, buyer_id: Optional[str] = None) -> Optional[datetime]:
+        """When an order last changed, without loading or serializing it.
+        
+        Args:
+            order_id: The order ID
+            buyer_id: Optional buyer ID to restrict access
+        """
         db = get_db()
-        orders = db.orders.find().sort("createdAt", -1)
-        return [OrderModel._serialize(order) for order in orders]
+        try:
+            query = {"_id": ObjectId(order_id)}
+            if buyer_id:
+                query["buyerId"] = ObjectId(buyer_id)
+        except Exception:
+            return None
+        
+        order = db.orders.find_one(query, {"createdAt": 1, "updatedAt": 1})
+        return order.get("updatedAt", order["createdAt"]) if order else None
     
     @staticmethod
     def find_by_id(order_id: str, buyer_id: Optional[str] = None) -> Optional[dict]:
@@ -137,7 +297,7 @@ class OrderModel:
                 query["buyerId"] = ObjectId(buyer_id)
             
             order = db.orders.find_one(query)
-            return OrderModel._serialize(order) if order else None
+            return OrderModel._serialize_one(order) if order else None
         except Exception:
             return None
     
@@ -155,29 +315,96 @@ class OrderModel:
         if status not in ["pending", "completed", "cancelled"]:
             raise ValueError("Invalid status. Must be: pending, completed, or cancelled")
         
-        db = get_db()
         try:
-            result = db.orders.find_one_and_update(
-                {"_id": ObjectId(order_id)},
-                {"$set": {"status": status}},
-                return_document=True
-            )
-            return OrderModel._serialize(result) if result else None
+            order_oid = ObjectId(order_id)
         except Exception:
             return None
+        
+        db = get_db()
+        now = datetime.utcnow()
+        previous = db.orders.find_one_and_update(
+            {"_id": order_oid},
+            {"$set": {"status": status, "updatedAt": now}},
+            return_document=ReturnDocument.BEFORE
+        )
+        if not previous:
+            return None
+        CounterModel.bump(OrderModel.COLLECTION)
+        
+        # Keep the sales rollups in step with cancellations
+        was_cancelled = previous.get("status") == "cancelled"
+        if was_cancelled != (status == "cancelled"):
+            AnalyticsModel.record_order(previous, sign=1 if was_cancelled else -1)
+        
+        return OrderModel._serialize_one({**previous, "status": status, "updatedAt": now})
     
     @staticmethod
-    def _serialize(order: dict) -> dict:
-        """Serialize order for API response."""
-        # Get buyer info
-        db = get_db()
-        buyer = db.users.find_one({"_id": order["buyerId"]})
-        buyer_name = buyer["name"] if buyer else "Unknown"
+    def _serialize_one(order: dict) -> dict:
+        """Serialize a single order, resolving its buyer name."""
+        names = OrderModel._resolve_buyer_names([order["buyerId"]])
+        return OrderModel._serialize(order, names)
+    
+    @staticmethod
+    def _serialize_many(
+        orders: Iterable[dict],
+        batch_size: Optional[int] = None
+    ) -> Iterator[dict]:
+        """Serialize orders, resolving buyer names one batch at a time.
+        
+        Orders are consumed in batches; each batch costs a single ``$in``
+        query on ``users`` instead of one ``find_one`` per order.
+        """
+        batch_size = batch_size or Config.MONGODB_BATCH_SIZE
+        batch = []
+        for order in orders:
+            batch.append(order)
+            if len(batch) >= batch_size:
+                yield from OrderModel._serialize_batch(batch)
+                batch = []
+        if batch:
+            yield from OrderModel._serialize_batch(batch)
+    
+    @staticmethod
+    def _serialize_batch(orders: List[dict]) -> List[dict]:
+        """Serialize a batch of orders with one bulk buyer lookup."""
+        names = OrderModel._resolve_buyer_names(
+            order["buyerId"] for order in orders
+        )
+        return [OrderModel._serialize(order, names) for order in orders]
+    
+    @staticmethod
+    def _resolve_buyer_names(buyer_ids: Iterable[ObjectId]) -> dict:
+        """Map buyer IDs to names with at most one query.
+        
+        Names already resolved during the current request are reused from a
+        map stored on ``flask.g``.
+        """
+        names = {}
+        if has_app_context():
+            names = g.setdefault("buyer_names", {})
+        
+        missing = {buyer_id for buyer_id in buyer_ids if buyer_id not in names}
+        if missing:
+            db = get_db()
+            for user in db.users.find({"_id": {"$in": list(missing)}}, {"name": 1}):
+                names[user["_id"]] = user["name"]
+            for buyer_id in missing:
+                names.setdefault(buyer_id, "Unknown")
         
+        return names
+    
+    @staticmethod
+    def _serialize(order: dict, buyer_names: dict) -> dict:
+        """Serialize order for API response.
+        
+        Args:
+            order: Order document
+            buyer_names: Map of buyer ID to name (see _resolve_buyer_names)
+        """
         return {
             "id": str(order["_id"]),
             "buyerId": str(order["buyerId"]),
-            "buyerName": buyer_name,
+            "buyerName": buyer_names.get(order["buyerId"], "Unknown"),
             "items": [
                 {
                     "productId": str(item["productId"]),
@@ -190,5 +417,6 @@ class OrderModel:
             ],
             "totalAmount": order["totalAmount"],
             "status": order.get("status", "completed"),
-            "createdAt": order["createdAt"].isoformat()
+            "createdAt": order["createdAt"],
+            "updatedAt": order.get("updatedAt", order["createdAt"])
         }
@@ -0,0 +1,358 @@
+"""Reservation (cart hold) model and database operations."""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.config import Config
+from app.db import get_db, run_in_transaction
+from app.models.inventory import InventoryModel
+
+
+class ReservationModel:
+    """Time-limited holds on stock while a buyer checks out.
+    
+    Every hold is mirrored in a ``reserved`` counter on its inventory item,
+    so available stock (``quantity - reserved``) is a single-document read.
+    Holds expire after ``RESERVATION_TTL_SECONDS`` unless extended; a
+    sweeper thread in each worker deletes expired holds and returns them to
+    stock. A TTL index on ``purgeAt`` (well after expiry) only removes
+    leftovers, since it cannot adjust the counters itself.
+    
+    Whoever deletes a hold document (release, sweeper or order) owns giving
+    its quantity back, which keeps the counter exact under concurrency.
+    Changing a hold and its counter happen in one transaction when
+    transactions are available; ``repair_reserved`` (run by migrate.py)
+    recomputes the counters from the holds should they ever drift.
+    """
+    
+    COLLECTION = "reservations"
+    
+    # Indexes backing every query below (created by migrate.py)
+    INDEXES = [
+        IndexModel([("buyerId", ASCENDING), ("productId", ASCENDING)], unique=True),
+        IndexModel([("expiresAt", ASCENDING)]),
+        IndexModel([("purgeAt", ASCENDING)], expireAfterSeconds=0),
+    ]
+    
+    # Representative query shapes, checked by explain_queries.py
+    QUERY_SHAPES = {
+        "by_buyer": {"filter": {"buyerId": ObjectId(), "expiresAt": {"$gt": datetime(2026, 1, 1)}}},
+        "expired": {"filter": {"expiresAt": {"$lte": datetime(2026, 1, 1)}}},
+    }
+    
+    # Purge leftovers this long after expiry (sweeper runs far more often)
+    PURGE_GRACE = timedelta(hours=1)
+    
+    @staticmethod
+    def reserve(buyer_id: str, product_id: str, quantity: int) -> dict:
+        """Hold ``quantity`` units of a product for a buyer.
+        
+        Reserving a product the buyer already holds changes the held
+        quantity (and restarts its expiry, never past RESERVATION_MAX_SECONDS
+        from when the hold was first made); a quantity of 0 releases it.
+        At most RESERVATION_MAX_QUANTITY units of one product can be held.
+        
+        Returns:
+            The hold
+            
+        Raises:
+            ValueError: If the product is unknown or not enough is available
+        """
+        if quantity < 0:
+            raise ValueError("Quantity cannot be negative")
+        if quantity > Config.RESERVATION_MAX_QUANTITY:
+            raise ValueError(f"At most {Config.RESERVATION_MAX_QUANTITY} units of a product can be held")
+        try:
+            buyer_oid = ObjectId(buyer_id)
+            product_oid = ObjectId(product_id)
+        except Exception:
+            raise ValueError(f"Invalid product ID: {product_id}")
+        
+        reservation_sweeper.start()
+        db = get_db()
+        now = datetime.utcnow()
+        
+        current = db.reservations.find_one({"buyerId": buyer_oid, "productId": product_oid})
+        if current and current["expiresAt"] <= now:
+            # Expired but not swept yet: return it to stock first
+            ReservationModel._release_doc(current)
+            current = None
+        
+        held = current["quantity"] if current else 0
+        if quantity == 0:
+            if current:
+                ReservationModel._release_doc(current)
+            return {"productId": product_id, "quantity": 0, "expiresAt": None}
+        
+        if not current and db.reservations.count_documents(
+            {"buyerId": buyer_oid, "expiresAt": {"$gt": now}}, limit=Config.RESERVATION_MAX_PER_BUYER
+        ) >= Config.RESERVATION_MAX_PER_BUYER:
+            raise ValueError(f"At most {Config.RESERVATION_MAX_PER_BUYER} products can be held at once")
+        
+        created_at = current["createdAt"] if current else now
+        expires_at = min(
+            now + timedelta(seconds=Config.RESERVATION_TTL_SECONDS),
+            created_at + timedelta(seconds=Config.RESERVATION_MAX_SECONDS)
+        )
+        delta = quantity - held
+        
+        def hold_stock(session):
+            qr_code = None
+            if delta:
+                qr_code = ReservationModel._adjust_reserved(product_oid, delta, held, session=session)
+            try:
+                hold = db.reservations.find_one_and_update(
+                    {"buyerId": buyer_oid, "productId": product_oid, "quantity": held},
+                    {
+                        "$set": {
+                            "quantity": quantity,
+                            "expiresAt": expires_at,
+                            "purgeAt": expires_at + ReservationModel.PURGE_GRACE
+                        },
+                        "$setOnInsert": {"createdAt": now}
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                    session=session
+                )
+            except DuplicateKeyError:
+                # A concurrent request changed this hold first; undo ours
+                # (a transaction is simply aborted)
+                if delta and session is None:
+                    ReservationModel._adjust_reserved(product_oid, -delta)
+                raise ValueError("This item is being updated in another request. Please try again.")
+            return hold, qr_code
+        
+        hold, qr_code = run_in_transaction(hold_stock)
+        if qr_code:
+            InventoryModel.mark_changed([qr_code])
+        return ReservationModel._serialize(hold)
+    
+    @staticmethod
+    def extend(buyer_id: str, reservation_id: str) -> Optional[dict]:
+        """Restart an active hold's expiry, up to RESERVATION_MAX_SECONDS in total."""
+        try:
+            query = {"_id": ObjectId(reservation_id), "buyerId": ObjectId(buyer_id)}
+        except Exception:
+            return None
+        
+        db = get_db()
+        now = datetime.utcnow()
+        hold = db.reservations.find_one({**query, "expiresAt": {"$gt": now}})
+        if not hold:
+            return None
+        
+        latest = hold["createdAt"] + timedelta(seconds=Config.RESERVATION_MAX_SECONDS)
+        expires_at = min(now + timedelta(seconds=Config.RESERVATION_TTL_SECONDS), latest)
+        hold = db.reservations.find_one_and_update(
+            {**query, "expiresAt": {"$gt": now}},
+            {"$set": {"expiresAt": expires_at, "purgeAt": expires_at + ReservationModel.PURGE_GRACE}},
+            return_document=ReturnDocument.AFTER
+        )
+        return ReservationModel._serialize(hold) if hold else None
+    
+    @staticmethod
+    def release(buyer_id: str, reservation_id: str) -> bool:
+        """Cancel a hold and return its quantity to stock."""
+        try:
+            query = {"_id": ObjectId(reservation_id), "buyerId": ObjectId(buyer_id)}
+        except Exception:
+            return False
+        
+        hold = get_db().reservations.find_one_and_delete(query)
+        if not hold:
+            return False
+        ReservationModel._restock(hold)
+        return True
+    
+    @staticmethod
+    def find_by_buyer(buyer_id: str) -> List[dict]:
+        """Active holds for a buyer."""
+        db = get_db()
+        holds = db.reservations.find(
+            {"buyerId": ObjectId(buyer_id), "expiresAt": {"$gt": datetime.utcnow()}},
+            sort=[("expiresAt", ASCENDING)]
+        )
+        return [ReservationModel._serialize(hold) for hold in holds]
+    
+    @staticmethod
+    def claim(buyer_oid: ObjectId, product_oids, session=None) -> dict:
+        """Delete a buyer's active holds on these products for an order.
+        
+        The caller becomes responsible for the claimed quantities: the
+        order deducts them from ``reserved`` along with the stock.
+        
+        Returns:
+            Dict of product ObjectId -> claimed hold document
+        """
+        db = get_db()
+        now = datetime.utcnow()
+        claimed = {}
+        for product_oid in product_oids:
+            hold = db.reservations.find_one_and_delete(
+                {"buyerId": buyer_oid, "productId": product_oid, "expiresAt": {"$gt": now}},
+                session=session
+            )
+            if hold:
+                claimed[product_oid] = hold
+        return claimed
+    
+    @staticmethod
+    def unclaim(holds) -> None:
+        """Put back holds claimed by an order that then failed (no transaction)."""
+        if holds:
+            get_db().reservations.insert_many(list(holds), ordered=False)
+    
+    @staticmethod
+    def sweep() -> int:
+        """Release every expired hold; returns how many were released."""
+        db = get_db()
+        now = datetime.utcnow()
+        released = 0
+        for expired in db.reservations.find({"expiresAt": {"$lte": now}}, {"_id": 1}):
+            if ReservationModel._release_doc(expired):
+                released += 1
+        return released
+    
+    @staticmethod
+    def _release_doc(hold: dict) -> bool:
+        """Delete a hold by ID and, if this call deleted it, restock it."""
+        deleted = get_db().reservations.find_one_and_delete({"_id": hold["_id"]})
+        if not deleted:
+            return False
+        ReservationModel._restock(deleted)
+        return True
+    
+    @staticmethod
+    def _restock(hold: dict) -> None:
+        db = get_db()
+        item = db.inventory.find_one_and_update(
+            {"_id": hold["productId"]},
+            {"$inc": {"reserved": -hold["quantity"]}},
+            projection={"qrCode": 1}
+        )
+        if item:
+            InventoryModel.mark_changed([item["qrCode"]])
+    
+    @staticmethod
+    def repair_reserved() -> int:
+        """Recompute every item's ``reserved`` counter from its holds.
+        
+        Each item is re-checked right before it is corrected, and only
+        changed if its counter still disagrees, so running this while the
+        app serves traffic is safe in practice.
+        
+        Returns:
+            Number of items corrected
+        """
+        db = get_db()
+        
+        def held_by_product(match: dict) -> dict:
+            return {
+                doc["_id"]: doc["quantity"]
+                for doc in db.reservations.aggregate([
+                    {"$match": match},
+                    {"$group": {"_id": "$productId", "quantity": {"$sum": "$quantity"}}}
+                ])
+            }
+        
+        held = held_by_product({})
+        drifted = [
+            item for item in db.inventory.find(
+                {"$or": [{"_id": {"$in": list(held)}}, {"reserved": {"$nin": [0, None]}}]},
+                {"reserved": 1}
+            )
+            if item.get("reserved", 0) != held.get(item["_id"], 0)
+        ]
+        
+        repaired = 0
+        for item in drifted:
+            expected = held_by_product({"productId": item["_id"]}).get(item["_id"], 0)
+            result = db.inventory.update_one(
+                {"_id": item["_id"], "reserved": item.get("reserved")},
+                {"$set": {"reserved": expected}}
+            )
+            repaired += result.modified_count
+        return repaired
+    
+    @staticmethod
+    def _adjust_reserved(product_oid: ObjectId, delta: int, held: int = 0, session=None) -> str:
+        """Move ``delta`` units between available and reserved stock.
+        
+        ``held`` is what the buyer already holds, for the error message.
+        The caller marks the item changed (after any transaction commits).
+        
+        Returns:
+            The item's QR code
+        
+        Raises:
+            ValueError: If the product is unknown or too little is available
+        """
+        db = get_db()
+        query = {"_id": product_oid}
+        if delta > 0:
+            query["$expr"] = {
+                "$gte": [{"$subtract": ["$quantity", {"$ifNull": ["$reserved", 0]}]}, delta]
+            }
+        item = db.inventory.find_one_and_update(
+            query,
+            {"$inc": {"reserved": delta}},
+            projection={"qrCode": 1},
+            session=session
+        )
+        if not item:
+            product = db.inventory.find_one(
+                {"_id": product_oid}, {"name": 1, "quantity": 1, "reserved": 1}, session=session
+            )
+            if not product:
+                raise ValueError(f"Product not found: {product_oid}")
+            raise ValueError(
+                f"Insufficient stock for {product['name']}. "
+                f"Available: {InventoryModel.available(product) + held}, Requested: {held + delta}"
+            )
+        return item["qrCode"]
+    
+    @staticmethod
+    def _serialize(hold: dict) -> dict:
+        return {
+            "id": str(hold["_id"]),
+            "productId": str(hold["productId"]),
+            "quantity": hold["quantity"],
+            "expiresAt": hold["expiresAt"]
+        }
+
+
+class ReservationSweeper:
+    """Background thread returning expired holds to stock, one per process."""
+    
+    def __init__(self, interval: float | None = None):
+        self.interval = interval or Config.RESERVATION_SWEEP_SECONDS
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def start(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+        thread = threading.Thread(target=self._run, name="reservation-sweeper", daemon=True)
+        thread.start()
+    
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                ReservationModel.sweep()
+            except Exception:
+                # Try again next interval
+                pass
+
+
+reservation_sweeper = ReservationSweeper()
@@ -0,0 +1,138 @@
+"""Low-stock threshold model and database operations."""
+from datetime import datetime
+from typing import List, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+from app.cache import TTLCache, MISSING
+from app.config import Config
+from app.db import get_db
+
+# "all" -> {"item": {item_id: threshold}, "category": {name: threshold}}
+_threshold_cache = TTLCache(
+    "stock_thresholds",
+    max_size=1,
+    ttl=Config.THRESHOLD_CACHE_TTL_SECONDS
+)
+
+
+class ThresholdModel:
+    """Per-item and per-category low-stock thresholds.
+    
+    An item's threshold is its own override if set, else its category's,
+    else ``DEFAULT_THRESHOLD``. Stock below the threshold is "low" and
+    zero stock is "out". Alerts, the ``lowStock`` item flag and the
+    ``lowStock`` search filter all classify items this way.
+    """
+    
+    COLLECTION = "stock_thresholds"
+    
+    # Indexes backing every query below (created by migrate.py)
+    INDEXES = [
+        IndexModel([("scope", ASCENDING), ("key", ASCENDING)], unique=True),
+    ]
+    
+    SCOPES = ["item", "category"]
+    
+    DEFAULT_THRESHOLD = 10
+    
+    @staticmethod
+    def set(scope: str, key: str, threshold: int) -> dict:
+        """Create or replace the threshold for an item ID or category name."""
+        if scope not in ThresholdModel.SCOPES:
+            raise ValueError(f"Invalid scope. Must be one of: {ThresholdModel.SCOPES}")
+        if not key:
+            raise ValueError("key is required")
+        if scope == "item" and not ObjectId.is_valid(key):
+            raise ValueError("key must be a valid item ID")
+        if threshold < 0:
+            raise ValueError("Threshold cannot be negative")
+        
+        db = get_db()
+        db.stock_thresholds.update_one(
+            {"scope": scope, "key": key},
+            {"$set": {"threshold": threshold, "updatedAt": datetime.utcnow()}},
+            upsert=True
+        )
+        _threshold_cache.clear()
+        return {"scope": scope, "key": key, "threshold": threshold}
+    
+    @staticmethod
+    def remove(scope: str, key: str) -> bool:
+        """Remove a threshold override."""
+        db = get_db()
+        result = db.stock_thresholds.delete_one({"scope": scope, "key": key})
+        _threshold_cache.clear()
+        return result.deleted_count > 0
+    
+    @staticmethod
+    def find_all() -> List[dict]:
+        """List every threshold override."""
+        db = get_db()
+        return [
+            {"scope": doc["scope"], "key": doc["key"], "threshold": doc["threshold"]}
+            for doc in db.stock_thresholds.find({}, sort=[("scope", ASCENDING), ("key", ASCENDING)])
+        ]
+    
+    @staticmethod
+    def threshold_for(item_id: str, category: Optional[str]) -> int:
+        """Effective threshold for an item (cached per worker)."""
+        overrides = ThresholdModel._overrides()
+        if item_id in overrides["item"]:
+            return overrides["item"][item_id]
+        return overrides["category"].get(category, ThresholdModel.DEFAULT_THRESHOLD)
+    
+    @staticmethod
+    def level(quantity: int, threshold: int) -> str:
+        """Classify stock as "out", "low" or "ok"."""
+        if quantity <= 0:
+            return "out"
+        if quantity < threshold:
+            return "low"
+        return "ok"
+    
+    @staticmethod
+    def is_low(item: dict) -> bool:
+        """Whether an inventory document is "low" or "out" (needs quantity and category)."""
+        threshold = ThresholdModel.threshold_for(str(item["_id"]), item.get("category"))
+        return ThresholdModel.level(item["quantity"], threshold) != "ok"
+    
+    @staticmethod
+    def low_stock_filter() -> dict:
+        """MongoDB filter for the items :meth:`is_low` accepts.
+        
+        One clause per override plus one for the default threshold, each
+        a quantity range the ``{quantity, _id}`` index can serve.
+        """
+        overrides = ThresholdModel._overrides()
+        item_ids = [ObjectId(key) for key in overrides["item"]]
+        categories = list(overrides["category"])
+        
+        # "out" (quantity <= 0) counts as low even with a threshold of 0
+        clauses = [
+            {"_id": ObjectId(key), "quantity": {"$lt": max(threshold, 1)}}
+            for key, threshold in overrides["item"].items()
+        ]
+        for category, threshold in overrides["category"].items():
+            clause = {"category": category, "quantity": {"$lt": max(threshold, 1)}}
+            if item_ids:
+                clause["_id"] = {"$nin": item_ids}
+            clauses.append(clause)
+        
+        default = {"quantity": {"$lt": max(ThresholdModel.DEFAULT_THRESHOLD, 1)}}
+        if categories:
+            default["category"] = {"$nin": categories}
+        if item_ids:
+            default["_id"] = {"$nin": item_ids}
+        clauses.append(default)
+        
+        return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+    
+    @staticmethod
+    def _overrides() -> dict:
+        overrides = _threshold_cache.get("all")
+        if overrides is MISSING:
+            overrides = {"item": {}, "category": {}}
+            for doc in get_db().stock_thresholds.find({}, {"scope": 1, "key": 1, "threshold": 1}):
+                overrides[doc["scope"]][doc["key"]] = doc["threshold"]
+            _threshold_cache.set("all", overrides)
+        return overrides
@@ -2,15 +2,41 @@
 from datetime import datetime
 from typing import Optional
 from bson import ObjectId
-import bcrypt
+from pymongo import ASCENDING, IndexModel
+from app.cache import TTLCache, MISSING
+from app.config import Config
 from app.db import get_db
+from app.passwords import HasherOverloaded, check_password, hash_password, needs_rehash
+
+# user_id -> {id, name, email, role}, used by jwt_required
+_identity_cache = TTLCache(
+    "users",
+    max_size=Config.USER_CACHE_MAX_SIZE,
+    ttl=Config.USER_CACHE_TTL_SECONDS
+)
 
 
 class UserModel:
     """User model for authentication and authorization."""
     
+    COLLECTION = "users"
+    
+    # Indexes backing every query below (created by migrate.py)
+    INDEXES = [
+        IndexModel([("email", ASCENDING)], unique=True),
+    ]
+    
+    # Representative query shapes, checked by explain_queries.py
+    QUERY_SHAPES = {
+        "by_email": {"filter": {"email": "sample@example.com"}},
+        "by_id": {"filter": {"_id": ObjectId()}},
+        "by_ids": {"filter": {"_id": {"$in": [ObjectId(), ObjectId()]}}},
+    }
+    
     ROLES = ["owner", "buyer"]
     
+    IDENTITY_PROJECTION = {"name": 1, "email": 1, "role": 1}
+    
     @staticmethod
     def create(name: str, email: str, password: str, role: str) -> dict:
         """Create a new user with hashed password."""
@@ -19,11 +45,8 @@ class UserModel:
         
         db = get_db()
         
-        # Hash password
-        password_hash = bcrypt.hashpw(
-            password.encode("utf-8"), 
-            bcrypt.gensalt()
-        ).decode("utf-8")
+        # Hash password (may raise HasherOverloaded)
+        password_hash = hash_password(password)
         
         user_doc = {
             "name": name,
@@ -55,13 +78,72 @@ class UserModel:
         except Exception:
             return None
     
+    @staticmethod
+    def find_identity(user_id: str) -> Optional[dict]:
+        """Get the ``{id, name, email, role}`` identity of a user.
+        
+        Served from a bounded per-process TTL cache, so authenticated
+        requests normally skip the database entirely. No code path changes
+        a user's role, so the TTL (``USER_CACHE_TTL_SECONDS``) is what
+        bounds how long a change made in the database goes unnoticed.
+        """
+        identity = _identity_cache.get(user_id)
+        if identity is not MISSING:
+            return identity
+        
+        db = get_db()
+        try:
+            user = db.users.find_one(
+                {"_id": ObjectId(user_id)},
+                UserModel.IDENTITY_PROJECTION
+            )
+        except Exception:
+            return None
+        if not user:
+            return None
+        
+        identity = {
+            "id": str(user["_id"]),
+            "name": user["name"],
+            "email": user["email"],
+            "role": user["role"]
+        }
+        _identity_cache.set(user_id, identity)
+        return identity
+    
+    @staticmethod
+    def invalidate_identity(user_id: str) -> None:
+        """Drop a cached identity (this worker only). Call after changing a user."""
+        _identity_cache.invalidate(user_id)
+    
+    @staticmethod
+    def identity_cache_stats() -> dict:
+        """Hit/miss counters of the identity cache."""
+        return _identity_cache.stats()
+    
     @staticmethod
     def verify_password(user: dict, password: str) -> bool:
-        """Verify a password against the stored hash."""
-        return bcrypt.checkpw(
-            password.encode("utf-8"),
-            user["passwordHash"].encode("utf-8")
-        )
+        """Verify a password against the stored hash.
+        
+        On success, a hash made with an outdated bcrypt cost is
+        transparently replaced with one using Config.BCRYPT_ROUNDS. If
+        the hashing pool is full the upgrade waits for a later login.
+        May raise HasherOverloaded (from the check itself).
+        """
+        if not check_password(password, user["passwordHash"]):
+            return False
+        
+        if needs_rehash(user["passwordHash"]):
+            try:
+                new_hash = hash_password(password)
+            except HasherOverloaded:
+                return True
+            db = get_db()
+            db.users.update_one(
+                {"_id": user["_id"], "passwordHash": user["passwordHash"]},
+                {"$set": {"passwordHash": new_hash}}
+            )
+        return True
     
     @staticmethod
     def _serialize(user: dict) -> dict:
@@ -71,5 +153,5 @@ class UserModel:
             "name": user["name"],
             "email": user["email"],
             "role": user["role"],
-            "createdAt": user["createdAt"].isoformat()
+            "createdAt": user["createdAt"]
         }
@@ -0,0 +1,67 @@
+"""Keyset (cursor) pagination helpers.
+
+Cursors are opaque, URL-safe tokens encoding the sort key of the last
+document on a page. The next page is fetched with a range query on the
+same compound ``{<field>, _id}`` index instead of ``skip()``, so every
+page costs the same regardless of how deep the client has paged.
+"""
+import base64
+from typing import Any
+from bson import json_util
+
+
+def encode_cursor(field: str, value: Any, doc_id) -> str:
+    """Encode the ``(field value, _id)`` sort key of a document as a cursor."""
+    raw = json_util.dumps([field, value, doc_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode(cursor: str) -> tuple[str, Any, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_field, value, doc_id = json_util.loads(
+            base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        )
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return cursor_field, value, doc_id
+
+
+def cursor_field(cursor: str) -> str:
+    """The sort field a cursor was issued for.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    return _decode(cursor)[0]
+
+
+def decode_cursor(cursor: str, field: str) -> tuple[Any, Any]:
+    """Decode a cursor produced by :func:`encode_cursor` for ``field``.
+    
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another sort
+    """
+    issued_for, value, doc_id = _decode(cursor)
+    if issued_for != field:
+        raise ValueError("Cursor does not match the requested sort")
+    return value, doc_id
+
+
+def keyset_filter(cursor: str | None, field: str = "createdAt", direction: int = -1) -> dict:
+    """Build the range filter for the page after ``cursor``.
+    
+    Matches a ``{field: direction, _id: direction}`` sort, so the query is
+    answered by walking the compound index from the cursor position.
+    """
+    if not cursor:
+        return {}
+    
+    value, doc_id = decode_cursor(cursor, field)
+    op = "$lt" if direction < 0 else "$gt"
+    return {
+        "$or": [
+            {field: {op: value}},
+            {field: value, "_id": {op: doc_id}}
+        ]
+    }
@@ -0,0 +1,90 @@
+"""Password hashing on a bounded thread pool.
+
+bcrypt releases the GIL while hashing, so running it on a small pool lets
+a threaded worker keep serving other requests during a login burst. The
+number of hashes in flight plus queued is capped; past that, callers get
+``HasherOverloaded`` so the route can shed load with a 503 instead of
+queueing requests until gunicorn times them out.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from app.config import Config
+
+
+class HasherOverloaded(Exception):
+    """Raised when the hashing queue is full."""
+
+
+_executor: ThreadPoolExecutor | None = None
+_slots: threading.BoundedSemaphore | None = None
+_pid: int | None = None
+_init_lock = threading.Lock()
+
+
+def hash_password(password: str) -> str:
+    """Hash a password with the configured bcrypt cost."""
+    hashed = _run(bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(Config.BCRYPT_ROUNDS))
+    return hashed.decode("utf-8")
+
+
+def check_password(password: str, password_hash: str) -> bool:
+    """Verify a password against a stored bcrypt hash."""
+    return _run(bcrypt.checkpw, password.encode("utf-8"), password_hash.encode("utf-8"))
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """Whether a hash was made with a different cost than configured."""
+    try:
+        return int(password_hash.split("$")[2]) != Config.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def _run(fn, *args):
+    """Run ``fn`` on the hashing pool, or raise HasherOverloaded if full."""
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise HasherOverloaded("Too many concurrent password operations")
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future.result()
+
+
+def _get_pool() -> tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    """Create the pool lazily, once per process (threads do not survive fork)."""
+    global _executor, _slots, _pid
+    if _pid != os.getpid():
+        with _init_lock:
+            if _pid != os.getpid():
+                _executor = _make_executor()
+                _slots = threading.BoundedSemaphore(
+                    Config.BCRYPT_THREADS + Config.BCRYPT_MAX_QUEUE
+                )
+                _pid = os.getpid()
+    return _executor, _slots
+
+
+def _make_executor():
+    """Thread pool running on real OS threads, even under gevent.
+    
+    With gevent's monkey patching a plain ThreadPoolExecutor would run
+    bcrypt on greenlets and block the whole worker, so gevent's native
+    thread pool is used instead.
+    """
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched("threading"):
+            from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+            return NativeThreadPoolExecutor(max_workers=Config.BCRYPT_THREADS)
+    except ImportError:
+        pass
+    return ThreadPoolExecutor(
+        max_workers=Config.BCRYPT_THREADS,
+        thread_name_prefix="bcrypt"
+    )
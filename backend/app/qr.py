@@ -0,0 +1,102 @@
+"""QR code image rendering with caching.
+
+An item's ``qrCode`` never changes, so a rendered image is valid forever.
+Images are kept in a per-worker LRU cache and, when ``QR_IMAGE_CACHE_DIR``
+is set, in a shared on-disk store that survives restarts and is visible
+to every worker.
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+import qrcode
+import qrcode.image.svg
+from app.cache import TTLCache, MISSING
+from app.config import Config
+
+FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+_image_cache = TTLCache("qr_images", max_size=Config.QR_IMAGE_CACHE_SIZE)
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def render_qr(qr_code: str, fmt: str = "png", box_size: int = 10) -> bytes:
+    """Return the encoded QR image for ``qr_code``, rendering it at most once."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format. Must be one of: {list(FORMATS)}")
+    
+    key = (qr_code, fmt, box_size)
+    data = _image_cache.get(key)
+    if data is not MISSING:
+        return data
+    
+    path = _disk_path(qr_code, fmt, box_size)
+    data = _read_disk(path) if path else None
+    if data is None:
+        data = _render(qr_code, fmt, box_size)
+        if path:
+            _write_disk(path, data)
+    
+    _image_cache.set(key, data)
+    return data
+
+
+def qr_etag(qr_code: str, fmt: str, box_size: int) -> str:
+    """Strong ETag for a rendered image (derived from its immutable inputs)."""
+    return hashlib.sha1(f"{qr_code}:{fmt}:{box_size}".encode("utf-8")).hexdigest()
+
+
+def _render(qr_code: str, fmt: str, box_size: int) -> bytes:
+    """Build the QR matrix and encode it."""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=box_size,
+        border=4,
+    )
+    qr.add_data(qr_code)
+    qr.make(fit=True)
+    
+    buffer = io.BytesIO()
+    if fmt == "svg":
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+        img.save(buffer)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _disk_path(qr_code: str, fmt: str, box_size: int) -> str | None:
+    """Location of the on-disk copy, or None if the disk store is disabled."""
+    if not Config.QR_IMAGE_CACHE_DIR:
+        return None
+    name = f"{_SAFE_NAME.sub('_', qr_code)}-{box_size}.{fmt}"
+    return os.path.join(Config.QR_IMAGE_CACHE_DIR, name)
+
+
+def _read_disk(path: str) -> bytes | None:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_disk(path: str, data: bytes) -> None:
+    """Write atomically so concurrent workers never see a partial file."""
+    try:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        # The disk store is an optimization; never fail the request over it
+        pass
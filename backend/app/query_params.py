@@ -0,0 +1,76 @@
+"""Parsing helpers for list/export query-string filters."""
+from datetime import datetime, timezone
+
+
+def parse_datetime(value: str, name: str) -> datetime:
+    """Parse an ISO 8601 date or datetime into naive UTC.
+    
+    Raises:
+        ValueError: If the value is not a valid ISO date
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 date")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_date_range(args, field: str = "createdAt") -> dict:
+    """Build a MongoDB range filter on ``field`` from ``from``/``to`` args.
+    
+    ``from`` is inclusive and ``to`` is exclusive. Returns an empty dict
+    when neither is given.
+    """
+    bounds = {}
+    if args.get("from"):
+        bounds["$gte"] = parse_datetime(args["from"], "from")
+    if args.get("to"):
+        bounds["$lt"] = parse_datetime(args["to"], "to")
+    return {field: bounds} if bounds else {}
+
+
+def parse_number(args, name: str, cast=float):
+    """Parse an optional numeric query parameter (None if absent).
+    
+    Raises:
+        ValueError: If the value is not a valid number
+    """
+    if args.get(name) in (None, ""):
+        return None
+    try:
+        return cast(args[name])
+    except ValueError:
+        kind = "integer" if cast is int else "number"
+        raise ValueError(f"{name} must be a valid {kind}")
+
+
+def parse_inventory_search(args) -> dict:
+    """Map inventory search query parameters to build_search_query kwargs.
+    
+    Raises:
+        ValueError: If a numeric parameter is invalid
+    """
+    return {
+        "category": args.get("category") or None,
+        "min_price": parse_number(args, "minPrice"),
+        "max_price": parse_number(args, "maxPrice"),
+        "min_quantity": parse_number(args, "minQuantity", int),
+        "max_quantity": parse_number(args, "maxQuantity", int),
+        "low_stock": args.get("lowStock", "false").lower() == "true",
+        "prefix": args.get("prefix") or None,
+        "text": args.get("q") or None
+    }
+
+
+def parse_sort(args, default: str = "createdAt") -> tuple[str, int]:
+    """Parse ``sort`` and ``order`` (asc/desc) query parameters.
+    
+    Raises:
+        ValueError: If order is not asc or desc
+    """
+    order = args.get("order", "desc").lower()
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+    return args.get("sort", default), 1 if order == "asc" else -1
@@ -2,5 +2,8 @@
 from app.routes.auth import auth_bp
 from app.routes.inventory import inventory_bp
 from app.routes.orders import orders_bp
+from app.routes.analytics import analytics_bp
+from app.routes.alerts import alerts_bp
+from app.routes.reservations import reservations_bp
 
-__all__ = ["auth_bp", "inventory_bp", "orders_bp"]
+__all__ = ["auth_bp", "inventory_bp", "orders_bp", "analytics_bp", "alerts_bp", "reservations_bp"]
@@ -0,0 +1,82 @@
+"""Low-stock alert routes."""
+from flask import Blueprint, request, jsonify
+from app.alerts import alert_hub, low_stock_watcher
+from app.events import HubFull
+from app.models.threshold import ThresholdModel
+from app.middleware.auth import jwt_required, owner_required
+from app.streaming import busy_response, stream_sse, streams_supported, streams_unavailable_response
+
+alerts_bp = Blueprint("alerts", __name__, url_prefix="/alerts")
+
+
+@alerts_bp.route("/stream", methods=["GET"])
+@jwt_required
+@owner_required
+def stream_alerts():
+    """Server-sent event stream of stock level changes. Owner only.
+    
+    Events are named ``low_stock``, ``out_of_stock`` or ``restocked`` and
+    carry the item's id, name, category, quantity, threshold, level and
+    previousLevel.
+    """
+    if not streams_supported():
+        return streams_unavailable_response()
+    low_stock_watcher.start()
+    try:
+        subscription = alert_hub.subscribe()
+    except HubFull:
+        return busy_response()
+    return stream_sse(subscription)
+
+
+@alerts_bp.route("/thresholds", methods=["GET"])
+@jwt_required
+@owner_required
+def get_thresholds():
+    """List per-item and per-category threshold overrides. Owner only."""
+    return jsonify({
+        "defaultThreshold": ThresholdModel.DEFAULT_THRESHOLD,
+        "thresholds": ThresholdModel.find_all()
+    }), 200
+
+
+@alerts_bp.route("/thresholds", methods=["PUT"])
+@jwt_required
+@owner_required
+def set_threshold():
+    """Set a low-stock threshold. Owner only.
+    
+    Request body:
+        {"scope": "item" | "category", "key": "<item id or category>", "threshold": 5}
+    """
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({"error": "Request body is required"}), 400
+    
+    try:
+        threshold = int(data.get("threshold"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "threshold must be a valid integer"}), 400
+    
+    try:
+        result = ThresholdModel.set(
+            str(data.get("scope", "")),
+            str(data.get("key", "")).strip(),
+            threshold
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({"message": "Threshold saved", "threshold": result}), 200
+
+
+@alerts_bp.route("/thresholds/<scope>/<path:key>", methods=["DELETE"])
+@jwt_required
+@owner_required
+def delete_threshold(scope, key):
+    """Remove a threshold override. Owner only."""
+    if not ThresholdModel.remove(scope, key):
+        return jsonify({"error": "Threshold not found"}), 404
+    
+    return jsonify({"message": "Threshold removed"}), 200
@@ -0,0 +1,94 @@
+"""Sales analytics routes for the owner dashboard."""
+from flask import Blueprint, request, jsonify
+from app.models.analytics import AnalyticsModel
+from app.middleware.auth import jwt_required, owner_required
+from app.query_params import parse_datetime, parse_number
+
+analytics_bp = Blueprint("analytics", __name__, url_prefix="/analytics")
+
+MAX_LIMIT = 100
+
+
+def _date_bounds():
+    """Read the optional ``from`` (inclusive) and ``to`` (exclusive) dates."""
+    args = request.args
+    date_from = parse_datetime(args["from"], "from") if args.get("from") else None
+    date_to = parse_datetime(args["to"], "to") if args.get("to") else None
+    return date_from, date_to
+
+
+def _limit() -> int:
+    limit = parse_number(request.args, "limit", int) or 10
+    return max(1, min(limit, MAX_LIMIT))
+
+
+@analytics_bp.route("/revenue", methods=["GET"])
+@jwt_required
+@owner_required
+def revenue():
+    """Revenue, order count and units sold per day. Owner only.
+    
+    Query params:
+        from, to: Optional ISO dates (from inclusive, to exclusive)
+    """
+    try:
+        days = AnalyticsModel.revenue_by_day(*_date_bounds())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "days": days,
+        "totalRevenue": sum(day["revenue"] for day in days),
+        "totalOrders": sum(day["orders"] for day in days)
+    }), 200
+
+
+@analytics_bp.route("/top-products", methods=["GET"])
+@jwt_required
+@owner_required
+def top_products():
+    """Best-selling products. Owner only.
+    
+    Query params:
+        from, to: Optional ISO dates
+        by: revenue (default) or units
+        limit: Number of products (default 10, max 100)
+    """
+    try:
+        date_from, date_to = _date_bounds()
+        products = AnalyticsModel.top_products(
+            date_from,
+            date_to,
+            limit=_limit(),
+            by=request.args.get("by", "revenue")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({"products": products}), 200
+
+
+@analytics_bp.route("/categories", methods=["GET"])
+@jwt_required
+@owner_required
+def categories():
+    """Units sold and revenue per category. Owner only."""
+    try:
+        results = AnalyticsModel.sales_by_category(*_date_bounds())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({"categories": results}), 200
+
+
+@analytics_bp.route("/buyers", methods=["GET"])
+@jwt_required
+@owner_required
+def buyers():
+    """Buyers ranked by lifetime value. Owner only."""
+    try:
+        results = AnalyticsModel.top_buyers(limit=_limit())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({"buyers": results}), 200
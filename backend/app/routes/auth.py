@@ -6,6 +6,7 @@ from email_validator import validate_email, EmailNotValidError
 from pymongo.errors import DuplicateKeyError
 from app.config import Config
 from app.models.user import UserModel
+from app.passwords import HasherOverloaded
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
@@ -65,6 +66,8 @@ def register():
         
     except DuplicateKeyError:
         return jsonify({"error": "Email already registered"}), 409
+    except HasherOverloaded:
+        return _overloaded_response()
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -87,8 +90,11 @@ def login():
         return jsonify({"error": "Invalid email or password"}), 401
     
     # Verify password
-    if not UserModel.verify_password(user, password):
-        return jsonify({"error": "Invalid email or password"}), 401
+    try:
+        if not UserModel.verify_password(user, password):
+            return jsonify({"error": "Invalid email or password"}), 401
+    except HasherOverloaded:
+        return _overloaded_response()
     
     # Generate JWT token
     token = _generate_token(str(user["_id"]))
@@ -116,3 +122,11 @@ def _generate_token(user_id: str) -> str:
         "iat": datetime.utcnow()
     }
     return jwt.encode(payload, Config.JWT_SECRET_KEY, algorithm="HS256")
+
+
+def _overloaded_response():
+    """503 returned when the password hashing queue is full."""
+    response = jsonify({"error": "Server is busy. Please try again shortly."})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
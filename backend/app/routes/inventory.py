@@ -1,31 +1,245 @@
 """Inventory routes with role-based access control."""
-import io
 import base64
-from flask import Blueprint, request, jsonify, g
-import qrcode
+import io
+import os
+import tempfile
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, request, jsonify, g, send_file
+from app.config import Config
+from app.events import HubFull, public_stock_hub, stock_feed, stock_hub
+from app.conditional import make_etag, not_modified, with_validators
+from app.models.counter import CounterModel
+from app.models.deletion import DeletionLogModel
 from app.models.inventory import InventoryModel
-from app.middleware.auth import jwt_required, owner_required
-from app.middleware.rate_limit import rate_limit
+from app.middleware.auth import jwt_optional, jwt_required, owner_required
+from app.middleware.rate_limit import public_rate_limiter, rate_limit, user_rate_limiter
+from app.importer import IMPORT_FORMATS, import_items
+from app.labels import SHEET_FORMATS, build_label_sheet
+from app.pagination import cursor_field
+from app.qr import FORMATS as QR_FORMATS, render_qr, qr_etag
+from app.query_params import parse_date_range, parse_datetime, parse_inventory_search, parse_number, parse_sort
+from app.streaming import (
+    busy_response, stream_csv, stream_json_list, stream_ndjson, stream_ndjson_gzip, stream_sse,
+    streams_supported, streams_unavailable_response, wants_ndjson
+)
 
 inventory_bp = Blueprint("inventory", __name__, url_prefix="/items")
 
+# Query parameters that switch GET /items to a paginated search
+SEARCH_PARAMS = (
+    "category", "minPrice", "maxPrice", "minQuantity", "maxQuantity",
+    "lowStock", "prefix", "q", "sort", "order", "limit", "cursor"
+)
+
+# Most item IDs one stock stream may follow
+MAX_STREAM_IDS = 500
+
 
 @inventory_bp.route("", methods=["GET"])
 @jwt_required
+@rate_limit(user_rate_limiter)
 def get_all_items():
-    """Get all inventory items. Accessible by both Owner and Buyer."""
-    items = InventoryModel.find_all()
-    return jsonify({"items": items}), 200
+    """Get inventory items. Accessible by both Owner and Buyer.
+    
+    Query parameters:
+        category: Exact category
+        minPrice, maxPrice: Inclusive price range
+        minQuantity, maxQuantity: Inclusive stock range
+        lowStock: ``true`` for items below the low-stock threshold
+        prefix: Case-insensitive name prefix
+        q: Full-text search over name and category
+        sort: createdAt (default), updatedAt, name, price or quantity
+        order: ``desc`` (default) or ``asc``
+        limit: Page size
+        cursor: Cursor returned as ``nextCursor`` by the previous page
+        format: ``ndjson`` to stream one item per line
+    
+    Any search or paging parameter returns one page as
+    ``{"items": [...], "nextCursor": ...}``. Without them the full catalog
+    is streamed as ``{"items": [...]}`` straight from the database cursor.
+    
+    Responses carry an ETag derived from the inventory version counter;
+    ``If-None-Match`` with the current one returns 304 after a single
+    lookup, without querying or serializing any item.
+    """
+    # Read the version before the data, so a racing write can only make
+    # the ETag older than the body, never newer
+    version, changed_at = CounterModel.get(InventoryModel.COLLECTION)
+    etag = make_etag(InventoryModel.COLLECTION, version, request.full_path, wants_ndjson(request))
+    cached = not_modified(etag, changed_at)
+    if cached:
+        return cached
+    
+    if any(param in request.args for param in SEARCH_PARAMS):
+        try:
+            limit = int(request.args.get("limit", Config.ITEMS_PAGE_SIZE))
+        except ValueError:
+            return jsonify({"error": "Limit must be a valid integer"}), 400
+        if limit < 1:
+            return jsonify({"error": "Limit must be greater than 0"}), 400
+        limit = min(limit, Config.ITEMS_MAX_PAGE_SIZE)
+        
+        try:
+            query = InventoryModel.build_search_query(**parse_inventory_search(request.args))
+            sort, direction = parse_sort(request.args)
+            items, next_cursor = InventoryModel.find_page(
+                limit,
+                request.args.get("cursor"),
+                query=query,
+                sort=sort,
+                direction=direction
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        response = jsonify({"items": items, "nextCursor": next_cursor})
+    elif wants_ndjson(request):
+        response = stream_ndjson(InventoryModel.iter_all())
+    else:
+        response = stream_json_list("items", InventoryModel.iter_all())
+    
+    return with_validators(response, etag, changed_at)
+
+
+EXPORT_FIELDS = [
+    "id", "name", "category", "quantity", "price", "qrCode",
+    "createdBy", "createdAt", "updatedAt", "lowStock"
+]
+
+
+@inventory_bp.route("/export", methods=["GET"])
+@jwt_required
+@owner_required
+def export_items():
+    """Stream the inventory as CSV or NDJSON. Owner only.
+    
+    Query parameters:
+        format: ``csv`` (default) or ``ndjson``
+        category: Only items in this category
+        from, to: createdAt range (ISO 8601, ``to`` exclusive)
+    """
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "Format must be csv or ndjson"}), 400
+    
+    try:
+        query = parse_date_range(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if request.args.get("category"):
+        query["category"] = request.args["category"]
+    
+    items = InventoryModel.iter_all(query, batch_size=Config.EXPORT_BATCH_SIZE)
+    if fmt == "ndjson":
+        return stream_ndjson(items)
+    return stream_csv(EXPORT_FIELDS, items, filename="inventory.csv")
+
+
+@inventory_bp.route("/sync/snapshot", methods=["GET"])
+@jwt_required
+@rate_limit(user_rate_limiter)
+def sync_snapshot():
+    """Full catalog for offline scanners as a gzip NDJSON download.
+    
+    One ``{"qrCode", "id", "name", "price", "quantity"}`` object per line.
+    The ``X-Sync-Watermark`` header is the ``since`` to pass to
+    ``/items/sync/changes`` next time the device is online.
+    """
+    watermark = datetime.utcnow()
+    response = stream_ndjson_gzip(InventoryModel.iter_sync_snapshot(), "catalog.ndjson.gz")
+    response.headers["X-Sync-Watermark"] = watermark.isoformat()
+    return response
+
+
+@inventory_bp.route("/sync/changes", methods=["GET"])
+@jwt_required
+@rate_limit(user_rate_limiter)
+def sync_changes():
+    """Items changed and deleted since a watermark, for offline scanners.
+    
+    Query parameters:
+        since: Watermark from the snapshot or the previous sync (required)
+        cursor: ``cursor`` from the previous page of this sync
+        limit: Page size
+    
+    Pages return ``{"items": [...], "deleted": [...], "cursor": ...,
+    "hasMore": true}`` with at most ``limit`` entries between them: changed
+    items first, then tombstones of deleted items. The last page has no
+    cursor and returns the ``watermark`` for the next sync. Changes close to
+    the watermark may be sent twice, so clients apply them as upserts. A
+    watermark older than the tombstone retention answers 410 and the client
+    must take a new snapshot.
+    """
+    started = datetime.utcnow()
+    if not request.args.get("since"):
+        return jsonify({"error": "since is required"}), 400
+    
+    try:
+        since = parse_datetime(request.args["since"], "since")
+        limit = parse_number(request.args, "limit", int) or Config.SYNC_PAGE_SIZE
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = max(1, min(limit, Config.SYNC_MAX_PAGE_SIZE))
+    
+    if since < started - timedelta(days=Config.SYNC_TOMBSTONE_DAYS):
+        return jsonify({
+            "error": "Watermark is too old, download a new snapshot",
+            "resetRequired": True
+        }), 410
+    
+    # Re-read a short window so writes in flight at the last sync are not missed
+    since -= timedelta(seconds=Config.SYNC_OVERLAP_SECONDS)
+    
+    cursor = request.args.get("cursor")
+    items, deleted = [], []
+    try:
+        # Tombstone cursors are issued once every changed item has been sent
+        in_tombstones = bool(cursor) and cursor_field(cursor) == "deletedAt"
+        if in_tombstones:
+            deleted, next_cursor = DeletionLogModel.find_since(since, limit, cursor)
+        else:
+            items, next_cursor = InventoryModel.find_changes(since, limit, cursor)
+            if not next_cursor and len(items) < limit:
+                deleted, next_cursor = DeletionLogModel.find_since(since, limit - len(items))
+            elif not next_cursor:
+                next_cursor = DeletionLogModel.first_cursor(since)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if next_cursor:
+        return jsonify({"items": items, "deleted": deleted, "cursor": next_cursor, "hasMore": True}), 200
+    
+    return jsonify({
+        "items": items,
+        "deleted": deleted,
+        "watermark": started,
+        "hasMore": False
+    }), 200
 
 
 @inventory_bp.route("/<item_id>", methods=["GET"])
 @jwt_required
 def get_item(item_id):
-    """Get a single inventory item by ID."""
+    """Get a single inventory item by ID.
+    
+    Supports ``If-None-Match`` (304 when unchanged). There is no
+    ``Last-Modified``: reservations change the item's available stock
+    without touching ``updatedAt``, so only the ETag covers them.
+    """
+    version = InventoryModel.find_version(item_id)
+    if not version:
+        return jsonify({"error": "Item not found"}), 404
+    
+    updated_at, reserved = version
+    etag = make_etag(item_id, updated_at.isoformat(), reserved)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
     item = InventoryModel.find_by_id(item_id)
     if not item:
         return jsonify({"error": "Item not found"}), 404
-    return jsonify({"item": item}), 200
+    return with_validators(jsonify({"item": item}), etag)
 
 
 @inventory_bp.route("/qr/<qr_token>", methods=["GET"])
@@ -51,7 +265,123 @@ def get_item_by_qr_public(qr_token):
     item = InventoryModel.find_by_qr_token_public(qr_token)
     if not item:
         return jsonify({"error": "Item not found"}), 404
-    return jsonify(item), 200
+    
+    # Let browsers and CDNs revalidate repeat scans cheaply
+    response = jsonify(item)
+    response.headers["Cache-Control"] = f"public, max-age={Config.QR_PUBLIC_MAX_AGE}"
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@inventory_bp.route("/qr/batch", methods=["POST"])
+@jwt_optional
+@rate_limit(
+    lambda: user_rate_limiter if "current_user" in g else public_rate_limiter,
+    cost=lambda: len(_batch_codes() or ()) or 1
+)
+def get_items_by_qr_batch():
+    """Resolve a basket of QR codes in one request.
+    
+    Anonymous callers get public fields (as ``/items/qr/<token>``);
+    authenticated callers get full items (as ``/items/lookup/<code>``).
+    Each code counts as one request against the caller's rate limit, so
+    anonymous batches larger than PUBLIC_RATE_LIMIT_PER_MINUTE codes are
+    refused with 429.
+    
+    Request body:
+        {"codes": ["INV-...", "INV-..."]}
+    
+    Response:
+        {"items": [{"code": "INV-...", "found": true, "item": {...}},
+                   {"code": "INV-...", "found": false}]}
+        in request order.
+    """
+    codes = _batch_codes()
+    if codes is None:
+        return jsonify({"error": "codes must be a non-empty list of QR code strings"}), 400
+    if len(codes) > Config.QR_BATCH_MAX_CODES:
+        return jsonify({"error": f"At most {Config.QR_BATCH_MAX_CODES} codes per request"}), 400
+    
+    found = InventoryModel.find_many_by_qr_code(codes, public="current_user" not in g)
+    
+    results = []
+    for code in codes:
+        item = found[code]
+        if item:
+            results.append({"code": code, "found": True, "item": item})
+        else:
+            results.append({"code": code, "found": False})
+    
+    return jsonify({"items": results}), 200
+
+
+def _batch_codes():
+    """The ``codes`` list from a batch lookup body, or None if malformed."""
+    data = request.get_json(silent=True) or {}
+    codes = data.get("codes")
+    if not isinstance(codes, list) or not codes:
+        return None
+    if not all(isinstance(code, str) and code for code in codes):
+        return None
+    return codes
+
+
+@inventory_bp.route("/stream", methods=["GET"])
+@jwt_required
+def stream_items():
+    """Server-sent event stream of live stock changes.
+    
+    Query params:
+        ids: Optional comma-separated item IDs to follow
+        category: Optional category to follow
+    
+    Each ``stock`` event carries id, name, category, quantity, price and
+    updatedAt, or ``{"id", "deleted": true}`` when an item is removed.
+    """
+    ids = {item_id for item_id in request.args.get("ids", "").split(",") if item_id}
+    category = request.args.get("category")
+    
+    if len(ids) > MAX_STREAM_IDS:
+        return jsonify({"error": f"At most {MAX_STREAM_IDS} ids per stream"}), 400
+    
+    def matches(event):
+        if ids and event["id"] not in ids:
+            return False
+        if category and not event.get("deleted") and event.get("category") != category:
+            return False
+        return True
+    
+    return _stock_stream(stock_hub, matches)
+
+
+@inventory_bp.route("/qr/<qr_token>/stream", methods=["GET"])
+@rate_limit()
+def stream_item_by_qr_public(qr_token):
+    """PUBLIC: Server-sent event stream of one item's stock and price.
+    
+    Lets a scanner keep the product it just scanned up to date without
+    polling ``/items/qr/<qr_token>``. Capped separately from the
+    authenticated streams (Config.PUBLIC_STREAM_MAX_SUBSCRIBERS).
+    """
+    if not streams_supported():
+        return streams_unavailable_response()
+    
+    item = InventoryModel.find_by_qr_token_public(qr_token)
+    if not item:
+        return jsonify({"error": "Item not found"}), 404
+    
+    return _stock_stream(public_stock_hub, lambda event: event["id"] == item["id"])
+
+
+def _stock_stream(hub, predicate):
+    if not streams_supported():
+        return streams_unavailable_response()
+    stock_feed.start()
+    try:
+        subscription = hub.subscribe(predicate)
+    except HubFull:
+        return busy_response()
+    return stream_sse(subscription)
 
 
 @inventory_bp.route("/lookup/<qr_code>", methods=["GET"])
@@ -74,41 +404,14 @@ def create_item():
     """Create a new inventory item. Owner only."""
     data = request.get_json()
     
-    # Validate required fields
-    required_fields = ["name", "category", "quantity", "price"]
-    for field in required_fields:
-        if field not in data:
-            return jsonify({"error": f"{field} is required"}), 400
-    
-    name = data["name"].strip()
-    category = data["category"].strip()
-    
-    # Validate and parse quantity
-    try:
-        quantity = int(data["quantity"])
-    except (ValueError, TypeError):
-        return jsonify({"error": "Quantity must be a valid integer"}), 400
-    
-    # Validate and parse price
     try:
-        price = float(data["price"])
-    except (ValueError, TypeError):
-        return jsonify({"error": "Price must be a valid number"}), 400
-    
-    # Validate name
-    if len(name) < 1:
-        return jsonify({"error": "Name cannot be empty"}), 400
-    
-    # Validate category
-    if len(category) < 1:
-        return jsonify({"error": "Category cannot be empty"}), 400
+        fields = InventoryModel.parse_item_fields(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
     try:
         item = InventoryModel.create(
-            name=name,
-            category=category,
-            quantity=quantity,
-            price=price,
+            **fields,
             created_by=g.current_user["id"]
         )
         return jsonify({
@@ -195,32 +498,165 @@ def delete_item(item_id):
 
 @inventory_bp.route("/<item_id>/qr-image", methods=["GET"])
 @jwt_required
+@rate_limit(user_rate_limiter)
 def get_qr_image(item_id):
-    """Generate and return QR code image as base64."""
-    item = InventoryModel.find_by_id(item_id)
-    if not item:
-        return jsonify({"error": "Item not found"}), 404
+    """Return the QR code image as a base64 data URL.
     
-    # Generate QR code
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(item["qrCode"])
-    qr.make(fit=True)
-    
-    # Create image
-    img = qr.make_image(fill_color="black", back_color="white")
+    Prefer ``/items/<id>/qr.png`` or ``/qr.svg``, which skip the base64 overhead.
+    """
+    qr_code = InventoryModel.find_qr_code(item_id)
+    if not qr_code:
+        return jsonify({"error": "Item not found"}), 404
     
-    # Convert to base64
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    img_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    img_base64 = base64.b64encode(render_qr(qr_code, "png")).decode("utf-8")
     
     return jsonify({
-        "qrCode": item["qrCode"],
+        "qrCode": qr_code,
         "qrImage": f"data:image/png;base64,{img_base64}"
     }), 200
+
+
+@inventory_bp.route("/<item_id>/qr.<fmt>", methods=["GET"])
+@jwt_required
+def get_qr_image_raw(item_id, fmt):
+    """Return the QR code as a binary PNG or SVG image.
+    
+    Query parameters:
+        size: Box size in pixels per module (1-40, default 10)
+    """
+    if fmt not in QR_FORMATS:
+        return jsonify({"error": "Format must be png or svg"}), 400
+    
+    try:
+        box_size = int(request.args.get("size", 10))
+    except ValueError:
+        return jsonify({"error": "Size must be a valid integer"}), 400
+    if not 1 <= box_size <= 40:
+        return jsonify({"error": "Size must be between 1 and 40"}), 400
+    
+    qr_code = InventoryModel.find_qr_code(item_id)
+    if not qr_code:
+        return jsonify({"error": "Item not found"}), 404
+    
+    # qrCode is immutable, so the image can be cached indefinitely
+    etag = qr_etag(qr_code, fmt, box_size)
+    # Compressed responses carry the weakened form of the ETag
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(render_qr(qr_code, fmt, box_size), mimetype=QR_FORMATS[fmt])
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    return response
+
+
+@inventory_bp.route("/labels", methods=["POST"])
+@jwt_required
+@owner_required
+def print_labels():
+    """Generate a printable sheet of QR labels. Owner only.
+    
+    Request body:
+        {
+            "category": "Grains",          # optional
+            "ids": ["...", "..."],         # optional
+            "format": "pdf",               # pdf | png (zip of pages)
+            "columns": 3,
+            "rows": 8
+        }
+    
+    A category or a non-empty ``ids`` list is required, and at most
+    Config.LABEL_MAX_ITEMS items are rendered, inline in this worker.
+    Print larger runs or the whole catalog with ``print_labels.py``.
+    """
+    data = request.get_json() or {}
+    
+    fmt = data.get("format", "pdf")
+    if fmt not in SHEET_FORMATS:
+        return jsonify({"error": "Format must be pdf or png"}), 400
+    
+    ids = data.get("ids")
+    if ids is not None and not isinstance(ids, list):
+        return jsonify({"error": "ids must be a list"}), 400
+    if not ids and not data.get("category"):
+        return jsonify({"error": "Select items by category or ids"}), 400
+    if ids and len(ids) > Config.LABEL_MAX_ITEMS:
+        return jsonify({"error": f"At most {Config.LABEL_MAX_ITEMS} items per request"}), 400
+    
+    try:
+        columns = int(data.get("columns", 3))
+        rows = int(data.get("rows", 8))
+    except (ValueError, TypeError):
+        return jsonify({"error": "Columns and rows must be valid integers"}), 400
+    
+    try:
+        count = InventoryModel.count_for_labels(category=data.get("category"), item_ids=ids)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if count > Config.LABEL_MAX_ITEMS:
+        return jsonify({
+            "error": f"{count} items selected; at most {Config.LABEL_MAX_ITEMS} per request. "
+                     "Use print_labels.py for larger runs."
+        }), 400
+    
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    os.close(fd)
+    try:
+        items = InventoryModel.iter_for_labels(
+            category=data.get("category"),
+            item_ids=ids,
+            limit=Config.LABEL_MAX_ITEMS
+        )
+        # Inline: a process pool per request is costly and can hang under gevent
+        build_label_sheet(items, path, fmt=fmt, columns=columns, rows=rows, workers=1)
+        output = open(path, "rb")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        # The open handle keeps the data readable until the response is sent
+        os.unlink(path)
+    
+    extension = "pdf" if fmt == "pdf" else "zip"
+    return send_file(
+        output,
+        mimetype=SHEET_FORMATS[fmt],
+        as_attachment=True,
+        download_name=f"labels.{extension}"
+    )
+
+
+@inventory_bp.route("/import", methods=["POST"])
+@jwt_required
+@owner_required
+def import_inventory():
+    """Bulk import items from a CSV or NDJSON upload. Owner only.
+    
+    The body is either the raw file or a multipart upload in ``file``.
+    CSV needs a header row with name, category, quantity, price and an
+    optional qrCode column; rows with a known qrCode update that item.
+    
+    Query parameters:
+        format: ``csv`` or ``ndjson`` (inferred from Content-Type if absent)
+        dryRun: ``true`` to validate without writing
+    """
+    upload = request.files.get("file")
+    content_type = (upload.mimetype if upload else request.mimetype) or ""
+    
+    fmt = request.args.get("format")
+    if not fmt:
+        fmt = "ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv"
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"error": "Format must be csv or ndjson"}), 400
+    
+    dry_run = request.args.get("dryRun", "false").lower() == "true"
+    raw = upload.stream if upload else request.stream
+    stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    
+    try:
+        report = import_items(stream, fmt, g.current_user["id"], dry_run=dry_run)
+    except UnicodeDecodeError:
+        return jsonify({"error": "File must be UTF-8 encoded"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(report), 200
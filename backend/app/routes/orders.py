@@ -1,7 +1,14 @@
 """Order routes for purchase and billing operations."""
+from bson import ObjectId
 from flask import Blueprint, request, jsonify, g
+from app.conditional import make_etag, not_modified, with_validators
+from app.config import Config
+from app.models.counter import CounterModel
 from app.models.order import OrderModel
 from app.middleware.auth import jwt_required, buyer_required, owner_required
+from app.middleware.rate_limit import rate_limit, user_rate_limiter
+from app.query_params import parse_date_range
+from app.streaming import stream_csv, stream_ndjson
 
 orders_bp = Blueprint("orders", __name__, url_prefix="/orders")
 
@@ -9,6 +16,7 @@ orders_bp = Blueprint("orders", __name__, url_prefix="/orders")
 @orders_bp.route("", methods=["POST"])
 @jwt_required
 @buyer_required
+@rate_limit(user_rate_limiter)
 def create_order():
     """Create a new order (purchase). Buyer only.
     
@@ -55,20 +63,89 @@ def create_order():
 
 @orders_bp.route("", methods=["GET"])
 @jwt_required
+@rate_limit(user_rate_limiter)
 def get_orders():
     """Get orders based on user role.
     
     - Buyer: Gets only their own orders
     - Owner: Gets all orders
+    
+    Answers 304 from the orders version counter when nothing changed.
     """
     user = g.current_user
     
+    version, changed_at = CounterModel.get(OrderModel.COLLECTION)
+    etag = make_etag(OrderModel.COLLECTION, version, user["id"], user["role"])
+    cached = not_modified(etag, changed_at)
+    if cached:
+        return cached
+    
     if user["role"] == "owner":
         orders = OrderModel.find_all()
     else:
         orders = OrderModel.find_by_buyer(user["id"])
     
-    return jsonify({"orders": orders}), 200
+    return with_validators(jsonify({"orders": orders}), etag, changed_at)
+
+
+EXPORT_FIELDS = [
+    "orderId", "createdAt", "status", "buyerId", "buyerName", "totalAmount",
+    "productId", "productName", "price", "quantity", "subtotal"
+]
+
+
+@orders_bp.route("/export", methods=["GET"])
+@jwt_required
+@owner_required
+def export_orders():
+    """Stream orders as CSV (one row per line item) or NDJSON. Owner only.
+    
+    Query parameters:
+        format: ``csv`` (default) or ``ndjson``
+        status: pending, completed or cancelled
+        buyerId: Only orders of this buyer
+        from, to: createdAt range (ISO 8601, ``to`` exclusive)
+    """
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "Format must be csv or ndjson"}), 400
+    
+    try:
+        query = parse_date_range(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if request.args.get("status"):
+        query["status"] = request.args["status"]
+    if request.args.get("buyerId"):
+        try:
+            query["buyerId"] = ObjectId(request.args["buyerId"])
+        except Exception:
+            return jsonify({"error": "Invalid buyerId"}), 400
+    
+    orders = OrderModel.iter_all(query, batch_size=Config.EXPORT_BATCH_SIZE)
+    if fmt == "ndjson":
+        return stream_ndjson(orders)
+    return stream_csv(EXPORT_FIELDS, _order_rows(orders), filename="orders.csv")
+
+
+def _order_rows(orders):
+    """Flatten orders into one CSV row per line item."""
+    for order in orders:
+        for item in order["items"]:
+            yield {
+                "orderId": order["id"],
+                "createdAt": order["createdAt"],
+                "status": order["status"],
+                "buyerId": order["buyerId"],
+                "buyerName": order["buyerName"],
+                "totalAmount": order["totalAmount"],
+                "productId": item["productId"],
+                "productName": item["name"],
+                "price": item["price"],
+                "quantity": item["quantity"],
+                "subtotal": item["subtotal"]
+            }
 
 
 @orders_bp.route("/<order_id>", methods=["GET"])
@@ -78,18 +155,26 @@ def get_order(order_id):
     
     - Buyer: Can only access their own orders
     - Owner: Can access any order
+    
+    Supports ``If-None-Match`` / ``If-Modified-Since`` (304 when unchanged).
     """
     user = g.current_user
+    buyer_id = None if user["role"] == "owner" else user["id"]
     
-    if user["role"] == "owner":
-        order = OrderModel.find_by_id(order_id)
-    else:
-        order = OrderModel.find_by_id(order_id, buyer_id=user["id"])
+    updated_at = OrderModel.find_last_modified(order_id, buyer_id=buyer_id)
+    if not updated_at:
+        return jsonify({"error": "Order not found"}), 404
+    
+    etag = make_etag(order_id, updated_at.isoformat())
+    cached = not_modified(etag, updated_at)
+    if cached:
+        return cached
     
+    order = OrderModel.find_by_id(order_id, buyer_id=buyer_id)
     if not order:
         return jsonify({"error": "Order not found"}), 404
     
-    return jsonify({"order": order}), 200
+    return with_validators(jsonify({"order": order}), etag, updated_at)
 
 
 @orders_bp.route("/<order_id>/status", methods=["PATCH"])
@@ -0,0 +1,77 @@
+"""Reservation (cart hold) routes for buyers."""
+from flask import Blueprint, request, jsonify, g
+from app.models.reservation import ReservationModel
+from app.middleware.auth import jwt_required, buyer_required
+from app.middleware.rate_limit import rate_limit, user_rate_limiter
+
+reservations_bp = Blueprint("reservations", __name__, url_prefix="/reservations")
+
+
+@reservations_bp.route("", methods=["POST"])
+@jwt_required
+@buyer_required
+@rate_limit(user_rate_limiter)
+def reserve():
+    """Hold stock for a cart line. Buyer only.
+    
+    Request body:
+        {"productId": "...", "quantity": 2}
+    
+    Sets the buyer's hold on that product to ``quantity`` (0 releases it)
+    and restarts its expiry. Placing an order consumes matching holds.
+    """
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({"error": "Request body is required"}), 400
+    
+    if not data.get("productId"):
+        return jsonify({"error": "productId is required"}), 400
+    
+    try:
+        quantity = int(data.get("quantity", 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "quantity must be a valid integer"}), 400
+    
+    try:
+        hold = ReservationModel.reserve(
+            g.current_user["id"],
+            str(data["productId"]),
+            quantity
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409 if str(e).startswith("Insufficient stock") else 400
+    
+    return jsonify({"reservation": hold}), 200
+
+
+@reservations_bp.route("", methods=["GET"])
+@jwt_required
+@buyer_required
+def get_reservations():
+    """List the buyer's active holds. Buyer only."""
+    return jsonify({"reservations": ReservationModel.find_by_buyer(g.current_user["id"])}), 200
+
+
+@reservations_bp.route("/<reservation_id>/extend", methods=["POST"])
+@jwt_required
+@buyer_required
+@rate_limit(user_rate_limiter)
+def extend_reservation(reservation_id):
+    """Restart a hold's expiry (within the maximum hold time). Buyer only."""
+    hold = ReservationModel.extend(g.current_user["id"], reservation_id)
+    if not hold:
+        return jsonify({"error": "Reservation not found or expired"}), 404
+    
+    return jsonify({"reservation": hold}), 200
+
+
+@reservations_bp.route("/<reservation_id>", methods=["DELETE"])
+@jwt_required
+@buyer_required
+def release_reservation(reservation_id):
+    """Release a hold and return its stock. Buyer only."""
+    if not ReservationModel.release(g.current_user["id"], reservation_id):
+        return jsonify({"error": "Reservation not found"}), 404
+    
+    return jsonify({"message": "Reservation released"}), 200
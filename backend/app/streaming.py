@@ -0,0 +1,156 @@
+"""Streaming response helpers for large listings.
+
+These build the response body incrementally from a generator so that a
+request never holds more than one MongoDB batch in memory.
+"""
+import csv
+import io
+import sys
+import zlib
+from datetime import datetime
+from typing import Iterable, Sequence
+from app.config import Config
+from flask import Response, current_app, jsonify, stream_with_context
+
+
+def stream_json_list(key: str, items: Iterable[dict], **extra) -> Response:
+    """Stream ``{"<key>": [...], **extra}`` without building the list in memory."""
+    def generate():
+        dumps = current_app.json.dumps
+        yield "{" + dumps(key) + ":["
+        first = True
+        for item in items:
+            if first:
+                first = False
+                yield dumps(item)
+            else:
+                yield "," + dumps(item)
+        yield "]"
+        for name, value in extra.items():
+            yield "," + dumps(name) + ":" + dumps(value)
+        yield "}"
+    
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+def stream_ndjson(items: Iterable[dict]) -> Response:
+    """Stream one JSON document per line (``application/x-ndjson``)."""
+    def generate():
+        dumps = current_app.json.dumps
+        for item in items:
+            yield dumps(item) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def stream_ndjson_gzip(items: Iterable[dict], filename: str) -> Response:
+    """Stream NDJSON as a gzip file download, compressing as it goes."""
+    def generate():
+        dumps = current_app.json.dumps
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for item in items:
+            chunk = compressor.compress((dumps(item) + "\n").encode("utf-8"))
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+    
+    response = Response(stream_with_context(generate()), mimetype="application/gzip")
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+def wants_ndjson(request) -> bool:
+    """Whether the client asked for newline-delimited JSON."""
+    if request.args.get("format", "").lower() == "ndjson":
+        return True
+    return request.accept_mimetypes.best == "application/x-ndjson"
+
+
+def stream_csv(
+    fieldnames: Sequence[str],
+    rows: Iterable[dict],
+    filename: str | None = None
+) -> Response:
+    """Stream rows as CSV with a header line, one row at a time.
+    
+    Datetime values are written as ISO 8601, matching the JSON responses.
+    """
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({
+                key: value.isoformat() if isinstance(value, datetime) else value
+                for key, value in row.items()
+            })
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        yield buffer.getvalue()
+    
+    response = Response(stream_with_context(generate()), mimetype="text/csv")
+    if filename:
+        response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+def stream_sse(subscription, heartbeat: float | None = None) -> Response:
+    """Stream events from an ``EventHub`` subscription as server-sent events.
+    
+    Each event is sent with its ``type`` as the SSE event name. A comment
+    line goes out every ``heartbeat`` seconds of silence so proxies keep
+    the connection open and dead clients are noticed; the subscription is
+    closed when the client disconnects.
+    """
+    heartbeat = heartbeat or Config.SSE_HEARTBEAT_SECONDS
+    
+    def generate():
+        dumps = current_app.json.dumps
+        try:
+            yield ": connected\n\n"
+            while True:
+                event = subscription.get(timeout=heartbeat)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: {event['type']}\ndata: {dumps(event)}\n\n"
+        finally:
+            subscription.close()
+    
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def streams_supported() -> bool:
+    """Whether this process can hold long-lived streams open cheaply.
+    
+    True under gevent (an idle stream parks a greenlet) and outside
+    gunicorn (the threaded development server). Under gunicorn's sync or
+    gthread workers each stream would hold a worker or thread for as long
+    as the client stays connected.
+    """
+    if "gunicorn" not in sys.modules:
+        return True
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("socket")
+
+
+def streams_unavailable_response() -> Response:
+    """503 for a stream requested from a blocking (sync/gthread) worker."""
+    response = jsonify({"error": "Event streams need GUNICORN_WORKER_CLASS=gevent"})
+    response.status_code = 503
+    return response
+
+
+def busy_response() -> Response:
+    """503 for a stream that cannot be opened right now."""
+    response = jsonify({"error": "Too many open streams, please retry shortly"})
+    response.status_code = 503
+    response.headers["Retry-After"] = "5"
+    return response
@@ -0,0 +1,98 @@
+"""JSON encoding and response compression benchmark.
+
+Builds a synthetic inventory listing shaped like GET /items, then times
+serialization with the stdlib provider and the orjson provider (both
+through ``AppJSONProvider``), and measures size and CPU time of each
+available compression encoding at the configured levels.
+
+Usage:
+    python benchmarks/bench_json.py [--items 5000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from bson import ObjectId
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from flask import Flask  # noqa: E402
+from app import compression, json_provider  # noqa: E402
+from app.json_provider import AppJSONProvider  # noqa: E402
+from app.models.inventory import InventoryModel  # noqa: E402
+
+CATEGORIES = ["Grains", "Dairy", "Beverages", "Snacks", "Household", "Produce"]
+
+
+def make_items(count: int) -> list[dict]:
+    random.seed(7)
+    owner = ObjectId()
+    start = datetime(2026, 1, 1)
+    items = []
+    for i in range(count):
+        created = start + timedelta(minutes=random.randint(0, 500000))
+        items.append({
+            "_id": ObjectId(),
+            "name": f"{random.choice(CATEGORIES)} item {i}",
+            "category": random.choice(CATEGORIES),
+            "quantity": random.randint(0, 500),
+            "reserved": random.randint(0, 5),
+            "price": round(random.uniform(1, 500), 2),
+            "qrCode": f"INV-{uuid.uuid4().hex[:12].upper()}",
+            "createdBy": owner,
+            "createdAt": created,
+            "updatedAt": created + timedelta(hours=random.randint(0, 100))
+        })
+    return items
+
+
+def timed(fn, repeat: int) -> tuple[float, object]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    docs = make_items(args.items)
+    app = Flask(__name__)
+    provider = AppJSONProvider(app)
+    orjson = json_provider.orjson
+    
+    print(f"items={args.items} repeat={args.repeat} orjson={'yes' if orjson else 'no'}")
+    
+    serialize_ms, payload = timed(lambda: {"items": [InventoryModel._serialize(d) for d in docs]}, args.repeat)
+    print(f"{'InventoryModel._serialize':40} {serialize_ms:8.2f} ms")
+    
+    with app.app_context():
+        json_provider.orjson = None
+        stdlib_ms, body = timed(lambda: provider.response(payload).get_data(), args.repeat)
+        json_provider.orjson = orjson
+        print(f"{'encode, stdlib json':40} {stdlib_ms:8.2f} ms  {len(body):>9} bytes")
+        if orjson:
+            fast_ms, fast_body = timed(lambda: provider.response(payload).get_data(), args.repeat)
+            print(f"{'encode, orjson':40} {fast_ms:8.2f} ms  {len(fast_body):>9} bytes  "
+                  f"({stdlib_ms / fast_ms:.1f}x faster)")
+    
+    for name, factory in compression.ENCODERS.items():
+        def run():
+            compress, finish = factory()
+            return compress(body) + finish()
+        compress_ms, encoded = timed(run, args.repeat)
+        print(f"{'compress, ' + name:40} {compress_ms:8.2f} ms  {len(encoded):>9} bytes  "
+              f"({len(body) / len(encoded):.1f}x smaller)")
+    missing = {"br", "zstd"} - set(compression.ENCODERS)
+    if missing:
+        print(f"(not installed: {', '.join(sorted(missing))})")
+
+
+if __name__ == "__main__":
+    main()
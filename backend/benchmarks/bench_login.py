@@ -0,0 +1,67 @@
+"""Login hashing throughput benchmark.
+
+Compares password verification done inline on a single request thread
+(what a sync gunicorn worker does) with verification offloaded to the
+bounded bcrypt pool from app.passwords, driven by several request threads
+(a gthread worker). Also shows the effect of the bcrypt cost.
+
+Usage:
+    python benchmarks/bench_login.py [--logins 40] [--threads 8] [--rounds 10 12]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import passwords  # noqa: E402
+from app.config import Config  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+
+
+def inline(password_hash: bytes, logins: int) -> float:
+    start = time.perf_counter()
+    for _ in range(logins):
+        bcrypt.checkpw(PASSWORD.encode("utf-8"), password_hash)
+    return logins / (time.perf_counter() - start)
+
+
+def pooled(password_hash: bytes, logins: int, threads: int) -> tuple[float, int]:
+    rejected = 0
+    
+    def login(_):
+        nonlocal rejected
+        try:
+            passwords.check_password(PASSWORD, password_hash.decode("utf-8"))
+        except passwords.HasherOverloaded:
+            rejected += 1
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as requests:
+        list(requests.map(login, range(logins)))
+    return (logins - rejected) / (time.perf_counter() - start), rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent request threads")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 12])
+    args = parser.parse_args()
+    
+    print(f"cpus={os.cpu_count()} bcrypt_threads={Config.BCRYPT_THREADS} "
+          f"max_queue={Config.BCRYPT_MAX_QUEUE} request_threads={args.threads}")
+    for rounds in args.rounds:
+        password_hash = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds))
+        serial = inline(password_hash, args.logins)
+        offloaded, rejected = pooled(password_hash, args.logins, args.threads)
+        print(f"rounds={rounds:>2}  inline={serial:7.1f} logins/s  "
+              f"pooled={offloaded:7.1f} logins/s  ({offloaded / serial:.2f}x, {rejected} shed)")
+
+
+if __name__ == "__main__":
+    main()
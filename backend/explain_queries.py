@@ -0,0 +1,61 @@
+"""Index advisor: explain every declared model query shape.
+
+Runs ``explain`` (queryPlanner) for each entry of the models'
+QUERY_SHAPES and flags plans that scan the whole collection (COLLSCAN)
+or sort in memory (SORT). Exits non-zero when anything is flagged, so it
+can gate a deploy after ``python migrate.py``.
+
+Usage:
+    python explain_queries.py
+"""
+import sys
+from app.db import get_db
+from app.indexes import INDEX_REGISTRY
+
+FLAGGED_STAGES = {"COLLSCAN", "SORT"}
+
+
+def plan_stages(plan: dict) -> list[str]:
+    """Flatten the stage names of a (possibly nested) winning plan."""
+    stages = []
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    # Slot-based engine plans nest the classic plan under queryPlan
+    for key in ("queryPlan", "inputStage"):
+        if key in plan:
+            stages.extend(plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(plan_stages(child))
+    return stages
+
+
+def explain(db, collection: str, shape: dict) -> list[str]:
+    """Return the winning plan's stage names for one query shape."""
+    command = {"find": collection, "filter": shape.get("filter", {})}
+    if shape.get("sort"):
+        command["sort"] = shape["sort"]
+    result = db.command("explain", command, verbosity="queryPlanner")
+    return plan_stages(result["queryPlanner"]["winningPlan"])
+
+
+def main():
+    db = get_db()
+    problems = 0
+    
+    for owner in INDEX_REGISTRY:
+        for name, shape in getattr(owner, "QUERY_SHAPES", {}).items():
+            stages = explain(db, owner.COLLECTION, shape)
+            flagged = FLAGGED_STAGES.intersection(stages)
+            status = "FLAG" if flagged else "ok"
+            print(f"[{status:4}] {owner.COLLECTION}.{name}: {' <- '.join(stages)}")
+            if flagged:
+                problems += 1
+    
+    if problems:
+        print(f"\n{problems} query shape(s) without a supporting index.")
+        sys.exit(1)
+    print("\nAll query shapes are index-backed.")
+
+
+if __name__ == "__main__":
+    main()
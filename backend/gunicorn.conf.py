@@ -0,0 +1,76 @@
+"""Gunicorn configuration.
+
+The worker class is selectable with GUNICORN_WORKER_CLASS:
+
+- gevent (default): cooperative greenlets, up to
+  GUNICORN_WORKER_CONNECTIONS in-flight requests per worker. PyMongo,
+  bcrypt offload and the blueprints run unchanged, and a worker waiting
+  on MongoDB Atlas serves other requests meanwhile. Required for the
+  server-sent event streams (/items/stream, /items/qr/<token>/stream,
+  /alerts/stream): an idle stream parks one greenlet.
+- sync: one request in flight per worker
+- gthread: GUNICORN_THREADS requests per worker on OS threads
+
+Under sync or gthread a stream would hold a whole worker or thread for
+as long as the client stays connected, so the stream endpoints answer
+503 there.
+
+Workers write their metric snapshots to METRICS_DIR (a per-server temp
+directory unless set), which /metrics merges so that any worker can
+answer a scrape for the whole server.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+"""
+import os
+import tempfile
+
+# Set before the app (and its Config) is imported by the workers
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), f"inventory-metrics-{os.getpid()}"))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gevent")
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "500"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    """Drop metric snapshots left over from a previous run."""
+    from app.metrics import clear_metrics_dir
+    
+    clear_metrics_dir()
+
+
+def child_exit(server, worker):
+    """Fold an exited worker's counters into the metrics archive."""
+    from app.metrics import mark_process_dead
+    
+    try:
+        mark_process_dead(worker.pid)
+    except Exception as e:
+        server.log.warning("Could not archive metrics of worker %s: %s", worker.pid, e)
+
+
+def post_worker_init(worker):
+    """Build this worker's MongoDB pool after fork and warm it up, start
+    returning expired cart holds to stock, and start writing this
+    worker's metric snapshots.
+    
+    Runs after the worker class is set up (after gevent monkey patching),
+    so the client's monitor threads are created in the right mode.
+    """
+    from app.db import init_db
+    from app.metrics import metrics_exporter
+    from app.models.reservation import reservation_sweeper
+    
+    try:
+        init_db(warm=True)
+    except Exception as e:
+        # Requests will retry lazily; don't crash-loop the worker
+        worker.log.warning("MongoDB warm-up failed: %s", e)
+    reservation_sweeper.start()
+    metrics_exporter.start()
@@ -0,0 +1,41 @@
+"""Bulk import inventory items from a CSV or NDJSON file.
+
+Usage:
+    python import_items.py --file catalog.csv
+    python import_items.py --file catalog.ndjson --format ndjson --dry-run
+    python import_items.py --file catalog.csv --owner-email owner@inventory.local
+"""
+import argparse
+import json
+import sys
+from app.importer import IMPORT_FORMATS, import_items
+from app.models.user import UserModel
+
+DEFAULT_OWNER_EMAIL = "owner@inventory.local"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import inventory items")
+    parser.add_argument("--file", required=True, help="CSV or NDJSON file")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--owner-email", default=DEFAULT_OWNER_EMAIL)
+    parser.add_argument("--dry-run", action="store_true", help="Validate without writing")
+    args = parser.parse_args()
+    
+    fmt = args.format or ("ndjson" if args.file.endswith((".ndjson", ".jsonl")) else "csv")
+    
+    owner = UserModel.find_by_email(args.owner_email)
+    if not owner or owner["role"] != "owner":
+        print(f"Error: no owner account with email {args.owner_email}")
+        sys.exit(1)
+    
+    with open(args.file, encoding="utf-8-sig", newline="") as f:
+        report = import_items(f, fmt, str(owner["_id"]), dry_run=args.dry_run)
+    
+    print(json.dumps(report, indent=2))
+    if report["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
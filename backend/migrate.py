@@ -0,0 +1,42 @@
+"""One-shot database migration: create every index the app relies on,
+backfill derived fields and repair derived counters.
+
+Run once per deploy, before starting the web workers, so that index
+builds never run inside a user request.
+
+Usage:
+    python migrate.py
+"""
+from app.config import Config
+from app.db import close_db, create_indexes, init_db
+from app.events import ensure_outbox, uses_outbox
+from app.models.reservation import ReservationModel
+
+
+def migrate():
+    """Create or update all indexes and backfill derived fields."""
+    print(f"Creating indexes on {Config.MONGODB_DB_NAME}...")
+    db = init_db()
+    create_indexes(db)
+    print("Indexes are up to date.")
+    
+    # Backfill the lowercase name used by prefix search and name sorting
+    result = db.inventory.update_many(
+        {"nameKey": {"$exists": False}},
+        [{"$set": {"nameKey": {"$toLower": "$name"}}}]
+    )
+    print(f"Backfilled nameKey on {result.modified_count} item(s).")
+    
+    # Reserved counters must equal the sum of the holds on each item
+    repaired = ReservationModel.repair_reserved()
+    print(f"Repaired the reserved counter on {repaired} item(s).")
+    
+    # Standalone servers have no change streams; stock events use an outbox
+    if uses_outbox():
+        ensure_outbox(db)
+        print("Stock event outbox is ready.")
+    close_db()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,45 @@
+"""Generate a printable QR label sheet from the command line.
+
+Usage:
+    python print_labels.py --output labels.pdf
+    python print_labels.py --category Grains --format png --output grains.zip
+    python print_labels.py --ids 65a1...,65a2... --output some.pdf
+"""
+import argparse
+import sys
+from app.labels import SHEET_FORMATS, build_label_sheet
+from app.models.inventory import InventoryModel
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print QR labels for inventory items")
+    parser.add_argument("--output", required=True, help="Output file path")
+    parser.add_argument("--category", help="Only items in this category")
+    parser.add_argument("--ids", help="Comma-separated item IDs")
+    parser.add_argument("--format", choices=list(SHEET_FORMATS), default="pdf")
+    parser.add_argument("--columns", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=8)
+    parser.add_argument("--workers", type=int, help="Render processes")
+    args = parser.parse_args()
+    
+    ids = [i.strip() for i in args.ids.split(",") if i.strip()] if args.ids else None
+    
+    try:
+        items = InventoryModel.iter_for_labels(category=args.category, item_ids=ids)
+        pages = build_label_sheet(
+            items,
+            args.output,
+            fmt=args.format,
+            columns=args.columns,
+            rows=args.rows,
+            workers=args.workers
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    print(f"Wrote {pages} page(s) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
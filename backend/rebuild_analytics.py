@@ -0,0 +1,25 @@
+"""Rebuild the sales analytics rollups from the orders collection.
+
+The rollups are maintained incrementally, best effort, after orders are
+placed and cancelled; run this once after deploying analytics to
+backfill existing orders, and periodically (or after "Could not update
+sales rollups" warnings) to repair drift.
+
+Usage:
+    python rebuild_analytics.py
+"""
+from app.db import close_db, init_db
+from app.models.analytics import AnalyticsModel
+
+
+def main():
+    db = init_db()
+    print("Rebuilding sales rollups from orders...")
+    AnalyticsModel.rebuild()
+    for name in AnalyticsModel.ROLLUP_COLLECTIONS:
+        print(f"  {name}: {db[name].estimated_document_count()} document(s)")
+    close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Shared fixtures: an in-memory MongoDB (mongomock) per test."""
+import os
+
+# Before app.config is imported: no replica set, stock events via the outbox
+os.environ["MONGODB_TRANSACTIONS"] = "false"
+os.environ["STOCK_FEED_SOURCE"] = "outbox"
+os.environ["RATE_LIMIT_BACKEND"] = "memory"
+
+import mongomock
+import pytest
+from bson import ObjectId
+import app.db as app_db
+from app import create_app
+from app.cache import all_caches
+from app.models.inventory import InventoryModel
+from app.models.reservation import reservation_sweeper
+from app.routes.auth import _generate_token
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh mongomock database installed as the app's database."""
+    client = mongomock.MongoClient()
+    database = client["inventory_test"]
+    monkeypatch.setattr(app_db, "_client", client)
+    monkeypatch.setattr(app_db, "_db", database)
+    monkeypatch.setattr(app_db, "_read_db", database)
+    monkeypatch.setattr(app_db, "_client_pid", os.getpid())
+    # Tests sweep explicitly
+    monkeypatch.setattr(reservation_sweeper, "start", lambda: None)
+    for cache in all_caches():
+        cache.clear()
+    yield database
+
+
+@pytest.fixture
+def owner_id():
+    return str(ObjectId())
+
+
+@pytest.fixture
+def buyer_id():
+    return str(ObjectId())
+
+
+@pytest.fixture
+def make_item(db, owner_id):
+    """Create an inventory item and return its serialized form."""
+    def make(quantity: int = 10, price: float = 2.5, name: str = "Widget"):
+        return InventoryModel.create(name, "Tools", quantity, price, owner_id)
+    return make
+
+
+@pytest.fixture
+def client(db):
+    return create_app().test_client()
+
+
+@pytest.fixture
+def auth_headers(db):
+    """Bearer headers for a stored user with the given id and role."""
+    def headers(user_id: str, role: str = "owner"):
+        db.users.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$setOnInsert": {"name": role.title(), "email": f"{user_id}@example.com", "role": role}},
+            upsert=True
+        )
+        return {"Authorization": f"Bearer {_generate_token(user_id)}"}
+    return headers
@@ -0,0 +1,63 @@
+"""Low-stock levels: alert transitions and the shared threshold source."""
+from bson import ObjectId
+from app.alerts import LowStockWatcher
+from app.models.inventory import InventoryModel
+from app.models.threshold import ThresholdModel
+
+
+class RecordingHub:
+    def __init__(self):
+        self.events = []
+    
+    def publish(self, event):
+        self.events.append(event)
+
+
+def stock_event(item_id, quantity, category="Tools"):
+    return {"type": "stock", "id": item_id, "quantity": quantity, "category": category}
+
+
+def test_first_event_after_restart_sets_baseline(db):
+    hub = RecordingHub()
+    watcher = LowStockWatcher(hub, debounce=0)
+    item_id = str(ObjectId())
+    
+    watcher.handle(stock_event(item_id, 3))
+    watcher.flush()
+    assert hub.events == []
+    
+    watcher.handle(stock_event(item_id, 0))
+    watcher.flush()
+    assert [(e["type"], e["previousLevel"]) for e in hub.events] == [("out_of_stock", "low")]
+
+
+def test_change_reverted_within_quiet_period_is_not_announced(db):
+    hub = RecordingHub()
+    watcher = LowStockWatcher(hub, debounce=60)
+    item_id = str(ObjectId())
+    watcher.handle(stock_event(item_id, 50))
+    
+    watcher.handle(stock_event(item_id, 2))
+    watcher.handle(stock_event(item_id, 40))
+    watcher.flush()
+    
+    assert hub.events == []
+    assert watcher._pending == {}
+
+
+def test_low_stock_flag_and_filter_use_thresholds(db, make_item):
+    default_low = make_item(quantity=5)
+    ok_by_category = InventoryModel.create("Sacks", "Bulk", 5, 1.0, str(ObjectId()))
+    low_by_item = make_item(quantity=15)
+    out_of_stock = InventoryModel.create("Empty", "Bulk", 0, 1.0, str(ObjectId()))
+    make_item(quantity=50)
+    ThresholdModel.set("category", "Bulk", 3)
+    ThresholdModel.set("item", low_by_item["id"], 20)
+    
+    query = InventoryModel.build_search_query(low_stock=True)
+    filtered = {str(doc["_id"]) for doc in db.inventory.find(query)}
+    flagged = {item["id"] for item in InventoryModel.iter_all() if item["lowStock"]}
+    
+    expected = {default_low["id"], low_by_item["id"], out_of_stock["id"]}
+    assert filtered == flagged == expected
+    assert ok_by_category["id"] not in flagged
@@ -0,0 +1,57 @@
+"""Sales rollups: day ranges and product names."""
+from datetime import datetime
+from bson import ObjectId
+from app.models.analytics import AnalyticsModel
+
+
+def record(product_id, name, created_at, quantity=1, price=2.0):
+    AnalyticsModel.record_order({
+        "_id": ObjectId(),
+        "buyerId": ObjectId(),
+        "createdAt": created_at,
+        "totalAmount": quantity * price,
+        "items": [{
+            "productId": product_id,
+            "name": name,
+            "category": "Tools",
+            "quantity": quantity,
+            "subtotal": quantity * price
+        }]
+    })
+
+
+def test_range_includes_from_day_and_excludes_to_day_at_any_time(db):
+    product_id = ObjectId()
+    for day in (1, 2, 3):
+        record(product_id, "Widget", datetime(2026, 3, day, 12))
+    
+    days = AnalyticsModel.revenue_by_day(datetime(2026, 3, 1, 18), datetime(2026, 3, 3, 0, 0, 1))
+    
+    assert [day["date"] for day in days] == ["2026-03-01", "2026-03-02"]
+
+
+def test_top_products_uses_latest_name(db):
+    product_id = ObjectId()
+    # Recorded out of order: the rollup for the later day is inserted first
+    record(product_id, "Widget v2", datetime(2026, 3, 5))
+    record(product_id, "Widget", datetime(2026, 3, 1))
+    
+    [top] = AnalyticsModel.top_products()
+    
+    assert top["name"] == "Widget v2"
+    assert top["units"] == 2
+
+
+def test_cancelled_order_is_removed_from_rollups(db):
+    order = {
+        "_id": ObjectId(),
+        "buyerId": ObjectId(),
+        "createdAt": datetime(2026, 3, 1),
+        "totalAmount": 4.0,
+        "items": [{"productId": ObjectId(), "name": "Widget", "quantity": 2, "subtotal": 4.0}]
+    }
+    AnalyticsModel.record_order(order)
+    AnalyticsModel.record_order(order, sign=-1)
+    
+    assert AnalyticsModel.top_products() == []
+    assert AnalyticsModel.revenue_by_day()[0]["revenue"] == 0
@@ -0,0 +1,39 @@
+"""TTLCache expiry and the TTL <= 0 "disabled" setting."""
+from app.cache import MISSING, TTLCache
+
+
+def test_zero_ttl_disables_caching():
+    cache = TTLCache("test_zero_ttl", max_size=10, ttl=0)
+    
+    cache.set("key", "value")
+    
+    assert cache.get("key") is MISSING
+
+
+def test_per_entry_zero_ttl_is_not_stored():
+    cache = TTLCache("test_entry_ttl", max_size=10, ttl=60)
+    
+    cache.set("key", None, ttl=0)
+    
+    assert cache.get("key") is MISSING
+
+
+def test_no_ttl_keeps_entries(monkeypatch):
+    cache = TTLCache("test_no_ttl", max_size=10)
+    cache.set("key", "value")
+    
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: 10 ** 9)
+    
+    assert cache.get("key") == "value"
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache("test_expiry", max_size=10, ttl=5)
+    cache.set("key", "value")
+    
+    now[0] += 4
+    assert cache.get("key") == "value"
+    now[0] += 2
+    assert cache.get("key") is MISSING
@@ -0,0 +1,85 @@
+"""Bulk import: validation, upserts on qrCode and the per-row report."""
+import io
+import pytest
+from app.config import Config
+from app.importer import import_items
+
+
+def test_csv_import_inserts_updates_and_reports_bad_rows(db, owner_id, make_item):
+    existing = make_item(quantity=1, price=1.0)
+    csv_text = (
+        "name,category,quantity,price,qrCode\n"
+        "Hammer,Tools,5,12.5,\n"
+        "Saw,Tools,many,20,\n"
+        f"Widget,Tools,40,3.0,{existing['qrCode']}\n"
+        "Drill,Tools,2,80,SUPPLIER-1\n"
+        ",Tools,1,1,\n"
+    )
+    
+    report = import_items(io.StringIO(csv_text), "csv", owner_id, chunk_size=2)
+    
+    assert {key: report[key] for key in ("processed", "inserted", "updated", "failed")} == {
+        "processed": 5, "inserted": 2, "updated": 1, "failed": 2
+    }
+    assert report["errors"] == [
+        {"row": 2, "error": "Quantity must be a valid integer"},
+        {"row": 5, "error": "Name cannot be empty"}
+    ]
+    assert db.inventory.count_documents({}) == 3
+    assert db.inventory.find_one({"qrCode": existing["qrCode"]})["quantity"] == 40
+    assert db.inventory.find_one({"qrCode": "SUPPLIER-1"})["name"] == "Drill"
+
+
+def test_reimport_updates_instead_of_duplicating(db, owner_id):
+    row = '{"name": "Drill", "category": "Tools", "quantity": 2, "price": 80, "qrCode": "SUPPLIER-1"}\n'
+    import_items(io.StringIO(row), "ndjson", owner_id)
+    
+    report = import_items(io.StringIO(row.replace('"quantity": 2', '"quantity": 9')), "ndjson", owner_id)
+    
+    assert (report["inserted"], report["updated"]) == (0, 1)
+    assert db.inventory.count_documents({}) == 1
+    assert db.inventory.find_one()["quantity"] == 9
+
+
+def test_ndjson_parse_errors_are_numbered_by_data_line(db, owner_id):
+    ndjson_text = (
+        '{"name": "Hammer", "category": "Tools", "quantity": 5, "price": 12.5}\n'
+        "\n"
+        "{not json\n"
+        "[1, 2]\n"
+        '{"name": "Saw", "category": "Tools", "quantity": 1, "price": -3}\n'
+    )
+    
+    report = import_items(io.StringIO(ndjson_text), "ndjson", owner_id)
+    
+    assert report["inserted"] == 1
+    assert report["errors"] == [
+        {"row": 2, "error": "Invalid JSON"},
+        {"row": 3, "error": "Row must be a JSON object"},
+        {"row": 4, "error": "Price cannot be negative"}
+    ]
+
+
+def test_dry_run_validates_without_writing(db, owner_id):
+    csv_text = "name,category,quantity,price\nHammer,Tools,5,12.5\nSaw,Tools,-1,20\n"
+    
+    report = import_items(io.StringIO(csv_text), "csv", owner_id, dry_run=True)
+    
+    assert report["dryRun"] is True
+    assert (report["processed"], report["inserted"], report["failed"]) == (2, 0, 1)
+    assert db.inventory.count_documents({}) == 0
+
+
+def test_error_messages_are_capped_but_all_failures_counted(db, owner_id, monkeypatch):
+    monkeypatch.setattr(Config, "IMPORT_MAX_ERRORS", 2)
+    csv_text = "name,category,quantity,price\n" + "Saw,Tools,x,1\n" * 5
+    
+    report = import_items(io.StringIO(csv_text), "csv", owner_id)
+    
+    assert report["failed"] == 5
+    assert [error["row"] for error in report["errors"]] == [1, 2]
+
+
+def test_unsupported_format_is_rejected(db, owner_id):
+    with pytest.raises(ValueError, match="Unsupported format"):
+        import_items(io.StringIO(""), "xlsx", owner_id)
@@ -0,0 +1,101 @@
+"""Order placement: stock checks, deductions and claiming the buyer's holds."""
+from bson import ObjectId
+import pytest
+from app.models.analytics import AnalyticsModel
+from app.models.order import OrderModel
+from app.models.reservation import ReservationModel
+
+
+def stock(db, item):
+    doc = db.inventory.find_one({"_id": ObjectId(item["id"])})
+    return doc["quantity"], doc.get("reserved", 0)
+
+
+def test_order_deducts_stock_and_totals_lines(db, buyer_id, make_item):
+    widget = make_item(quantity=10, price=2.5)
+    bolt = make_item(quantity=5, price=0.5, name="Bolt")
+    
+    order = OrderModel.create(buyer_id, [
+        {"productId": widget["id"], "quantity": 2},
+        {"productId": bolt["id"], "quantity": 4}
+    ])
+    
+    assert order["totalAmount"] == 7.0
+    assert [line["subtotal"] for line in order["items"]] == [5.0, 2.0]
+    assert stock(db, widget) == (8, 0)
+    assert stock(db, bolt) == (1, 0)
+
+
+def test_repeated_product_lines_are_checked_together(db, buyer_id, make_item):
+    item = make_item(quantity=6)
+    
+    with pytest.raises(ValueError, match="Available: 6, Requested: 7"):
+        OrderModel.create(buyer_id, [
+            {"productId": item["id"], "quantity": 3},
+            {"productId": item["id"], "quantity": 4}
+        ])
+    assert stock(db, item) == (6, 0)
+    assert db.orders.count_documents({}) == 0
+
+
+def test_unused_part_of_a_hold_is_released(db, buyer_id, make_item):
+    item = make_item(quantity=10)
+    ReservationModel.reserve(buyer_id, item["id"], 5)
+    
+    OrderModel.create(buyer_id, [{"productId": item["id"], "quantity": 2}])
+    
+    assert stock(db, item) == (8, 0)
+    assert db.reservations.count_documents({}) == 0
+
+
+def test_expired_hold_is_not_claimed(db, buyer_id, make_item):
+    item = make_item(quantity=10)
+    ReservationModel.reserve(buyer_id, item["id"], 2)
+    db.reservations.update_one({}, {"$set": {"expiresAt": db.reservations.find_one()["createdAt"]}})
+    
+    OrderModel.create(buyer_id, [{"productId": item["id"], "quantity": 3}])
+    
+    # The expired hold is left for the sweeper, which returns its units
+    assert stock(db, item) == (7, 2)
+    assert ReservationModel.sweep() == 1
+    assert stock(db, item) == (7, 0)
+
+
+def test_other_buyers_holds_are_not_claimed(db, buyer_id, make_item):
+    item = make_item(quantity=10)
+    other_buyer = str(ObjectId())
+    ReservationModel.reserve(other_buyer, item["id"], 4)
+    
+    OrderModel.create(buyer_id, [{"productId": item["id"], "quantity": 6}])
+    
+    assert stock(db, item) == (4, 4)
+    assert db.reservations.count_documents({"buyerId": ObjectId(other_buyer)}) == 1
+
+
+def test_failed_deduction_compensates_earlier_lines(db, make_item):
+    first = make_item(quantity=10)
+    second = make_item(quantity=1)
+    products = {
+        doc["_id"]: doc
+        for doc in db.inventory.find({"_id": {"$in": [ObjectId(first["id"]), ObjectId(second["id"])]}})
+    }
+    requested = {ObjectId(first["id"]): 4, ObjectId(second["id"]): 2}
+    
+    with pytest.raises(ValueError, match="Failed to deduct stock"):
+        OrderModel._deduct_stock(db, requested, products, None, {})
+    
+    assert stock(db, first) == (10, 0)
+    assert stock(db, second) == (1, 0)
+
+
+def test_cancelling_an_order_removes_it_from_sales(db, buyer_id, make_item):
+    item = make_item(quantity=10)
+    order = OrderModel.create(buyer_id, [{"productId": item["id"], "quantity": 3}])
+    assert AnalyticsModel.revenue_by_day()[0]["orders"] == 1
+    
+    updated = OrderModel.update_status(order["id"], "cancelled")
+    
+    assert updated["status"] == "cancelled"
+    assert AnalyticsModel.revenue_by_day()[0]["orders"] == 0
+    with pytest.raises(ValueError, match="Invalid status"):
+        OrderModel.update_status(order["id"], "shipped")
@@ -0,0 +1,91 @@
+"""Keyset pagination of inventory listings."""
+import pytest
+from app.models.inventory import InventoryModel
+from app.pagination import decode_cursor, encode_cursor
+
+
+def walk(limit, **kwargs):
+    """Every page of find_page, following the cursor."""
+    pages, cursor = [], None
+    while True:
+        items, cursor = InventoryModel.find_page(limit, cursor, **kwargs)
+        pages.append(items)
+        if not cursor:
+            return pages
+
+
+def test_pages_cover_every_item_once_newest_first(db, make_item):
+    created = [make_item(name=f"Item {n}") for n in range(7)]
+    
+    pages = walk(3)
+    
+    assert [len(page) for page in pages] == [3, 3, 1]
+    ids = [item["id"] for page in pages for item in page]
+    # Ties on createdAt are broken by _id, which also grows with creation order
+    assert ids == [item["id"] for item in reversed(created)]
+
+
+def test_ascending_sort_with_duplicate_values(db, make_item):
+    for n, price in enumerate([3, 1, 2, 1, 3, 1]):
+        make_item(name=f"Item {n}", price=price)
+    
+    pages = walk(2, sort="price", direction=1)
+    
+    items = [item for page in pages for item in page]
+    assert len({item["id"] for item in items}) == 6
+    assert [item["price"] for item in items] == [1, 1, 1, 2, 3, 3]
+    assert [item["id"] for item in items if item["price"] == 1] == sorted(
+        item["id"] for item in items if item["price"] == 1
+    )
+
+
+def test_cursor_combines_with_a_filter(db, make_item, owner_id):
+    for n in range(5):
+        make_item(name=f"Tool {n}")
+        InventoryModel.create(f"Grain {n}", "Grains", 5, 1.0, owner_id)
+    
+    pages = walk(2, query=InventoryModel.build_search_query(category="Grains"))
+    
+    names = [item["name"] for page in pages for item in page]
+    assert sorted(names) == [f"Grain {n}" for n in range(5)]
+
+
+def test_items_added_while_paging_do_not_shift_pages(db, make_item):
+    for n in range(4):
+        make_item(name=f"Item {n}")
+    first, cursor = InventoryModel.find_page(2)
+    
+    make_item(name="Newer")
+    second, _ = InventoryModel.find_page(2, cursor)
+    
+    assert [item["name"] for item in first + second] == ["Item 3", "Item 2", "Item 1", "Item 0"]
+
+
+def test_cursor_round_trips_and_is_bound_to_its_sort(db, make_item):
+    item = make_item()
+    doc = db.inventory.find_one()
+    cursor = encode_cursor("price", doc["price"], doc["_id"])
+    
+    assert decode_cursor(cursor, "price") == (item["price"], doc["_id"])
+    with pytest.raises(ValueError, match="does not match"):
+        InventoryModel.find_page(2, cursor, sort="createdAt")
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        InventoryModel.find_page(2, "garbage!")
+    with pytest.raises(ValueError, match="Invalid sort"):
+        InventoryModel.find_page(2, sort="owner")
+
+
+def test_route_returns_next_cursor(client, auth_headers, owner_id, make_item):
+    for n in range(3):
+        make_item(name=f"Item {n}")
+    headers = auth_headers(owner_id)
+    
+    first = client.get("/items", query_string={"limit": 2}, headers=headers).get_json()
+    second = client.get(
+        "/items", query_string={"limit": 2, "cursor": first["nextCursor"]}, headers=headers
+    ).get_json()
+    
+    assert [item["name"] for item in first["items"] + second["items"]] == ["Item 2", "Item 1", "Item 0"]
+    assert second["nextCursor"] is None
+    bad = client.get("/items", query_string={"cursor": "garbage!"}, headers=headers)
+    assert bad.status_code == 400
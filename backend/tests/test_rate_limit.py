@@ -0,0 +1,178 @@
+"""Rate limiting: sliding-window counts, GCRA buckets and the 429 response."""
+import importlib
+import os
+import pytest
+from flask import Flask, jsonify
+from app.middleware.rate_limit import MemoryBackend, MongoBackend, RateLimiter, rate_limit
+
+# The package re-exports the decorator under the module's name
+rate_limit_module = importlib.import_module("app.middleware.rate_limit")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen time.time for the limiter; set ``clock.now`` to move it."""
+    class Clock:
+        now = 600.0
+    monkeypatch.setattr(rate_limit_module.time, "time", lambda: Clock.now)
+    return Clock
+
+
+@pytest.fixture
+def memory():
+    backend = MemoryBackend()
+    # No sweeper thread in tests
+    backend._sweeper_pid = os.getpid()
+    return backend
+
+
+def test_window_allows_limit_then_limits_until_window_ends(clock, memory):
+    results = [memory.hit("k", 10, 60) for _ in range(10)]
+    assert [limited for limited, _, _ in results] == [False] * 10
+    assert [remaining for _, remaining, _ in results] == list(range(9, -1, -1))
+    
+    clock.now += 15
+    assert memory.hit("k", 10, 60) == (True, 0, 45)
+
+
+def test_previous_window_is_weighted_by_overlap(clock, memory):
+    for _ in range(10):
+        memory.hit("k", 10, 60)
+    
+    # Halfway into the next window half of the previous count remains
+    clock.now = 690
+    assert [memory.hit("k", 10, 60)[0] for _ in range(5)] == [False] * 5
+    limited, _, retry_after = memory.hit("k", 10, 60)
+    assert limited
+    # 10 * (60 - 36) / 60 + 5 + 1 <= 10 from second 36 on
+    assert retry_after == 6
+    
+    clock.now += retry_after
+    assert not memory.hit("k", 10, 60)[0]
+
+
+def test_windows_older_than_one_window_are_dropped(clock, memory):
+    for _ in range(10):
+        memory.hit("k", 10, 60)
+    
+    clock.now = 720
+    assert memory.hit("k", 10, 60) == (False, 9, 0)
+
+
+def test_cost_counts_as_several_hits(clock, memory):
+    assert memory.hit("k", 10, 60, cost=4) == (False, 6, 0)
+    assert memory.hit("k", 10, 60, cost=4) == (False, 2, 0)
+    assert memory.hit("k", 10, 60, cost=4)[0]
+    # The rejected hit spent nothing
+    assert memory.hit("k", 10, 60, cost=2) == (False, 0, 0)
+
+
+def test_token_bucket_allows_burst_then_refills(clock, memory):
+    results = [memory.take("k", 1, rate=1, burst=5) for _ in range(5)]
+    assert results == [(False, remaining, 0) for remaining in (4, 3, 2, 1, 0)]
+    assert memory.take("k", 1, rate=1, burst=5) == (True, 0, 1)
+    
+    clock.now += 1
+    assert memory.take("k", 1, rate=1, burst=5) == (False, 0, 0)
+
+
+def test_token_bucket_rejects_cost_above_tokens_without_spending(clock, memory):
+    for _ in range(3):
+        memory.take("k", 1, rate=1, burst=5)
+    
+    assert memory.take("k", 3, rate=1, burst=5) == (True, 2, 1)
+    assert memory.take("k", 2, rate=1, burst=5) == (False, 0, 0)
+
+
+def test_sweep_drops_idle_counters_and_full_buckets(clock, memory):
+    memory.hit("k", 10, 60)
+    memory.take("b", 1, rate=1, burst=5)
+    
+    clock.now += 120
+    assert memory.sweep() == 2
+
+
+def test_mongo_window_counts_rejected_hits(clock, db):
+    backend = MongoBackend()
+    assert [backend.hit("k", 2, 60)[0] for _ in range(3)] == [False, False, True]
+    assert db.rate_limits.find_one({"_id": "k:10"})["count"] == 3
+    
+    # All 3 hits still weigh on the start of the next window
+    clock.now = 660
+    assert backend.hit("k", 2, 60)[0]
+
+
+def test_mongo_bucket_is_shared_between_workers(clock, db):
+    first, second = MongoBackend(), MongoBackend()
+    
+    assert first.take("k", 1, rate=1, burst=3) == (False, 2, 0)
+    assert second.take("k", 1, rate=1, burst=3) == (False, 1, 0)
+    assert first.take("k", 1, rate=1, burst=3) == (False, 0, 0)
+    assert second.take("k", 1, rate=1, burst=3)[0]
+
+
+def test_mongo_bucket_retries_when_another_worker_wins(clock, db, monkeypatch):
+    backend = MongoBackend()
+    backend.take("k", 1, rate=1, burst=3)
+    
+    class RacingCollection:
+        """Lets another worker take a token between our read and our write."""
+        raced = False
+        
+        def __getattr__(self, name):
+            return getattr(db.rate_limits, name)
+        
+        def update_one(self, query, update):
+            if not RacingCollection.raced:
+                RacingCollection.raced = True
+                MongoBackend().take("k", 1, rate=1, burst=3)
+            return db.rate_limits.update_one(query, update)
+    
+    class RacingDb:
+        rate_limits = RacingCollection()
+    
+    monkeypatch.setattr(rate_limit_module, "get_db", lambda: RacingDb)
+    
+    # The conditional update fails once and is retried on the new state
+    assert backend.take("k", 1, rate=1, burst=3) == (False, 0, 0)
+    assert backend.take("k", 1, rate=1, burst=3)[0]
+
+
+@pytest.fixture
+def limited_client(clock, memory):
+    app = Flask(__name__)
+    limiter = RateLimiter(requests_per_minute=3, backend=memory)
+    
+    @app.route("/ping")
+    @rate_limit(limiter)
+    def ping():
+        return jsonify({"ok": True})
+    
+    @app.route("/batch")
+    @rate_limit(limiter, cost=5)
+    def batch():
+        return jsonify({"ok": True})
+    
+    return app.test_client()
+
+
+def test_limited_response_carries_retry_after(limited_client, clock):
+    for remaining in ("2", "1", "0"):
+        response = limited_client.get("/ping")
+        assert response.status_code == 200
+        assert response.headers["RateLimit-Remaining"] == remaining
+    
+    clock.now += 20
+    response = limited_client.get("/ping")
+    
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "40"
+    assert response.get_json()["retry_after"] == 40
+
+
+def test_cost_above_limit_is_refused_without_spending(limited_client):
+    assert limited_client.get("/batch").status_code == 429
+    
+    response = limited_client.get("/ping")
+    assert response.status_code == 200
+    assert response.headers["RateLimit-Remaining"] == "2"
@@ -0,0 +1,144 @@
+"""Cart holds: the ``reserved`` counter must always equal the sum of holds."""
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from app.config import Config
+from app.models.order import OrderModel
+from app.models.reservation import ReservationModel
+
+
+def stock(db, item):
+    doc = db.inventory.find_one({"_id": ObjectId(item["id"])})
+    return doc["quantity"], doc.get("reserved", 0)
+
+
+def expire(db, buyer_id, item):
+    db.reservations.update_one(
+        {"buyerId": ObjectId(buyer_id), "productId": ObjectId(item["id"])},
+        {"$set": {"expiresAt": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+
+
+def test_reserve_sets_stock_aside(db, buyer_id, make_item):
+    item = make_item(quantity=10)
+    
+    hold = ReservationModel.reserve(buyer_id, item["id"], 4)
+    
+    assert hold["quantity"] == 4
+    assert stock(db, item) == (10, 4)
+
+
+def test_reserve_rejects_more_than_available(db, buyer_id, make_item):
+    item = make_item(quantity=3)
+    
+    with pytest.raises(ValueError, match="Insufficient stock"):
+        ReservationModel.reserve(buyer_id, item["id"], 5)
+    assert stock(db, item) == (3, 0)
+    assert db.reservations.count_documents({}) == 0
+
+
+def test_reserve_rejects_more_than_max_quantity(db, buyer_id, make_item):
+    item = make_item(quantity=Config.RESERVATION_MAX_QUANTITY + 5)
+    
+    with pytest.raises(ValueError, match="At most"):
+        ReservationModel.reserve(buyer_id, item["id"], Config.RESERVATION_MAX_QUANTITY + 1)
+    assert stock(db, item)[1] == 0
+
+
+def test_re_reserve_changes_quantity(db, buyer_id, make_item):
+    item = make_item(quantity=10)
+    ReservationModel.reserve(buyer_id, item["id"], 4)
+    
+    ReservationModel.reserve(buyer_id, item["id"], 6)
+    assert stock(db, item) == (10, 6)
+    
+    ReservationModel.reserve(buyer_id, item["id"], 2)
+    assert stock(db, item) == (10, 2)
+    
+    ReservationModel.reserve(buyer_id, item["id"], 0)
+    assert stock(db, item) == (10, 0)
+    assert db.reservations.count_documents({}) == 0
+
+
+def test_re_reserve_cannot_outlive_max_duration(db, buyer_id, make_item):
+    item = make_item(quantity=10)
+    ReservationModel.reserve(buyer_id, item["id"], 2)
+    created_at = datetime.utcnow() - timedelta(seconds=Config.RESERVATION_MAX_SECONDS - 60)
+    db.reservations.update_one({}, {"$set": {"createdAt": created_at}})
+    
+    ReservationModel.reserve(buyer_id, item["id"], 2)
+    
+    hold = db.reservations.find_one({})
+    assert hold["expiresAt"] <= created_at + timedelta(seconds=Config.RESERVATION_MAX_SECONDS)
+
+
+def test_expired_holds_do_not_count_towards_buyer_limit(db, buyer_id, make_item, monkeypatch):
+    monkeypatch.setattr(Config, "RESERVATION_MAX_PER_BUYER", 1)
+    first, second = make_item(), make_item()
+    ReservationModel.reserve(buyer_id, first["id"], 1)
+    expire(db, buyer_id, first)
+    
+    ReservationModel.reserve(buyer_id, second["id"], 1)
+    
+    assert stock(db, second) == (10, 1)
+
+
+def test_sweep_returns_expired_holds(db, buyer_id, make_item):
+    item = make_item(quantity=10)
+    ReservationModel.reserve(buyer_id, item["id"], 5)
+    expire(db, buyer_id, item)
+    
+    assert ReservationModel.sweep() == 1
+    assert stock(db, item) == (10, 0)
+    assert db.reservations.count_documents({}) == 0
+    assert ReservationModel.sweep() == 0
+
+
+def test_order_claims_hold(db, buyer_id, make_item):
+    item = make_item(quantity=10)
+    ReservationModel.reserve(buyer_id, item["id"], 4)
+    
+    OrderModel.create(buyer_id, [{"productId": item["id"], "quantity": 6}])
+    
+    assert stock(db, item) == (4, 0)
+    assert db.reservations.count_documents({}) == 0
+
+
+def test_order_can_use_held_units_others_cannot(db, buyer_id, make_item):
+    item = make_item(quantity=5)
+    ReservationModel.reserve(buyer_id, item["id"], 5)
+    
+    with pytest.raises(ValueError, match="Insufficient stock"):
+        OrderModel.create(str(ObjectId()), [{"productId": item["id"], "quantity": 1}])
+    OrderModel.create(buyer_id, [{"productId": item["id"], "quantity": 5}])
+    
+    assert stock(db, item) == (0, 0)
+
+
+def test_failed_order_puts_holds_back(db, buyer_id, make_item):
+    held_item = make_item(quantity=10)
+    scarce_item = make_item(quantity=1)
+    ReservationModel.reserve(buyer_id, held_item["id"], 3)
+    
+    with pytest.raises(ValueError, match="Insufficient stock"):
+        OrderModel.create(buyer_id, [
+            {"productId": held_item["id"], "quantity": 3},
+            {"productId": scarce_item["id"], "quantity": 2}
+        ])
+    
+    assert stock(db, held_item) == (10, 3)
+    assert stock(db, scarce_item) == (1, 0)
+    assert db.reservations.find_one({"productId": ObjectId(held_item["id"])})["quantity"] == 3
+
+
+def test_repair_reserved_recomputes_counters(db, buyer_id, make_item):
+    item = make_item(quantity=10)
+    orphan = make_item(quantity=10)
+    ReservationModel.reserve(buyer_id, item["id"], 4)
+    db.inventory.update_one({"_id": ObjectId(item["id"])}, {"$set": {"reserved": 7}})
+    db.inventory.update_one({"_id": ObjectId(orphan["id"])}, {"$set": {"reserved": 2}})
+    
+    assert ReservationModel.repair_reserved() == 2
+    assert stock(db, item) == (10, 4)
+    assert stock(db, orphan) == (10, 0)
+    assert ReservationModel.repair_reserved() == 0
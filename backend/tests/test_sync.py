@@ -0,0 +1,54 @@
+"""Delta sync: changed items then tombstones, paged within ``limit``."""
+from datetime import datetime, timedelta
+from app.models.inventory import InventoryModel
+
+
+def sync_all(client, headers, since, limit):
+    """Follow the cursor to the last page; return the pages."""
+    pages = []
+    params = {"since": since.isoformat(), "limit": limit}
+    while True:
+        response = client.get("/items/sync/changes", query_string=params, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        page = response.get_json()
+        pages.append(page)
+        if not page["hasMore"]:
+            return pages
+        params["cursor"] = page["cursor"]
+
+
+def test_tombstones_are_paged_after_items(client, auth_headers, owner_id, make_item):
+    headers = auth_headers(owner_id)
+    since = datetime.utcnow() - timedelta(minutes=1)
+    kept = [make_item(name=f"Kept {n}") for n in range(3)]
+    for n in range(4):
+        InventoryModel.delete(make_item(name=f"Gone {n}")["id"])
+    
+    pages = sync_all(client, headers, since, limit=2)
+    
+    assert all(len(page["items"]) + len(page["deleted"]) <= 2 for page in pages)
+    assert sorted(item["qrCode"] for page in pages for item in page["items"]) == sorted(item["qrCode"] for item in kept)
+    assert len({entry["id"] for page in pages for entry in page["deleted"]}) == 4
+    assert "watermark" in pages[-1]
+
+
+def test_full_last_item_page_defers_tombstones(client, auth_headers, owner_id, make_item):
+    headers = auth_headers(owner_id)
+    since = datetime.utcnow() - timedelta(minutes=1)
+    make_item()
+    InventoryModel.delete(make_item()["id"])
+    
+    first, second = sync_all(client, headers, since, limit=1)
+    
+    assert len(first["items"]) == 1 and first["deleted"] == []
+    assert second["items"] == [] and len(second["deleted"]) == 1
+
+
+def test_invalid_cursor_is_rejected(client, auth_headers, owner_id):
+    response = client.get(
+        "/items/sync/changes",
+        query_string={"since": datetime.utcnow().isoformat(), "cursor": "not-a-cursor"},
+        headers=auth_headers(owner_id)
+    )
+    
+    assert response.status_code == 400